@@ -0,0 +1,13 @@
+"""ctyped benchmarks.
+
+Measure per-call overhead of ctyped bound functions against raw ``ctypes``
+using shared object from ``tests/mylib`` (build it with ``tests/mylib/compile.sh``).
+
+Run from the repository root:
+
+.. code-block:: sh
+
+    python -m benchmarks --output results.json
+    python -m benchmarks --compare results.json
+
+"""
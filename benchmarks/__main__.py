@@ -0,0 +1,57 @@
+import argparse
+import json
+import re
+import sys
+
+from . import calls, sniff, startup, structs, threads  # noqa: F401 (registers suites)
+from .suite import SUITES, compare, get_meta, run_case
+
+
+def main(argv=None) -> int:
+
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='ctyped benchmarks')
+    parser.add_argument('suites', nargs='*', choices=[[]] + sorted(SUITES), help='Suites to run. Default: all.')
+    parser.add_argument('-k', '--filter', help='Regular expression to filter case names.')
+    parser.add_argument('-o', '--output', help='File to write JSON results into.')
+    parser.add_argument('-c', '--compare', help='File with JSON results to compare with.')
+    parser.add_argument('-t', '--threshold', type=float, default=0.1, help='Allowed slowdown fraction.')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='Number of timing runs per case.')
+
+    args = parser.parse_args(argv)
+
+    pattern = re.compile(args.filter) if args.filter else None
+    results = {}
+
+    for suite_name in args.suites or sorted(SUITES):
+
+        for case in SUITES[suite_name]():
+
+            if pattern and not pattern.search(case.name):
+                continue
+
+            result = run_case(case, repeat=args.repeat)
+            results[case.name] = result
+
+            print(f"{case.name:<40} {result['calls_per_sec']:>14,.0f} calls/s {result['usec_per_call']:>10.3f} us")
+
+    dumped = {'meta': get_meta(), 'results': results}
+    regressions = []
+
+    if args.compare:
+
+        with open(args.compare) as f:
+            regressions = compare(dumped, json.load(f), threshold=args.threshold)
+
+        for name in regressions:
+            print(f"Regression: {name} ({results[name]['baseline_ratio']:.2f} of baseline)", file=sys.stderr)
+
+    if args.output:
+
+        with open(args.output, 'w') as f:
+            json.dump(dumped, f, indent=2)
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,312 @@
+"""Declarations of `mylib` functions used in benchmarks.
+
+Every function is declared several times: as raw ``ctypes`` function,
+as a direct ctyped call (with and without ``fast_call``), as a ``wrap=True``
+method and as a method using ``cfunc`` manual wrapper. Since a C function
+may be declared only once per ``Library``, each variant uses its own library object.
+
+"""
+import ctypes
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable
+
+from ctyped.toolbox import CallbackPool, Library, c_callback
+from ctyped.types import CArray, CChars, CCharsW, CDouble, CRef, CPointer
+
+MYLIB_PATH = Path(__file__).parent.parent / 'tests' / 'mylib' / 'mylib.so'
+
+INT_BITS = (8, 16, 32, 64)
+
+
+############################################################
+# Raw ctypes
+
+raw = ctypes.CDLL(str(MYLIB_PATH), use_errno=True)
+
+
+class RawStruct(ctypes.Structure):
+    pass
+
+
+RawStruct._fields_ = [
+    ('first', ctypes.c_uint8),
+    ('second', ctypes.c_char_p),
+    ('third', ctypes.POINTER(RawStruct)),
+]
+
+RAW_CALLBACK = ctypes.CFUNCTYPE(ctypes.c_uint64, ctypes.c_uint64)
+
+
+def _raw(name: str, restype, *argtypes):
+    func = getattr(raw, f'f_prefix_one_{name}')
+    func.argtypes = argtypes
+    func.restype = restype
+    return func
+
+
+raw_chars = _raw('char_p', ctypes.c_char_p, ctypes.c_char_p)
+raw_wchars = _raw('wchar_p', ctypes.c_wchar_p, ctypes.c_wchar_p)
+raw_struct = _raw('handle_mystruct', RawStruct, RawStruct)
+raw_cref = _raw('byref_int', None, ctypes.POINTER(ctypes.c_int))
+raw_callback = _raw('backcaller', ctypes.c_uint64, ctypes.c_void_p)
+raw_int8 = _raw('uint8_add', ctypes.c_uint8, ctypes.c_uint8)
+raw_int16 = _raw('uint16_add', ctypes.c_uint16, ctypes.c_uint16)
+raw_int32 = _raw('uint32_add', ctypes.c_uint32, ctypes.c_uint32)
+raw_int64 = _raw('uint64_add', ctypes.c_uint64, ctypes.c_uint64)
+
+
+############################################################
+# Direct calls
+
+def declare_direct(lib: Library, bind: bool = True) -> SimpleNamespace:
+    """Declares functions called directly, binds types
+    (unless bind is False) and returns the functions as a namespace.
+
+    """
+    with lib.scope('f_prefix_one_'):
+
+        @lib.f('char_p')
+        def chars(val: str) -> str:
+            ...
+
+        @lib.f('wchar_p', str_type=CCharsW)
+        def wchars(val: str) -> str:
+            ...
+
+        @lib.f('handle_mystruct')
+        def struct(val: MyStruct) -> MyStruct:
+            ...
+
+        @lib.f('byref_int')
+        def cref(val: CRef) -> None:
+            ...
+
+        @lib.f('backcaller')
+        def callback(val: CPointer) -> int:
+            ...
+
+        @lib.f('uint8_add', int_bits=8)
+        def int8(val: int) -> int:
+            ...
+
+        @lib.f('uint16_add', int_bits=16)
+        def int16(val: int) -> int:
+            ...
+
+        @lib.f('uint32_add', int_bits=32)
+        def int32(val: int) -> int:
+            ...
+
+        @lib.f('uint64_add', int_bits=64)
+        def int64(val: int) -> int:
+            ...
+
+    bind and lib.bind_types()
+
+    return SimpleNamespace(**{
+        name: func for name, func in locals().items() if name not in {'lib', 'bind'}})
+
+
+direct_lib = Library(MYLIB_PATH)
+
+
+@direct_lib.structure(int_bits=8)
+class MyStruct:
+
+    first: int
+    second: str
+    third: 'MyStruct'
+
+
+@direct_lib.structure(int_bits=32, int_sign=True)
+class Point:
+
+    x: int
+    y: int
+
+
+@direct_lib.structure()
+class Samples:
+
+    values: CArray[CDouble, 16]
+
+
+class RawSamples(ctypes.Structure):
+
+    _fields_ = [('values', ctypes.c_double * 16)]
+
+
+direct = declare_direct(direct_lib)
+fast = declare_direct(Library(MYLIB_PATH, fast_call=True))
+cached = declare_direct(Library(MYLIB_PATH, str_type=CChars.cached()))
+instrumented = declare_direct(Library(MYLIB_PATH, instrument=True))
+
+
+############################################################
+# GIL
+
+def declare_spin(lib: Library) -> Callable:
+    """Declares spinning function and binds types."""
+
+    @lib.f('f_prefix_one_spin')
+    def spin(iterations: int) -> int:
+        ...
+
+    lib.bind_types()
+
+    return spin
+
+
+spin_released = declare_spin(Library(MYLIB_PATH, int_bits=64))
+spin_held = declare_spin(Library(MYLIB_PATH, int_bits=64, gil=True))
+
+
+############################################################
+# Methods (wrap=True)
+
+method = Library(MYLIB_PATH)
+
+
+@method.structure(int_bits=8)
+class MethodStruct:
+
+    first: int
+    second: str
+    third: 'MethodStruct'
+
+    @method.m('f_prefix_one_handle_mystruct')
+    def struct(self: 'MethodStruct') -> 'MethodStruct':
+        ...
+
+
+with method.scope('f_prefix_one_'):
+
+    class MethodText(str):
+
+        @method.m('char_p')
+        def chars(self: str) -> str:
+            ...
+
+    class MethodTextW(str):
+
+        @method.m('wchar_p', str_type=CCharsW)
+        def wchars(self: str) -> str:
+            ...
+
+    class MethodRef(CRef):
+
+        @method.m('byref_int')
+        def cref(self: CRef) -> None:
+            ...
+
+    class MethodInt(int):
+
+        @method.m('uint8_add', int_bits=8)
+        def int8(self: int) -> int:
+            ...
+
+        @method.m('uint16_add', int_bits=16)
+        def int16(self: int) -> int:
+            ...
+
+        @method.m('uint32_add', int_bits=32)
+        def int32(self: int) -> int:
+            ...
+
+        @method.m('uint64_add', int_bits=64)
+        def int64(self: int) -> int:
+            ...
+
+method.bind_types()
+
+
+############################################################
+# Methods with manual call (cfunc)
+
+manual = Library(MYLIB_PATH)
+
+
+@manual.structure(int_bits=8)
+class ManualStruct:
+
+    first: int
+    second: str
+    third: 'ManualStruct'
+
+    @manual.m('f_prefix_one_handle_mystruct')
+    def struct(self: 'ManualStruct', cfunc) -> 'ManualStruct':
+        return cfunc(self)
+
+
+with manual.scope('f_prefix_one_'):
+
+    class ManualText(str):
+
+        @manual.m('char_p')
+        def chars(self: str, cfunc) -> str:
+            return cfunc(self)
+
+    class ManualTextW(str):
+
+        @manual.m('wchar_p', str_type=CCharsW)
+        def wchars(self: str, cfunc) -> str:
+            return cfunc(self)
+
+    class ManualRef(CRef):
+
+        @manual.m('byref_int')
+        def cref(self: CRef, cfunc) -> None:
+            return cfunc(self)
+
+    class ManualInt(int):
+
+        @manual.m('uint8_add', int_bits=8)
+        def int8(self: int, cfunc) -> int:
+            return cfunc(self)
+
+        @manual.m('uint16_add', int_bits=16)
+        def int16(self: int, cfunc) -> int:
+            return cfunc(self)
+
+        @manual.m('uint32_add', int_bits=32)
+        def int32(self: int, cfunc) -> int:
+            return cfunc(self)
+
+        @manual.m('uint64_add', int_bits=64)
+        def int64(self: int, cfunc) -> int:
+            return cfunc(self)
+
+manual.bind_types()
+
+
+############################################################
+# Callbacks
+
+@c_callback
+def hook(num: int) -> int:
+    return num + 10
+
+
+@RAW_CALLBACK
+def raw_hook(num):
+    return num + 10
+
+
+callbacks = CallbackPool()
+
+
+@callbacks.prototype
+def on_num(num: int, user_data: CPointer) -> int:
+    ...
+
+
+callbacks_lib = Library(MYLIB_PATH)
+
+
+@callbacks_lib.f('f_prefix_one_backcaller_data')
+def backcaller_data(hook: CPointer, user_data: CPointer) -> int:
+    ...
+
+
+callbacks_lib.bind_types()
@@ -0,0 +1,130 @@
+"""Per-call marshalling overhead for every argument and result kind."""
+import ctypes
+from typing import List
+
+from ctyped.toolbox import CRef, CRefPool, c_callback
+
+from .suite import Case, suite
+
+
+@suite('calls')
+def get_cases() -> List[Case]:
+    from . import bindings as b
+
+    struct_raw = b.RawStruct(first=2, second=b'any', third=ctypes.pointer(b.RawStruct(first=10)))
+    struct_direct = b.MyStruct(first=2, second='any', third=b.MyStruct(first=10))
+    struct_method = b.MethodStruct(first=2, second='any', third=b.MethodStruct(first=10))
+    struct_manual = b.ManualStruct(first=2, second='any', third=b.ManualStruct(first=10))
+
+    cases = [
+        ('chars', {
+            'raw': ('func(b"mind")', b.raw_chars),
+            'direct': ('func("mind")', b.direct.chars),
+            'fast': ('func("mind")', b.fast.chars),
+            'instrumented': ('func("mind")', b.instrumented.chars),
+            'cached': ('func("mind")', b.cached.chars),
+            'bytes': ('func(b"mind")', b.direct.chars),
+            'method': ('obj.chars()', b.MethodText('mind')),
+            'cfunc': ('obj.chars()', b.ManualText('mind')),
+        }),
+        ('wchars', {
+            'raw': ('func("mind")', b.raw_wchars),
+            'direct': ('func("mind")', b.direct.wchars),
+            'fast': ('func("mind")', b.fast.wchars),
+            'instrumented': ('func("mind")', b.instrumented.wchars),
+            'method': ('obj.wchars()', b.MethodTextW('mind')),
+            'cfunc': ('obj.wchars()', b.ManualTextW('mind')),
+        }),
+        ('struct', {
+            'raw': ('func(obj)', b.raw_struct, struct_raw),
+            'direct': ('func(obj)', b.direct.struct, struct_direct),
+            'fast': ('func(obj)', b.fast.struct, struct_direct),
+            'instrumented': ('func(obj)', b.instrumented.struct, struct_direct),
+            'method': ('obj.struct()', struct_method),
+            'cfunc': ('obj.struct()', struct_manual),
+        }),
+        ('cref', {
+            'raw': ('func(obj)', b.raw_cref, ctypes.byref(ctypes.c_int())),
+            'direct': ('func(obj)', b.direct.cref, b.CRef.cint()),
+            'fast': ('func(obj)', b.fast.cref, b.CRef.cint()),
+            'instrumented': ('func(obj)', b.instrumented.cref, b.CRef.cint()),
+            'method': ('obj.cref()', b.MethodRef(ctypes.c_int())),
+            'cfunc': ('obj.cref()', b.ManualRef(ctypes.c_int())),
+        }),
+        ('callback', {
+            'raw': ('func(obj)', b.raw_callback, b.raw_hook),
+            'direct': ('func(obj)', b.direct.callback, b.hook),
+            'fast': ('func(obj)', b.fast.callback, b.hook),
+            'instrumented': ('func(obj)', b.instrumented.callback, b.hook),
+        }),
+    ]
+
+    for bits in b.INT_BITS:
+        name = f'int{bits}'
+        cases.append((name, {
+            'raw': ('func(10)', getattr(b, f'raw_{name}')),
+            'direct': ('func(10)', getattr(b.direct, name)),
+            'fast': ('func(10)', getattr(b.fast, name)),
+            'instrumented': ('func(10)', getattr(b.instrumented, name)),
+            'method': (f'obj.{name}()', b.MethodInt(10)),
+            'cfunc': (f'obj.{name}()', b.ManualInt(10)),
+        }))
+
+    result = []
+
+    for kind, variants in cases:
+
+        for variant, (stmt, *env) in variants.items():
+
+            if stmt.startswith('func'):
+                env = dict(zip(('func', 'obj'), env))
+
+            else:
+                env = {'obj': env[0]}
+
+            result.append(Case(name=f'calls.{kind}.{variant}', stmt=stmt, env=env))
+
+    # Callbacks created per call against dispatching through a single callback.
+    def closure(shift):
+
+        @c_callback
+        def hook(num: int) -> int:
+            return num + shift
+
+        return b.direct.callback(hook)
+
+    def dispatch(shift):
+        with b.on_num.bind(lambda num: num + shift) as user_data:
+            return b.backcaller_data(b.on_num.thunk, user_data)
+
+    for variant, func in (('closure', closure), ('dispatch', dispatch)):
+        result.append(Case(name=f'calls.callback.{variant}', stmt='func(1)', env={'func': func}))
+
+    # Output parameters allocated per call against taken from a pool.
+    refs = CRefPool()
+
+    for variant, stmt in (
+        ('alloc', 'func(CRef.cint())'),
+        ('pool', 'func(refs.cint()); refs.reset()'),
+    ):
+        result.append(Case(
+            name=f'calls.cref.out.{variant}',
+            stmt=stmt,
+            env={'func': b.fast.cref, 'CRef': CRef, 'refs': refs},
+        ))
+
+    # Batched calls against a Python loop. Values are in int8 bounds.
+    values = list(range(128)) * 8
+
+    for variant, stmt in (
+        ('loop', '[func(value) for value in values]'),
+        ('map', 'func.map(values)'),
+    ):
+        result.append(Case(
+            name=f'calls.int8.batch.{variant}',
+            stmt=stmt,
+            env={'func': b.direct.int8, 'values': values},
+            calls=len(values),
+        ))
+
+    return result
@@ -0,0 +1,64 @@
+"""Library sniffing: ELF symbols table reader against 'nm', DWARF reading overhead."""
+import sysconfig
+from ctypes.util import find_library
+from pathlib import Path
+from typing import List
+
+from .suite import Case, suite
+
+LIBS = ['c', 'crypto']
+"""System libraries to sniff (the bigger, the better)."""
+
+
+def find_libpath(name: str) -> str:
+    """Returns full path to a system library or empty string if not found.
+
+    :param name: Library name without 'lib' prefix.
+
+    """
+    filename = find_library(name)
+
+    if not filename:
+        return ''
+
+    multiarch = sysconfig.get_config_var('MULTIARCH') or ''
+
+    for root in ('/lib', '/usr/lib', '/lib64', '/usr/lib64'):
+
+        for path in (Path(root) / multiarch / filename, Path(root) / filename):
+            if path.exists():
+                return str(path)
+
+    return ''
+
+
+@suite('sniff')
+def get_cases() -> List[Case]:
+    from ctyped.sniffer import ElfSymbolSniffer, NmSymbolSniffer
+
+    result = []
+
+    for name in LIBS:
+        libpath = find_libpath(name)
+
+        if not libpath:
+            continue
+
+        for variant, sniffer in (('nm', NmSymbolSniffer), ('elf', ElfSymbolSniffer)):
+            result.append(Case(
+                name=f'sniff.lib{name}.{variant}',
+                stmt='sniffer(libpath).sniff()',
+                env={'sniffer': sniffer, 'libpath': libpath},
+            ))
+
+    # Debugging information parsing overhead.
+    from .bindings import MYLIB_PATH
+
+    for variant, debug in (('elf', False), ('dwarf', True)):
+        result.append(Case(
+            name=f'sniff.mylib.{variant}',
+            stmt='sniffer(libpath, debug=debug).sniff()',
+            env={'sniffer': ElfSymbolSniffer, 'libpath': MYLIB_PATH, 'debug': debug},
+        ))
+
+    return result
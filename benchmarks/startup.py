@@ -0,0 +1,113 @@
+"""Declarations startup cost: eager types binding against on disk cache and lazy binding,
+string type hints resolution for bindings of different sizes (with and without on disk cache).
+
+"""
+import os
+from ctypes import CDLL
+from keyword import iskeyword
+from tempfile import mkdtemp
+from types import CodeType
+from typing import List, Optional
+
+from .suite import Case, suite
+
+SIZES = (100, 800)
+"""Numbers of functions to declare with string type hints."""
+
+
+def compile_many(libpath: str, names: List[str], directory: str) -> CodeType:
+    """Writes a module declaring functions with string type hints and binding types,
+    returns its compiled code.
+
+    :param libpath: Library path.
+
+    :param names: Functions names.
+
+    :param directory: Directory to write the module to.
+
+    """
+    source = [
+        'from ctyped.toolbox import Library',
+        'from ctyped.types import CInt32, CRef',
+        f'lib = Library({libpath!r}, cache=cache)',
+    ]
+
+    for name in names:
+        source.append(f"@lib.f\ndef {name}(first: 'CInt32', second: 'str', third: 'CRef') -> 'CInt32': ...")
+
+    source.append('lib.bind_types()')
+
+    path = os.path.join(directory, f'startup_many_{len(names)}.py')
+
+    with open(path, 'w') as f:
+        f.write('\n'.join(source))
+
+    return compile('\n'.join(source), path, 'exec')
+
+
+def declare_many(code: CodeType, cache: Optional[str] = None):
+    """Runs declarations module compiled by ``compile_many()``.
+
+    :param code: Module code.
+
+    :param cache: Bind cache directory. Types are resolved every time if not set.
+
+    """
+    exec(code, {'__name__': 'startup_many', '__file__': code.co_filename, 'cache': cache})
+
+
+@suite('startup')
+def get_cases() -> List[Case]:
+    from ctyped.toolbox import Library
+    from .bindings import MYLIB_PATH, declare_direct
+
+    cache_dir = mkdtemp(prefix='ctyped-bench-')
+    funcs = len(vars(declare_direct(Library(MYLIB_PATH, cache=cache_dir))))  # Warms up cache.
+
+    result = []
+
+    for variant, options in (
+        ('eager', {}),
+        ('cache', {'cache': cache_dir}),
+        ('lazy', {'lazy': True}),
+    ):
+        # Lazy functions are bound on the first call.
+        bind = not options.get('lazy')
+
+        result.append(Case(
+            name=f'startup.{variant}',
+            stmt='declare(Library(libpath, **options), bind=bind)',
+            env={'declare': declare_direct, 'Library': Library, 'libpath': MYLIB_PATH, 'options': options, 'bind': bind},
+            calls=funcs,
+        ))
+
+    from ctyped.sniffer import ElfSymbolSniffer
+    from .sniff import find_libpath
+
+    libpath = find_libpath('c')
+
+    if libpath:
+        lib = CDLL(libpath)
+
+        # Only default versions of symbols can be looked up.
+        names = sorted({
+            symbol.name for symbol in ElfSymbolSniffer(libpath, debug=False).sniff().symbols
+            if symbol.name.isidentifier() and not iskeyword(symbol.name) and hasattr(lib, symbol.name)})
+
+        for size in SIZES:
+
+            if size > len(names):
+                continue
+
+            code = compile_many(libpath, names[:size], cache_dir)
+            declare_many(code, cache_dir)  # Warms up cache.
+
+            for suffix, cache in (('', None), ('.cache', cache_dir)):
+                result.append(Case(
+                    name=f'startup.hints.{size}{suffix}',
+                    stmt='declare(code, cache)',
+                    env={'declare': declare_many, 'code': code, 'cache': cache},
+                    calls=size,
+                ))
+
+    return result
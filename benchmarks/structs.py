@@ -0,0 +1,107 @@
+"""Structure fields access overhead."""
+import ctypes
+import struct
+from typing import List
+
+from .suite import Case, suite
+
+
+@suite('structs')
+def get_cases() -> List[Case]:
+    from ctyped.toolbox import Arena
+    from . import bindings as b
+
+    variants = {
+        'raw': b.RawStruct(first=2, second=b'any', third=ctypes.pointer(b.RawStruct(first=10))),
+        'ctyped': b.MyStruct(first=2, second='any', third=b.MyStruct(first=10)),
+    }
+
+    stmts = [
+        ('get_int', 'obj.first'),
+        ('set_int', 'obj.first = 3'),
+        ('get_str', 'obj.second'),
+        ('get_pointer', 'obj.third'),
+    ]
+
+    result = []
+
+    for kind, stmt in stmts:
+        for variant, obj in variants.items():
+            result.append(Case(name=f'structs.{kind}.{variant}', stmt=stmt, env={'obj': obj}))
+
+    result.extend([
+        Case(name='structs.set_str.raw', stmt='obj.second = b"some"', env={'obj': variants['raw']}),
+        Case(name='structs.set_str.ctyped', stmt='obj.second = "some"', env={'obj': variants['ctyped']}),
+        Case(name='structs.create.raw', stmt='cls(first=2, second=b"any")', env={'cls': b.RawStruct}),
+        Case(name='structs.create.ctyped', stmt='cls(first=2, second="any")', env={'cls': b.MyStruct}),
+    ])
+
+    # Structures with strings and substructures built in a loop: on the heap against in an arena
+    # (the latter is slower, it is here to keep track of arena overhead).
+    build = 'for idx in range(100):\n    cls(first=idx, second="any", third=cls(first=idx, second="sub"))'
+
+    result.extend([
+        Case(name='structs.build_100.heap', stmt=build, env={'cls': b.MyStruct}),
+        Case(
+            name='structs.build_100.arena',
+            stmt=(
+                'with Arena() as arena:\n'
+                '    for idx in range(100):\n'
+                '        arena.new(cls, first=idx, second="any", third=arena.new(cls, first=idx, second="sub"))'),
+            env={'cls': b.MyStruct, 'Arena': Arena}),
+    ])
+
+    size = 1000
+    env = {'cls': b.Point, 'records': [(idx, idx) for idx in range(size)], 'size': size}
+
+    result.extend([
+        Case(
+            name='structs.fill_1000.loop',
+            stmt='arr = cls.array(size)\nfor idx in range(size):\n    arr[idx].x = idx\n    arr[idx].y = idx',
+            env=env),
+        Case(name='structs.fill_1000.from_records', stmt='cls.from_records(records)', env=env),
+    ])
+
+    env_bytes = {
+        'cls': b.Point, 'obj': b.Point(x=1, y=2), 'struct': struct,
+        'data': bytes(b.Point.from_records(env['records'])),
+    }
+
+    result.extend([
+        Case(name='structs.to_bytes.fields', stmt="struct.pack('ii', obj.x, obj.y)", env=env_bytes),
+        Case(name='structs.to_bytes.layout', stmt='obj.to_bytes()', env=env_bytes),
+        Case(
+            name='structs.unpack_1000.fields',
+            stmt="[cls(x=x, y=y) for x, y in struct.iter_unpack('ii', data)]",
+            env=env_bytes),
+        Case(name='structs.unpack_1000.layout', stmt='list(cls.iter_unpack(data))', env=env_bytes),
+    ])
+
+    # Inline arrays: ctypes arrays against memoryviews.
+    env_arrays = {'raw': b.RawSamples(), 'obj': b.Samples(), 'values': [float(idx) for idx in range(16)]}
+
+    result.extend([
+        Case(name='structs.array_sum.raw', stmt='sum(raw.values)', env=env_arrays),
+        Case(name='structs.array_sum.ctyped', stmt='sum(obj.values)', env=env_arrays),
+        Case(name='structs.array_set.raw', stmt='raw.values = (ctypes.c_double * 16)(*values)', env={
+            **env_arrays, 'ctypes': ctypes}),
+        Case(name='structs.array_set.ctyped', stmt='obj.values = values', env=env_arrays),
+    ])
+
+    try:
+        import numpy
+
+        env_arrays['values_numpy'] = numpy.arange(16, dtype=numpy.float64)
+        result.append(Case(name='structs.array_set.numpy', stmt='obj.values = values_numpy', env=env_arrays))
+
+        env['values'] = numpy.arange(size, dtype=numpy.int32)
+
+        result.append(Case(
+            name='structs.fill_1000.numpy',
+            stmt="view = cls.as_numpy(cls.array(size))\nview['x'] = values\nview['y'] = values",
+            env=env))
+
+    except ImportError:  # pragma: nocover
+        pass
+
+    return result
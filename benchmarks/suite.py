@@ -0,0 +1,99 @@
+import platform
+import sys
+import timeit
+from collections import namedtuple
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List
+
+from ctyped import VERSION_STR
+
+Case = namedtuple('Case', ['name', 'stmt', 'env', 'calls'], defaults=[1])
+"""Benchmark case: statement to time, the names it uses
+and the number of calls the statement makes."""
+
+SUITES: Dict[str, Callable[[], Iterable[Case]]] = {}
+"""Registered suites: suite name -> cases factory."""
+
+
+def suite(name: str) -> Callable:
+    """Decorator to register benchmark cases factory under a name.
+
+    Factory is called lazily, so that only bindings required
+    by requested suites are loaded. It may be a generator:
+    every case is run as soon as it is yielded.
+
+    :param name: Suite name.
+
+    """
+    def suite_(func: Callable) -> Callable:
+        SUITES[name] = func
+        return func
+
+    return suite_
+
+
+def run_case(case: Case, *, repeat: int = 5, min_time: float = 0.2) -> dict:
+    """Times a case and returns its measurements.
+
+    :param case: Case to run.
+
+    :param repeat: Number of timing runs. The best one is used.
+
+    :param min_time: Minimal duration of a timing run in seconds.
+
+    """
+    timer = timeit.Timer(case.stmt, globals=case.env)
+
+    number, elapsed = timer.autorange()
+
+    if elapsed < min_time:
+        number = int(number * min_time / max(elapsed, 1e-9)) or 1
+
+    best = min(timer.repeat(repeat=repeat, number=number)) / number / case.calls
+
+    return {
+        'calls_per_sec': 1 / best,
+        'usec_per_call': best * 1e6,
+        'number': number,
+    }
+
+
+def get_meta() -> dict:
+    """Returns information about the environment benchmarks run in."""
+    return {
+        'ctyped': VERSION_STR,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'executable': sys.executable,
+        'date': f'{datetime.utcnow().isoformat()}Z',
+    }
+
+
+def compare(current: dict, baseline: dict, *, threshold: float = 0.1) -> List[str]:
+    """Compares results with baseline results.
+
+    Returns names of cases which became slower more than allowed.
+
+    :param current: Current results.
+
+    :param baseline: Baseline results (e.g. from previous release).
+
+    :param threshold: Allowed slowdown fraction.
+
+    """
+    regressions = []
+
+    for name, result in current['results'].items():
+        result_base = baseline['results'].get(name)
+
+        if not result_base:
+            continue
+
+        ratio = result['calls_per_sec'] / result_base['calls_per_sec']
+        result['baseline_ratio'] = ratio
+
+        if ratio < 1 - threshold:
+            regressions.append(name)
+
+    return regressions
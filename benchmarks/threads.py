@@ -0,0 +1,49 @@
+"""Multi-threaded throughput depending on GIL handling (see ``Library(gil=...)``).
+
+Every case runs the same number of calls spread across a number of threads.
+Functions releasing GIL are expected to scale with threads for long calls,
+while functions holding GIL are expected to be cheaper for short calls.
+
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
+
+from .suite import Case, suite
+
+THREADS = (1, 2, 4, 8)
+
+ITERATIONS = {
+    'short': 1,
+    'long': 100_000,
+}
+
+CALLS = {
+    'short': 20_000,
+    'long': 400,
+}
+
+
+@suite('threads')
+def get_cases() -> Iterator[Case]:
+    # Cases are yielded to be run one by one, so that every pool is shut down after its case.
+    from . import bindings as b
+
+    for length, iterations in ITERATIONS.items():
+
+        for gil, func in (('held', b.spin_held), ('released', b.spin_released)):
+
+            for threads in THREADS:
+                calls = CALLS[length]
+
+                def work(_, func=func, iterations=iterations, calls=calls // threads):
+                    for _ in range(calls):
+                        func(iterations)
+
+                with ThreadPoolExecutor(max_workers=threads) as pool:
+
+                    yield Case(
+                        name=f'threads.{length}.{gil}.{threads}',
+                        stmt='list(pool.map(work, range(threads)))',
+                        env={'pool': pool, 'work': work, 'threads': threads},
+                        calls=calls,
+                    )
@@ -0,0 +1,122 @@
+import asyncio
+from ctypes import get_errno, set_errno
+from concurrent.futures import Executor
+from functools import partial, partialmethod
+from typing import Any, Callable, Dict, Optional, Tuple, TYPE_CHECKING
+from weakref import WeakKeyDictionary
+
+if TYPE_CHECKING:  # pragma: nocover
+    from .library import Library
+
+
+def _call(func: Callable, args: tuple) -> Tuple[Any, int]:
+    # Runs in executor. errno is thread local, so it's passed back alongside with the result.
+    result = func(*args)
+    return result, get_errno()
+
+
+class AsyncCaller:
+    """Namespace to call library functions from asyncio code.
+
+    Functions are run in an executor, so that blocking C calls
+    do not stall event loop. Functions are accessible by
+    Python or C names (attribute or item access).
+
+    .. code-block:: python
+
+        lib = Library('mylib', aio_limit=4)
+
+        @lib.function
+        def blocking_func(timeout: int) -> int:
+            ...
+
+        lib.bind_types()
+
+        async def main():
+            result = await lib.aio.blocking_func(10)
+            errno = get_last_error()  # errno from this very call
+
+    """
+    def __init__(self, library: 'Library', *, executor: Optional[Executor] = None, limit: Optional[int] = None):
+        """
+
+        :param library: Library to call functions from.
+
+        :param executor: Executor to run functions in. Default: event loop default executor.
+
+        :param limit: Maximum number of functions calls running concurrently.
+
+        """
+        self._library = library
+        self._executor = executor
+        self._limit = limit
+        self._semaphores: WeakKeyDictionary = WeakKeyDictionary()
+        self._funcs: Dict[str, Callable] = {}
+
+    def _get_semaphore(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(loop)
+
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self._limit)
+
+        return semaphore
+
+    def _get_func(self, name: str) -> Callable:
+        funcs = self._library.funcs
+        func = funcs.get(name)
+
+        if func is None:
+            # Try Python name.
+            for func_candidate in funcs.values():
+                func_c = getattr(func_candidate, 'cfunc', func_candidate)
+
+                if func_c.ctyped.name_py == name:
+                    func = func_candidate
+                    break
+
+        if func is None:
+            raise KeyError(f'Function {name} is not declared in {self._library.name}')
+
+        if isinstance(func, partialmethod):
+            # Method. Instance is to be passed explicitly.
+            func = partial(func.func, *func.args, **func.keywords)
+
+        return func
+
+    def __getitem__(self, name: str) -> Callable:
+        func_async = self._funcs.get(name)
+
+        if func_async is None:
+            func = self._get_func(name)
+
+            async def func_async(*args):
+
+                loop = asyncio.get_event_loop()
+
+                if self._limit:
+                    async with self._get_semaphore(loop):
+                        result, errno = await loop.run_in_executor(self._executor, _call, func, args)
+
+                else:
+                    result, errno = await loop.run_in_executor(self._executor, _call, func, args)
+
+                # Make errno available for get_last_error() in the calling thread.
+                set_errno(errno)
+
+                return result
+
+            func_async.__name__ = name
+            self._funcs[name] = func_async
+
+        return func_async
+
+    def __getattr__(self, name: str) -> Callable:
+
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        try:
+            return self[name]
+
+        except KeyError as e:
+            raise AttributeError(*e.args)
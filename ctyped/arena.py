@@ -0,0 +1,141 @@
+import ctypes
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from .types import CastedField, CChars
+
+
+@lru_cache(maxsize=None)
+def _get_layout(typecls: Any) -> Tuple[int, int, Dict[str, Any]]:
+    # Returns size, alignment and native descriptors of string fields
+    # (those placed into arenas) for a ctypes type: field name -> descriptor.
+    fields_chars = {}
+
+    if issubclass(typecls, (ctypes.Structure, ctypes.Union)):
+
+        for cls in typecls.__mro__:
+            for name, attr in vars(cls).items():
+                if isinstance(attr, CastedField) and issubclass(attr.casted, CChars):
+                    fields_chars.setdefault(name, attr.field)
+
+    return ctypes.sizeof(typecls), ctypes.alignment(typecls), fields_chars
+
+
+class Arena:
+    """Memory arena for temporary C data.
+
+    Objects (structures, arrays) created with ``.new()`` are placed into contiguous
+    memory chunks, as well as strings their fields are initialized with.
+    Chunks are freed all at once on exit.
+
+    Other objects are not affected, even if created within the block.
+
+    .. code-block:: python
+
+        with Arena() as arena:
+            first = arena.new(MyStruct, first=1, second='one')
+            second = arena.new(MyStruct, first=2, second='two', third=first)
+            handle_mystruct(second)
+
+    .. warning:: Objects placed in an arena must not be used after exiting it.
+
+    """
+    __slots__ = ('size', '_chunks', '_view', '_address', '_offset', '_limit')
+
+    def __init__(self, size: int = 4096):
+        """
+
+        :param size: Chunk size (bytes). Larger allocations get chunks of their own.
+
+        """
+        self.size = size
+        self._chunks: List[Any] = []
+        self._view: Optional[memoryview] = None
+        self._address = 0
+        self._offset = 0
+        self._limit = 0
+
+    def __enter__(self) -> 'Arena':
+        return self
+
+    def __exit__(self, *args):
+        self.free()
+
+    @property
+    def allocated(self) -> int:
+        """Number of bytes allocated for chunks."""
+        return sum(len(chunk) for chunk in self._chunks)
+
+    def _add_chunk(self, size: int):
+        # Chunks are allocated zeroed (and aligned) by ctypes.
+        chunk = (ctypes.c_char * max(self.size, size))()
+        self._chunks.append(chunk)
+        self._view = memoryview(chunk).cast('B')
+        self._address = ctypes.addressof(chunk)
+        self._offset = 0
+        self._limit = len(chunk)
+
+    def new(self, typecls: Any, *args, **kwargs) -> Any:
+        """Creates an object of a ctypes type (e.g. structure or array) in the arena.
+
+        Strings fields (``str`` type hints) initialized with keyword arguments
+        are placed into the arena too. Strings assigned to the object fields later are not.
+
+        :param typecls:
+
+        :param args: Positional arguments to initialize the object with (e.g. array items).
+
+        :param kwargs: Keyword arguments to initialize the object with (e.g. structure fields).
+
+        """
+        size, align, fields_chars = _get_layout(typecls)
+        offset = -(-self._offset // align) * align
+
+        if offset + size > self._limit:
+            self._add_chunk(size)
+            offset = 0
+
+        self._offset = offset + size
+        obj = typecls.from_address(self._address + offset)
+
+        if args:
+            obj.__init__(*args)
+
+        # Memory is zeroed, so fields are set directly, as ctypes initializer does.
+        for name, value in kwargs.items():
+            field = fields_chars.get(name)
+
+            if field is not None and value.__class__ is str:
+                field.__set__(obj, self.chars(value.encode('utf-8')))
+
+            else:
+                setattr(obj, name, value)
+
+        return obj
+
+    def chars(self, data: bytes) -> int:
+        """Copies data into the arena as a null-terminated string. Returns its address.
+
+        :param data:
+
+        """
+        offset = self._offset
+        size = len(data)
+
+        if offset + size + 1 > self._limit:
+            self._add_chunk(size + 1)
+            offset = 0
+
+        # Terminator is already there: chunks are zeroed and not reused.
+        self._offset = offset + size + 1
+        self._view[offset:offset + size] = data  # type: ignore
+
+        return self._address + offset
+
+    def free(self):
+        """Frees all chunks."""
+        self._chunks.clear()
+        self._view = None
+        self._address = 0
+        self._offset = 0
+        self._limit = 0
@@ -0,0 +1,277 @@
+"""On-disk cache of types resolved by ``Library.bind_types()``."""
+import ctypes
+import hashlib
+import json
+import logging
+import os
+import sys
+from importlib import import_module
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import VERSION_STR
+from .utils import _MISSING, FuncInfo
+
+LOGGER = logging.getLogger(__name__)
+
+
+def get_cache_dir() -> Path:
+    """Returns default directory for ctyped caches."""
+    return Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache') / 'ctyped'
+
+
+def type_to_ref(obj: Any) -> Optional[str]:
+    """Returns a reference to a type (``module:qualname``), which can be turned back
+    into the type with ``ref_to_type()``. None if type can't be referenced.
+
+    Pointer types are referenced as ``*`` followed by pointed type reference.
+
+    :param obj:
+
+    """
+    if obj is None:
+        return None
+
+    if not isinstance(obj, type):
+        raise TypeError(f'Not a type: {obj!r}')
+
+    if issubclass(obj, ctypes._Pointer):
+        target = type_to_ref(obj._type_)
+        return None if target is None else f'*{target}'
+
+    qualname = obj.__qualname__
+
+    if '<' in qualname:
+        # Local classes.
+        return None
+
+    ref = f'{obj.__module__}:{qualname}'
+
+    try:
+        resolved = ref_to_type(ref)
+
+    except (ImportError, AttributeError):
+        resolved = None
+
+    if resolved is not obj:
+        # Dynamically created or shadowed types.
+        return None
+
+    return ref
+
+
+def ref_to_type(ref: Optional[str]) -> Any:
+    """Returns a type referenced by ``type_to_ref()``.
+
+    :param ref:
+
+    """
+    if ref is None:
+        return None
+
+    if ref.startswith('*'):
+        return ctypes.POINTER(ref_to_type(ref[1:]))
+
+    module_name, _, qualname = ref.partition(':')
+
+    # Module may be being imported now (declarations are there), so sys.modules is checked first.
+    obj = sys.modules.get(module_name) or import_module(module_name)
+
+    for attr in qualname.split('.'):
+        obj = getattr(obj, attr)
+
+    if not isinstance(obj, type):
+        raise AttributeError(f'Not a type: {ref}')
+
+    return obj
+
+
+def _stat(path: str) -> Optional[List[int]]:
+    # File identity without reading it: modification time and size.
+    try:
+        stat = os.stat(path)
+
+    except OSError:
+        return None
+
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+class BindCache:
+    """On-disk cache of types resolved for library functions.
+
+    Cache file is keyed by the source of declarations: files of modules functions
+    are declared in (path, modification time and size), functions names and options.
+    Type hints are not resolved for that, so aliases changed in other modules
+    than the declaring ones are not tracked.
+
+    Its contents are valid for the same library file: the same modification time and size,
+    or, if those changed, the same contents hash.
+
+    Types of functions with string hints declared outside of module files
+    (e.g. in ``exec()``) are not taken from cache.
+
+    """
+    def __init__(self, directory: Path, *, libpath: str, funcs: Dict[str, FuncInfo]):
+        """
+
+        :param directory: Directory to store cache files in.
+
+        :param libpath: Library file path.
+
+        :param funcs: Declared functions info: C name -> info.
+
+        """
+        self.libpath = os.fspath(libpath)
+        self._fingerprint: Optional[List[Any]] = None
+        self._unresolved = set()
+
+        # Functions of a module share globals, functions of a scope share options.
+        namespaces = {id(info.namespace): info.namespace or {} for info in funcs.values()}
+        scopes = {id(info.options): info.options for info in funcs.values()}
+        modules = {}
+        sourceless = []
+
+        for namespace in namespaces.values():
+            module_file = namespace.get('__file__')
+
+            if module_file:
+                modules[module_file] = _stat(module_file)
+
+        if len(modules) < len(namespaces):
+
+            for name_c, info in funcs.items():
+
+                if not (info.namespace or {}).get('__file__'):
+                    # No source to key on: declaration itself is described.
+                    sourceless.append((name_c, info.name_py, info.annotations))
+
+                    if str in map(type, info.annotations.values()):
+                        self._unresolved.add(name_c)
+
+        key = repr([
+            VERSION_STR, os.path.abspath(libpath), modules, list(scopes.values()), sourceless, list(funcs)])
+
+        self.path = os.path.join(directory, f'bind-{hashlib.sha256(key.encode()).hexdigest()}.json')
+
+    def _get_fingerprint(self) -> List[Any]:
+        # Library file identity: modification time, size and contents hash.
+        fingerprint = self._fingerprint
+
+        if fingerprint is None:
+            stat = _stat(self.libpath)
+
+            if stat is None:
+                fingerprint = [self.libpath]
+
+            else:
+                with open(self.libpath, 'rb') as f:
+                    contents_hash = hashlib.sha256(f.read()).hexdigest()
+
+                fingerprint = [self.libpath, *stat, contents_hash]
+
+            self._fingerprint = fingerprint
+
+        return fingerprint
+
+    def _check_fingerprint(self, cached: dict) -> bool:
+        # Library file is only hashed if its modification time or size changed.
+        fingerprint = cached.get('fingerprint') or []
+
+        if len(fingerprint) == 4 and fingerprint[:3] == [self.libpath, *(_stat(self.libpath) or [])]:
+            self._fingerprint = fingerprint
+            return True
+
+        actual = self._get_fingerprint()
+
+        if fingerprint[3:] != actual[3:] or len(actual) != 4:
+            return False
+
+        # Same contents: file is touched or copied over. Stored for subsequent starts not to hash it.
+        self._dump(cached)
+
+        return True
+
+    def load(self) -> Dict[str, Tuple[List[Any], Any, bool]]:
+        """Returns cached types: C name -> (argtypes, restype, restype_set).
+
+        Functions types for which can't be restored are omitted.
+
+        """
+        try:
+            with open(self.path) as f:
+                cached = json.load(f)
+
+        except (OSError, ValueError):
+            return {}
+
+        if not self._check_fingerprint(cached):
+            LOGGER.debug(f'Bind cache is stale: {self.path}')
+            return {}
+
+        # Functions share signatures, so those are stored once and referenced by index.
+        types = []
+
+        for ref in cached.get('types', []):
+
+            try:
+                types.append(ref_to_type(ref))
+
+            except (ImportError, AttributeError) as e:
+                LOGGER.debug(f'Unable to restore cached type {ref}: {e}')
+                types.append(_MISSING)
+
+        signatures = []
+
+        for argtypes, restype, restype_set in cached.get('signatures', []):
+            argtypes = [types[idx] for idx in argtypes]
+            restype = None if restype is None else types[restype]
+
+            signatures.append(
+                None if restype is _MISSING or _MISSING in argtypes else (argtypes, restype, restype_set))
+
+        unresolved = self._unresolved
+
+        return {
+            name_c: signatures[idx] for name_c, idx in cached.get('funcs', {}).items()
+            if signatures[idx] and name_c not in unresolved}
+
+    def save(self, funcs: Dict[str, Tuple[List[Any], Any, bool]]):
+        """Stores resolved types.
+
+        :param funcs: C name -> (argtypes, restype, restype_set)
+
+        """
+        refs = {}
+        signatures = {}
+        dumped = {}
+
+        def index(obj):
+            ref = type_to_ref(obj)
+            return None if ref is None else refs.setdefault(ref, len(refs))
+
+        for name_c, (argtypes, restype, restype_set) in funcs.items():
+            indexes = [index(argtype) for argtype in argtypes]
+            restype_idx = index(restype)
+
+            if None in indexes or (restype is not None and restype_idx is None):
+                # Not referable types. Function is to be resolved on every start.
+                continue
+
+            dumped[name_c] = signatures.setdefault((tuple(indexes), restype_idx, restype_set), len(signatures))
+
+        self._dump({'types': list(refs), 'signatures': list(signatures), 'funcs': dumped})
+
+    def _dump(self, cached: dict):
+        # Writes cache file atomically.
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            path_tmp = f'{self.path}.{os.getpid()}.tmp'
+
+            with open(path_tmp, 'w') as f:
+                json.dump({**cached, 'fingerprint': self._get_fingerprint()}, f)
+
+            os.replace(path_tmp, self.path)
+
+        except OSError as e:  # pragma: nocover
+            LOGGER.warning(f'Unable to save bind cache: {e}')
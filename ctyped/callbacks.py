@@ -0,0 +1,195 @@
+import inspect
+from contextlib import contextmanager
+from itertools import count
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from .exceptions import CtypedException
+from .utils import cast_type, extract_func_info, get_functype
+
+
+def get_callback_types(func: Callable) -> Tuple[Any, List[Any]]:
+    """Returns C types for a callback function deduced from its type hints: (restype, argtypes).
+
+    :param func: Python function.
+
+    """
+    func_info = extract_func_info(func, name_c=None, scope={}, registry={})
+    annotations = dict(func_info.annotations)
+
+    restype = cast_type(func_info, 'return', annotations.pop('return', None))
+    argtypes = [cast_type(func_info, argname, argtype) for argname, argtype in annotations.items()]
+
+    return restype, argtypes
+
+
+class Dispatcher:
+    """Single C callback thunk dispatching calls to Python callables
+    registered for ``void *`` user data values.
+
+    Created with ``CallbackPool.prototype()``.
+
+    .. code-block:: python
+
+        with dispatcher.bind(lambda num: num + 1) as user_data:
+            c_func_using_callback(dispatcher.thunk, user_data)
+
+    """
+    def __init__(self, prototype: Callable, *, user_data: str, use_errno: bool = False):
+        """
+
+        :param prototype: Function describing the callback signature with type hints.
+
+        :param user_data: Name of ``void *`` user data parameter.
+
+        :param use_errno: Whether to swap errno with ctypes private copy on calls.
+
+        """
+        restype, argtypes = get_callback_types(prototype)
+        argnames = inspect.getfullargspec(prototype).args
+
+        try:
+            user_data_idx = argnames.index(user_data)
+
+        except ValueError:
+            raise CtypedException(f'Callback {prototype.__name__} has no {user_data} parameter')
+
+        funcs: Dict[int, Callable] = {}
+
+        def dispatch(*args):
+            args = list(args)
+            key = args.pop(user_data_idx)
+
+            func = funcs.get(key)
+
+            if func is None:
+                raise CtypedException(f'No callable is registered for {prototype.__name__} user data {key}')
+
+            return func(*args)
+
+        self.name = prototype.__name__
+        self.funcs = funcs
+        self.thunk = get_functype(restype, tuple(argtypes), use_errno)(dispatch)
+        """C function to pass as a callback."""
+
+        self._keys: Iterator[int] = count(1)
+
+    def register(self, func: Callable) -> int:
+        """Registers a callable to be called for a user data value, which is returned.
+
+        The callable gets callback arguments except user data.
+
+        :param func:
+
+        """
+        key = next(self._keys)
+        self.funcs[key] = func
+        return key
+
+    def unregister(self, key: int):
+        """Unregisters a callable registered for a user data value.
+
+        :param key: User data value.
+
+        """
+        self.funcs.pop(key, None)
+
+    @contextmanager
+    def bind(self, func: Callable) -> Iterator[int]:
+        """Context manager registering a callable for the duration of the context.
+        Yields user data value to pass to C.
+
+        :param func:
+
+        """
+        key = self.register(func)
+
+        try:
+            yield key
+
+        finally:
+            self.unregister(key)
+
+
+class CallbackPool:
+    """Registry of C callbacks, keeping them alive until explicitly released.
+
+    * ``.thunk()`` - turns a function into a C callback (the same one for the same function);
+    * ``.prototype()`` - creates a dispatcher calling many Python callables through one C callback
+      (for C functions accepting ``void *`` user data alongside with a callback).
+
+    .. code-block:: python
+
+        callbacks = CallbackPool()
+
+        @callbacks.prototype(user_data='data')
+        def on_item(num: int, data: CPointer) -> int:
+            ...
+
+        def handle_request(request):
+
+            with on_item.bind(lambda num: num + request.shift) as user_data:
+                c_func_using_callback(on_item.thunk, user_data)
+
+    """
+    def __init__(self, *, use_errno: bool = False):
+        """
+
+        :param use_errno: Whether to swap errno with ctypes private copy on calls.
+
+        """
+        self.use_errno = use_errno
+        self.thunks: Dict[Callable, Any] = {}
+        self.dispatchers: Dict[str, Dispatcher] = {}
+
+    def thunk(self, func: Callable) -> Any:
+        """Returns a C callback calling the function.
+
+        The callback is kept alive until ``.release()``.
+
+        :param func: Function with type hints.
+
+        """
+        thunk = self.thunks.get(func)
+
+        if thunk is None:
+            restype, argtypes = get_callback_types(func)
+            thunk = self.thunks[func] = get_functype(restype, tuple(argtypes), self.use_errno)(func)
+
+        return thunk
+
+    def release(self, func: Callable):
+        """Releases a C callback created for the function by ``.thunk()``.
+
+        .. warning:: The callback must not be called by C after that.
+
+        :param func:
+
+        """
+        self.thunks.pop(func, None)
+
+    def prototype(self, user_data: str = 'user_data') -> Callable[[Callable], Dispatcher]:
+        """Decorator turning a function describing a callback signature
+        into a dispatcher (see ``Dispatcher``).
+
+        The dispatcher is kept alive by the pool.
+
+        :param user_data: Name of ``void *`` user data parameter.
+
+        """
+        def prototype_(func: Callable) -> Dispatcher:
+            dispatcher = Dispatcher(func, user_data=user_data, use_errno=self.use_errno)
+            self.dispatchers[dispatcher.name] = dispatcher
+            return dispatcher
+
+        if callable(user_data):
+            # Decorator without params.
+            func, user_data = user_data, 'user_data'
+            return prototype_(func)  # type: ignore
+
+        return prototype_
+
+    def clear(self):
+        """Releases all C callbacks and dispatchers."""
+        self.thunks.clear()
+        self.dispatchers.clear()
+
@@ -0,0 +1,953 @@
+"""DWARF debugging information reader used to deduce functions signatures
+and structures layouts for generated code.
+
+Only the subset of DWARF (versions 2-5) describing C functions and types is supported.
+
+"""
+import posixpath
+from collections import namedtuple
+from keyword import iskeyword
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:  # pragma: nocover
+    from .sniffer import ElfFile
+
+
+FuncSignature = namedtuple('FuncSignature', ['params', 'result', 'line'])
+"""Function signature: parameters as (name, annotation) pairs, result annotation and source line."""
+
+StructInfo = namedtuple('StructInfo', ['name', 'fields', 'pack'])
+"""Structure: fields as (name, annotation) pairs and deduced pack (None for natural alignment)."""
+
+
+TAG_ARRAY = 0x01
+TAG_ENUMERATION = 0x04
+TAG_FORMAL_PARAMETER = 0x05
+TAG_MEMBER = 0x0d
+TAG_POINTER = 0x0f
+TAG_STRUCTURE = 0x13
+TAG_UNION = 0x17
+TAG_TYPEDEF = 0x16
+TAG_BASE = 0x24
+TAG_CONST = 0x26
+TAG_SUBPROGRAM = 0x2e
+TAG_VOLATILE = 0x35
+TAG_RESTRICT = 0x37
+TAG_ATOMIC = 0x47
+
+TAGS_QUALIFIERS = {TAG_TYPEDEF, TAG_CONST, TAG_VOLATILE, TAG_RESTRICT, TAG_ATOMIC}
+
+AT_NAME = 0x03
+AT_BYTE_SIZE = 0x0b
+AT_BIT_SIZE = 0x0d
+AT_STMT_LIST = 0x10
+AT_COMP_DIR = 0x1b
+AT_ABSTRACT_ORIGIN = 0x31
+AT_MEMBER_LOCATION = 0x38
+AT_DECL_FILE = 0x3a
+AT_DECL_LINE = 0x3b
+AT_DECLARATION = 0x3c
+AT_ENCODING = 0x3e
+AT_EXTERNAL = 0x3f
+AT_SPECIFICATION = 0x47
+AT_TYPE = 0x49
+AT_DATA_BIT_OFFSET = 0x6b
+AT_STR_OFFSETS_BASE = 0x72
+AT_ALIGNMENT = 0x88
+
+ATTRS_USED = {
+    AT_NAME, AT_BYTE_SIZE, AT_BIT_SIZE, AT_STMT_LIST, AT_COMP_DIR, AT_ABSTRACT_ORIGIN,
+    AT_MEMBER_LOCATION, AT_DECL_FILE, AT_DECL_LINE, AT_DECLARATION, AT_ENCODING,
+    AT_EXTERNAL, AT_SPECIFICATION, AT_TYPE, AT_DATA_BIT_OFFSET, AT_STR_OFFSETS_BASE, AT_ALIGNMENT,
+}
+
+ATE_BOOLEAN = 0x02
+ATE_FLOAT = 0x04
+ATE_SIGNED = 0x05
+ATE_SIGNED_CHAR = 0x06
+ATE_UNSIGNED = 0x07
+ATE_UNSIGNED_CHAR = 0x08
+ATE_UTF = 0x10
+
+OP_PLUS_UCONST = 0x23
+
+FORM_ADDR = 0x01
+FORM_BLOCK2 = 0x03
+FORM_BLOCK4 = 0x04
+FORM_STRING = 0x08
+FORM_BLOCK = 0x09
+FORM_BLOCK1 = 0x0a
+FORM_SDATA = 0x0d
+FORM_STRP = 0x0e
+FORM_REF_ADDR = 0x10
+FORM_INDIRECT = 0x16
+FORM_EXPRLOC = 0x18
+FORM_FLAG_PRESENT = 0x19
+FORM_STRX = 0x1a
+FORM_LINE_STRP = 0x1f
+FORM_IMPLICIT_CONST = 0x21
+FORM_STRX1 = 0x25
+FORM_STRX4 = 0x28
+FORM_GNU_STR_INDEX = 0x1f02
+
+FORMS_FIXED = {
+    0x05: 2, 0x06: 4, 0x07: 8, 0x0b: 1, 0x0c: 1, 0x1c: 4, 0x1e: 16, 0x20: 8, 0x24: 8,
+    0x25: 1, 0x26: 2, 0x27: 3, 0x28: 4, 0x29: 1, 0x2a: 2, 0x2b: 3, 0x2c: 4,
+}
+"""Fixed size forms: form -> size."""
+
+FORMS_REF = {0x11: 1, 0x12: 2, 0x13: 4, 0x14: 8}
+"""Unit relative references: form -> size."""
+
+FORMS_OFFSET = {FORM_STRP, 0x17, 0x1d, FORM_LINE_STRP, 0x1f20, 0x1f21}
+"""Forms having size of DWARF offset (4 or 8 bytes)."""
+
+FORMS_ULEB = {0x0f, 0x1a, 0x1b, 0x22, 0x23, 0x1f01, FORM_GNU_STR_INDEX}
+
+FORM_REF_UDATA = 0x15
+
+UT_COMPILE = 0x01
+UT_PARTIAL = 0x03
+
+LNCT_PATH = 0x01
+LNCT_DIRECTORY_INDEX = 0x02
+
+
+class Unsupported(Exception):
+    """Raised when DWARF entry can't be expressed using ctyped types."""
+
+
+Die = Tuple[int, dict, List[int], int]
+"""Debugging information entry: tag, attributes, children offsets, own offset."""
+
+
+class StrIndex(int):
+    """Index into string offsets table, resolved lazily (base offset may be unknown yet)."""
+
+
+class StrOffset(int):
+    """Offset into strings section, resolved lazily (most of strings are never used)."""
+
+
+class LineStrOffset(int):
+    """Offset into line strings section, resolved lazily."""
+
+
+def read_uleb(data: Any, pos: int) -> Tuple[int, int]:
+    """Reads unsigned LEB128. Returns value and new position."""
+    result = shift = 0
+
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7f) << shift
+
+        if byte < 0x80:
+            return result, pos
+
+        shift += 7
+
+
+def read_sleb(data: Any, pos: int) -> Tuple[int, int]:
+    """Reads signed LEB128. Returns value and new position."""
+    result = shift = 0
+
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7f) << shift
+        shift += 7
+
+        if byte < 0x80:
+            if byte & 0x40:
+                result -= 1 << shift
+            return result, pos
+
+
+def read_cstr(data: Any, pos: int) -> Tuple[str, int]:
+    """Reads null-terminated string. Returns value and new position."""
+    end = pos
+
+    while data[end]:
+        end += 1
+
+    return bytes(data[pos:end]).decode('utf-8', 'replace'), end + 1
+
+
+def align_up(value: int, align: int) -> int:
+    return (value + align - 1) // align * align
+
+
+def deduce_pack(layout: List[Tuple[int, int, int]], size: int) -> Optional[int]:
+    """Returns structure pack reproducing the given fields layout.
+
+    :param layout: Fields (offset, size, alignment) triples.
+
+    :param size: Structure size.
+
+    """
+    for pack in (None, 1, 2, 4):
+        offset = 0
+        align_max = 1
+
+        for field_offset, field_size, field_align in layout:
+            align = field_align if pack is None else min(field_align, pack)
+            offset = align_up(offset, align)
+
+            if offset != field_offset:
+                break
+
+            offset += field_size
+            align_max = max(align_max, align)
+
+        else:
+            if align_up(offset, align_max) == size:
+                return pack
+
+    raise Unsupported('structure layout')
+
+
+class Unit:
+    """Compilation unit entries."""
+
+    def __init__(self, reader: 'DwarfReader', *, offset: int, end: int):
+        self.reader = reader
+        self.offset = offset
+        self.end = end
+        self.version = 0
+        self.offset_size = 4
+        self.address_size = reader.pointer_size
+        self.dies: Dict[int, Die] = {}
+        self.files: List[str] = []
+        self.structs: Dict[int, Optional[str]] = {}
+        self.typedefs: Optional[Dict[int, str]] = None
+
+    def read_form(self, form: int, pos: int, implicit: int = 0) -> Tuple[Any, int]:
+        """Reads attribute value of the given form. Returns value and new position."""
+        data = self.reader.info
+        order = self.reader.byteorder
+
+        size = FORMS_FIXED.get(form)
+
+        if size is not None:
+            value = int.from_bytes(data[pos:pos + size], order)
+
+            if FORM_STRX1 <= form <= FORM_STRX4:
+                value = StrIndex(value)
+
+            return value, pos + size
+
+        size = FORMS_REF.get(form)
+
+        if size is not None:
+            return self.offset + int.from_bytes(data[pos:pos + size], order), pos + size
+
+        if form in FORMS_OFFSET:
+            value = int.from_bytes(data[pos:pos + self.offset_size], order)
+            pos += self.offset_size
+
+            if form == FORM_STRP:
+                return StrOffset(value), pos
+
+            if form == FORM_LINE_STRP:
+                return LineStrOffset(value), pos
+
+            return value, pos
+
+        if form in FORMS_ULEB:
+            value, pos = read_uleb(data, pos)
+
+            if form in (FORM_STRX, FORM_GNU_STR_INDEX):
+                value = StrIndex(value)
+
+            return value, pos
+
+        if form == FORM_REF_UDATA:
+            value, pos = read_uleb(data, pos)
+            return self.offset + value, pos
+
+        if form == FORM_STRING:
+            return read_cstr(data, pos)
+
+        if form == FORM_FLAG_PRESENT:
+            return True, pos
+
+        if form == FORM_IMPLICIT_CONST:
+            return implicit, pos
+
+        if form == FORM_SDATA:
+            return read_sleb(data, pos)
+
+        if form == FORM_ADDR:
+            return int.from_bytes(data[pos:pos + self.address_size], order), pos + self.address_size
+
+        if form == FORM_REF_ADDR:
+            size = self.address_size if self.version == 2 else self.offset_size
+            return int.from_bytes(data[pos:pos + size], order), pos + size
+
+        if form in (FORM_BLOCK, FORM_EXPRLOC):
+            size, pos = read_uleb(data, pos)
+
+        elif form == FORM_BLOCK1:
+            size, pos = data[pos], pos + 1
+
+        elif form == FORM_BLOCK2:
+            size, pos = int.from_bytes(data[pos:pos + 2], order), pos + 2
+
+        elif form == FORM_BLOCK4:
+            size, pos = int.from_bytes(data[pos:pos + 4], order), pos + 4
+
+        elif form == FORM_INDIRECT:
+            form, pos = read_uleb(data, pos)
+            return self.read_form(form, pos)
+
+        else:
+            raise Unsupported(f'form {form:#x}')
+
+        return bytes(data[pos:pos + size]), pos + size
+
+    def read_dies(self, pos: int, abbrevs: dict):
+        """Reads all unit entries (DIEs) starting from the given position."""
+        data = self.reader.info
+        dies = self.dies
+        parents = []
+        end = self.end
+
+        while pos < end:
+            die_offset = pos
+            code, pos = read_uleb(data, pos)
+
+            if not code:
+                # End of siblings chain.
+                if parents:
+                    parents.pop()
+                continue
+
+            tag, has_children, specs = abbrevs[code]
+            attrs = {}
+
+            for attr, form, implicit in specs:
+
+                if attr not in ATTRS_USED:
+                    # Fast path for skipped attributes.
+                    size = FORMS_FIXED.get(form)
+
+                    if size is None and form in FORMS_OFFSET:
+                        size = self.offset_size
+
+                    if size is not None:
+                        pos += size
+                        continue
+
+                value, pos = self.read_form(form, pos, implicit)
+                attrs[attr] = value
+
+            die = (tag, attrs, [], die_offset)
+            dies[die_offset] = die
+
+            if parents:
+                parents[-1][2].append(die_offset)
+
+            if has_children:
+                parents.append(die)
+
+    def read_files(self, offset: int, comp_dir: str):
+        """Reads source file names from the unit line program header."""
+        reader = self.reader
+        data = reader.line
+        order = reader.byteorder
+
+        if not data:
+            return
+
+        pos = offset
+        offset_size = 4
+        length = int.from_bytes(data[pos:pos + 4], order)
+        pos += 4
+
+        if length == 0xffffffff:
+            offset_size = 8
+            pos += 8
+
+        version = int.from_bytes(data[pos:pos + 2], order)
+        pos += 2
+
+        if version >= 5:
+            pos += 2  # address_size, segment_selector_size
+
+        pos += offset_size  # header_length
+        pos += 4 if version >= 4 else 3  # min_inst_length, [max_ops_per_inst], default_is_stmt, line_base
+        line_range_and_opcode_base = data[pos:pos + 2]
+        opcode_base = line_range_and_opcode_base[1]
+        pos += 2 + opcode_base - 1
+
+        def join(directory: str, name: str) -> str:
+            return posixpath.join(comp_dir, directory, name)
+
+        if version < 5:
+            dirs = ['']
+
+            while data[pos]:
+                directory, pos = read_cstr(data, pos)
+                dirs.append(directory)
+
+            pos += 1
+            files = ['']  # Indexes are 1-based.
+
+            while data[pos]:
+                name, pos = read_cstr(data, pos)
+                dir_idx, pos = read_uleb(data, pos)
+                _, pos = read_uleb(data, pos)  # mtime
+                _, pos = read_uleb(data, pos)  # length
+                files.append(join(dirs[dir_idx] if dir_idx < len(dirs) else '', name))
+
+            self.files = files
+            return
+
+        # Line program header uses the same forms as entries attributes,
+        # but strings are read from the line section itself.
+        unit = Unit(reader, offset=offset, end=offset)
+        unit.offset_size = offset_size
+        unit.version = version
+        unit_info = reader.info
+        reader.info = data
+
+        def read_entries(pos: int) -> Tuple[List[dict], int]:
+            formats_count = data[pos]
+            pos += 1
+            formats = []
+
+            for _ in range(formats_count):
+                content, pos = read_uleb(data, pos)
+                form, pos = read_uleb(data, pos)
+                formats.append((content, form))
+
+            count, pos = read_uleb(data, pos)
+            entries = []
+
+            for _ in range(count):
+                entry = {}
+
+                for content, form in formats:
+                    entry[content], pos = unit.read_form(form, pos)
+
+                entries.append(entry)
+
+            return entries, pos
+
+        try:
+            dirs, pos = read_entries(pos)
+            files, pos = read_entries(pos)
+
+        finally:
+            reader.info = unit_info
+
+        dirs = [self.get_str(entry.get(LNCT_PATH, '')) for entry in dirs]
+
+        self.files = [
+            join(dirs[entry.get(LNCT_DIRECTORY_INDEX, 0)], self.get_str(entry.get(LNCT_PATH, '')))
+            for entry in files]
+
+    def get_str(self, value: Any) -> str:
+        """Returns string attribute value."""
+        value_type = type(value)
+
+        if value_type is StrOffset:
+            return read_cstr(self.reader.str, value)[0]
+
+        if value_type is LineStrOffset:
+            return read_cstr(self.reader.line_str, value)[0]
+
+        if value_type is StrIndex:
+            reader = self.reader
+            base = self.dies[self.die_root][1].get(AT_STR_OFFSETS_BASE, 8 if self.offset_size == 4 else 16)
+            pos = base + value * self.offset_size
+            offset = int.from_bytes(reader.str_offsets[pos:pos + self.offset_size], reader.byteorder)
+            return read_cstr(reader.str, offset)[0]
+
+        return value or ''
+
+    def get_die(self, offset: int) -> Die:
+        die = self.dies.get(offset)
+
+        if die is None:
+            # References into other units are not supported.
+            raise Unsupported('reference')
+
+        return die
+
+    def get_origin(self, die: Die) -> Die:
+        """Returns entry the given one is an instance of (if any)."""
+        attrs = die[1]
+
+        for attr in (AT_ABSTRACT_ORIGIN, AT_SPECIFICATION):
+            offset = attrs.get(attr)
+
+            if offset is not None:
+                return self.get_origin(self.get_die(offset))
+
+        return die
+
+    def strip(self, offset: Optional[int]) -> Tuple[Optional[Die], List[str]]:
+        """Follows typedefs and qualifiers. Returns the underlying type entry (None for void)
+        and typedef names met.
+
+        """
+        typedefs = []
+
+        while offset is not None:
+            die = self.get_die(offset)
+            tag, attrs, _, _ = die
+
+            if tag not in TAGS_QUALIFIERS:
+                return die, typedefs
+
+            if tag == TAG_TYPEDEF:
+                typedefs.append(self.get_str(attrs.get(AT_NAME)))
+
+            offset = attrs.get(AT_TYPE)
+
+        return None, typedefs
+
+    def get_alignment(self, offset: Optional[int]) -> int:
+        """Returns natural alignment of the given type: explicit one (e.g. ``_Alignas``)
+        or the largest alignment of its base types (for structures and arrays).
+
+        :param offset: Type entry offset.
+
+        """
+        die, _ = self.strip(offset)
+
+        if die is None:
+            return 1
+
+        tag, attrs, children, _ = die
+        align = attrs.get(AT_ALIGNMENT)
+
+        if align:
+            return align
+
+        if tag in (TAG_STRUCTURE, TAG_UNION):
+            align = 1
+
+            for child_offset in children:
+                child_tag, child_attrs, _, _ = self.get_die(child_offset)
+
+                if child_tag == TAG_MEMBER:
+                    align = max(align, child_attrs.get(AT_ALIGNMENT) or self.get_alignment(child_attrs.get(AT_TYPE)))
+
+            return align
+
+        if tag == TAG_ARRAY:
+            return self.get_alignment(attrs.get(AT_TYPE))
+
+        if tag == TAG_POINTER:
+            return attrs.get(AT_BYTE_SIZE, self.address_size)
+
+        return attrs.get(AT_BYTE_SIZE) or 1
+
+    def annotate_scalar(self, die: Die) -> Tuple[str, int]:
+        """Returns annotation and size for base or enumeration type."""
+        tag, attrs, _, _ = die
+        size = attrs.get(AT_BYTE_SIZE, 0)
+
+        if tag == TAG_ENUMERATION:
+            underlying, _ = self.strip(attrs.get(AT_TYPE))
+
+            if underlying is not None:
+                return self.annotate_scalar(underlying)
+
+            encoding = ATE_SIGNED
+
+        elif tag == TAG_BASE:
+            encoding = attrs.get(AT_ENCODING)
+
+        else:
+            raise Unsupported(f'tag {tag:#x}')
+
+        if encoding == ATE_BOOLEAN and size == 1:
+            return 'bool', size
+
+        if encoding == ATE_FLOAT and size in (4, 8):
+            return 'CFloat' if size == 4 else 'CDouble', size
+
+        if encoding in (ATE_SIGNED, ATE_SIGNED_CHAR) and size in (1, 2, 4, 8):
+            return f'CInt{size * 8}', size
+
+        if encoding in (ATE_UNSIGNED, ATE_UNSIGNED_CHAR, ATE_UTF) and size in (1, 2, 4, 8):
+            return f'CInt{size * 8}U', size
+
+        raise Unsupported(f'encoding {encoding}')
+
+    def annotate(self, offset: Optional[int], *, owner: Optional[int] = None) -> Tuple[str, int]:
+        """Returns ctyped annotation and size for the given type.
+
+        :param offset: Type entry offset. None for void.
+
+        :param owner: Structure entry offset if annotating structure field.
+
+        """
+        die, _ = self.strip(offset)
+
+        if die is None:
+            return 'None', 0
+
+        tag, attrs, _, die_offset = die
+
+        if tag == TAG_STRUCTURE and owner is None:
+            # Structure passed by value.
+            name = self.get_struct(die_offset)
+
+            if name is None:
+                raise Unsupported('structure')
+
+            return name, attrs.get(AT_BYTE_SIZE, 0)
+
+        if tag != TAG_POINTER:
+            # Arrays and structures as fields are not supported.
+            return self.annotate_scalar(die)
+
+        size = attrs.get(AT_BYTE_SIZE, self.address_size)
+        target_offset = attrs.get(AT_TYPE)
+        target, typedefs = self.strip(target_offset)
+
+        if target is None:
+            return 'CPointer', size
+
+        if 'wchar_t' in typedefs:
+            return 'CCharsW', size
+
+        target_tag, target_attrs, _, target_offset = target
+
+        if target_tag == TAG_BASE and target_attrs.get(AT_BYTE_SIZE) == 1 and target_attrs.get(AT_ENCODING) in (
+            ATE_SIGNED_CHAR, ATE_UNSIGNED_CHAR
+        ):
+            return 'str', size
+
+        if target_tag == TAG_STRUCTURE:
+
+            if owner is not None:
+                # The only pointer to structure supported for fields is to structure itself.
+                return (f"'{self.structs[owner]}'" if target_offset == owner else 'CPointer'), size
+
+            # Structure is described anyway to be able to create its instances.
+            name = self.get_struct(target_offset)
+            return ('CRef' if name else 'CPointer'), size
+
+        if owner is None and target_tag in (TAG_BASE, TAG_ENUMERATION):
+            return 'CRef', size
+
+        return 'CPointer', size
+
+    def get_struct(self, offset: int) -> Optional[str]:
+        """Describes structure into reader structures. Returns structure name
+        or None if it can't be described.
+
+        """
+        structs = self.structs
+
+        if offset in structs:
+            return structs[offset]
+
+        _, attrs, children, _ = self.get_die(offset)
+        name = self.get_str(attrs.get(AT_NAME))
+
+        if not name:
+            # Anonymous structure is named after typedef.
+            typedefs = self.typedefs
+
+            if typedefs is None:
+                typedefs = self.typedefs = {
+                    die_attrs.get(AT_TYPE): self.get_str(die_attrs.get(AT_NAME))
+                    for die_tag, die_attrs, _, _ in self.dies.values() if die_tag == TAG_TYPEDEF}
+
+            name = typedefs.get(offset)
+
+        structs[offset] = None
+
+        if not name or attrs.get(AT_DECLARATION):
+            return None
+
+        structs[offset] = name
+
+        try:
+            fields = []
+            layout = []
+
+            for child_offset in children:
+                child_tag, child_attrs, _, _ = self.get_die(child_offset)
+
+                if child_tag != TAG_MEMBER:
+                    continue
+
+                if AT_BIT_SIZE in child_attrs or AT_DATA_BIT_OFFSET in child_attrs:
+                    raise Unsupported('bit field')
+
+                location = child_attrs.get(AT_MEMBER_LOCATION)
+
+                if isinstance(location, bytes):
+                    # DWARF 2 style location expression.
+                    if not location or location[0] != OP_PLUS_UCONST:
+                        raise Unsupported('member location')
+
+                    location, _ = read_uleb(location, 1)
+
+                if location is None:
+                    raise Unsupported('member location')
+
+                annotation, size = self.annotate(child_attrs.get(AT_TYPE), owner=offset)
+
+                if not size:
+                    raise Unsupported('member size')
+
+                field_name = self.get_str(child_attrs.get(AT_NAME))
+                fields.append((field_name, annotation))
+                layout.append((
+                    location, size,
+                    child_attrs.get(AT_ALIGNMENT) or self.get_alignment(child_attrs.get(AT_TYPE))))
+
+            pack = deduce_pack(layout, attrs.get(AT_BYTE_SIZE, 0))
+
+        except Unsupported:
+            structs[offset] = None
+            return None
+
+        reader_structs = self.reader.structures
+
+        if name not in reader_structs:
+            reader_structs[name] = StructInfo(name=name, fields=fields, pack=pack)
+
+        return name
+
+    def get_signature(self, die: Die) -> FuncSignature:
+        """Returns function signature for the given subprogram entry."""
+        _, attrs, children, _ = die
+        params = []
+
+        for child_offset in children:
+            child_tag, child_attrs, _, _ = self.get_origin(self.get_die(child_offset))
+
+            if child_tag != TAG_FORMAL_PARAMETER:
+                continue
+
+            name = self.get_str(child_attrs.get(AT_NAME)) or f'arg{len(params)}'
+
+            if iskeyword(name):
+                name = f'{name}_'
+
+            annotation, _ = self.annotate(child_attrs.get(AT_TYPE))
+            params.append((name, annotation))
+
+        result, _ = self.annotate(attrs.get(AT_TYPE))
+
+        return FuncSignature(params=params, result=result, line=self.get_line(attrs))
+
+    def get_line(self, attrs: dict) -> str:
+        """Returns declaration source line (``file:line``) for the given entry attributes.
+        Empty string if unknown.
+
+        """
+        file_idx = attrs.get(AT_DECL_FILE)
+
+        if file_idx is None or file_idx >= len(self.files):
+            return ''
+
+        return f'{self.files[file_idx]}:{attrs.get(AT_DECL_LINE, 0)}'
+
+    @property
+    def die_root(self) -> int:
+        return next(iter(self.dies))
+
+
+class DwarfReader:
+    """Reads DWARF debugging information from ELF file.
+
+    Compilation units are processed one by one, so that only
+    entries of a single unit are kept in memory.
+
+    .. code-block:: python
+
+        with ElfFile('/here/is/my/libsome.so') as elf:
+            reader = DwarfReader(elf)
+
+            for name, signature in reader.get_signatures({'my_func'}):
+                ...
+
+            structures = reader.structures
+            lines = reader.lines
+
+    """
+    def __init__(self, elf: 'ElfFile'):
+        """
+
+        :param elf: ELF file to read debugging information from.
+
+        """
+        self.byteorder = 'little' if elf.byteorder == '<' else 'big'
+        self.pointer_size = 8 if elf.is64 else 4
+
+        self.info = elf.get_data('.debug_info')
+        self.abbrev = elf.get_data('.debug_abbrev')
+        self.str = elf.get_data('.debug_str')
+        self.line_str = elf.get_data('.debug_line_str')
+        self.str_offsets = elf.get_data('.debug_str_offsets')
+        self.line = elf.get_data('.debug_line')
+
+        self.structures: Dict[str, StructInfo] = {}
+        """Structures used by functions: name -> info."""
+
+        self.lines: Dict[str, str] = {}
+        """Source lines of functions described by .get_signatures(),
+        including those with no signature: name -> line."""
+
+        self._abbrevs: Dict[int, dict] = {}
+
+    @property
+    def available(self) -> bool:
+        """Whether debugging information is available."""
+        return bool(self.info and self.abbrev)
+
+    def get_abbrevs(self, offset: int) -> dict:
+        """Returns abbreviations table at the given offset: code -> (tag, has_children, attributes specs)."""
+        abbrevs = self._abbrevs.get(offset)
+
+        if abbrevs is not None:
+            return abbrevs
+
+        abbrevs = {}
+        data = self.abbrev
+        pos = offset
+
+        while True:
+            code, pos = read_uleb(data, pos)
+
+            if not code:
+                break
+
+            tag, pos = read_uleb(data, pos)
+            has_children = data[pos]
+            pos += 1
+            specs = []
+
+            while True:
+                attr, pos = read_uleb(data, pos)
+                form, pos = read_uleb(data, pos)
+
+                if not attr and not form:
+                    break
+
+                implicit = 0
+
+                if form == FORM_IMPLICIT_CONST:
+                    implicit, pos = read_sleb(data, pos)
+
+                specs.append((attr, form, implicit))
+
+            abbrevs[code] = (tag, has_children, specs)
+
+        self._abbrevs[offset] = abbrevs
+
+        return abbrevs
+
+    def iter_units(self) -> Iterator[Unit]:
+        """Yields compilation units with their entries read."""
+        data = self.info
+        order = self.byteorder
+        pos = 0
+        data_len = len(data)
+
+        while pos < data_len:
+            offset = pos
+            offset_size = 4
+            length = int.from_bytes(data[pos:pos + 4], order)
+            pos += 4
+
+            if length == 0xffffffff:
+                offset_size = 8
+                length = int.from_bytes(data[pos:pos + 8], order)
+                pos += 8
+
+            end = pos + length
+            version = int.from_bytes(data[pos:pos + 2], order)
+            pos += 2
+
+            unit = Unit(self, offset=offset, end=end)
+            unit.version = version
+            unit.offset_size = offset_size
+
+            if version >= 5:
+                unit_type = data[pos]
+                unit.address_size = data[pos + 1]
+                abbrev_offset = int.from_bytes(data[pos + 2:pos + 2 + offset_size], order)
+                pos += 2 + offset_size
+
+                if unit_type not in (UT_COMPILE, UT_PARTIAL):
+                    # Type and split units are skipped.
+                    pos = end
+                    continue
+
+            else:
+                abbrev_offset = int.from_bytes(data[pos:pos + offset_size], order)
+                unit.address_size = data[pos + offset_size]
+                pos += offset_size + 1
+
+            try:
+                unit.read_dies(pos, self.get_abbrevs(abbrev_offset))
+
+                if unit.dies:
+                    root_attrs = unit.dies[unit.die_root][1]
+                    stmt_list = root_attrs.get(AT_STMT_LIST)
+
+                    if stmt_list is not None:
+                        unit.read_files(stmt_list, unit.get_str(root_attrs.get(AT_COMP_DIR)))
+
+            except (Unsupported, IndexError, KeyError):
+                # Unit we can't read is skipped.
+                pass
+
+            else:
+                yield unit
+
+            pos = end
+
+    def get_signatures(self, names: Set[str]) -> Iterator[Tuple[str, Optional[FuncSignature]]]:
+        """Yields signatures for functions with the given names.
+        Signature is None if function can't be described.
+
+        :param names: Exported functions names.
+
+        """
+        names = set(names)
+
+        for unit in self.iter_units():
+
+            for die in list(unit.dies.values()):
+                if not names:
+                    return
+
+                tag, attrs, _, _ = die
+
+                if tag != TAG_SUBPROGRAM or attrs.get(AT_DECLARATION):
+                    continue
+
+                try:
+                    origin = unit.get_origin(die)
+
+                except Unsupported:
+                    continue
+
+                name = unit.get_str(origin[1].get(AT_NAME))
+
+                if name not in names:
+                    continue
+
+                names.discard(name)
+                self.lines[name] = unit.get_line(origin[1])
+
+                try:
+                    signature = unit.get_signature(origin)
+
+                except Unsupported:
+                    signature = None
+
+                yield name, signature
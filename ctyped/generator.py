@@ -0,0 +1,1071 @@
+"""ctyped code generation from C headers."""
+import hashlib
+import logging
+import os
+import re
+import shlex
+import subprocess
+from collections import namedtuple
+from keyword import iskeyword
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from . import VERSION_STR
+from .cache import get_cache_dir
+from .dwarf import FuncSignature, StructInfo, Unsupported
+from .exceptions import SniffingError
+from .sniffer import SniffedSymbol, SniffResult
+
+LOGGER = logging.getLogger(__name__)
+
+
+CDecl = namedtuple('CDecl', ['name', 'base', 'pointers', 'array', 'const'])
+"""C declarator: name, base type (e.g. ``unsigned int``, ``struct Point``, ``size_t``),
+pointer level, whether it is an array and whether base type is const (e.g. ``const char *``).
+Base is None for function pointers.
+
+"""
+CDecl.__new__.__defaults__ = (False,)
+
+CStructDef = namedtuple('CStructDef', ['name', 'fields', 'pack'])
+"""Structure definition: name, fields declarators (None if unsupported) and pack."""
+
+CFuncDecl = namedtuple('CFuncDecl', ['name', 'result', 'params', 'line'])
+"""Function declaration: name, result and parameters declarators and source line."""
+
+
+SCALARS = {
+    'char': 'CInt8',
+    'signed char': 'CInt8',
+    'unsigned char': 'CInt8U',
+    'short': 'CShort',
+    'unsigned short': 'CShortU',
+    'int': 'CInt',
+    'unsigned int': 'CIntU',
+    'long': 'CLong',
+    'unsigned long': 'CLongU',
+    'long long': 'CLongLong',
+    'unsigned long long': 'CLongLongU',
+    'float': 'CFloat',
+    'double': 'CDouble',
+    '_Bool': 'bool',
+    'bool': 'bool',
+    'int8_t': 'CInt8',
+    'uint8_t': 'CInt8U',
+    'int16_t': 'CInt16',
+    'uint16_t': 'CInt16U',
+    'int32_t': 'CInt32',
+    'uint32_t': 'CInt32U',
+    'int64_t': 'CInt64',
+    'uint64_t': 'CInt64U',
+    'size_t': 'CLongU',
+    'ssize_t': 'CLong',
+    'intptr_t': 'CLong',
+    'uintptr_t': 'CLongU',
+    'ptrdiff_t': 'CLong',
+}
+"""Known scalar types: C type -> ctyped annotation."""
+
+BUILTIN_WORDS = {'void', 'char', 'short', 'int', 'long', 'float', 'double', 'signed', 'unsigned', '_Bool'}
+
+CHARS = {'char', 'signed char', 'unsigned char'}
+
+KNOWN_TYPEDEFS = [name for name in SCALARS if ' ' not in name and name not in BUILTIN_WORDS] + ['wchar_t']
+"""Types usually coming from standard headers (headers includes are not processed)."""
+
+COMPILER_TYPEDEFS = ['__builtin_va_list']
+"""Compiler builtin types met in preprocessed standard headers."""
+
+BUILTIN_WORDS = {'void', 'char', 'short', 'int', 'long', 'float', 'double', 'signed', 'unsigned', '_Bool'}
+
+QUALIFIERS = {
+    'const', 'volatile', 'restrict', '__restrict', '__restrict__', 'extern', 'static',
+    'inline', '__inline', '__inline__', 'register', '__extension__', '_Atomic',
+}
+
+ATTRIBUTES = {'__attribute__', '__declspec', '__asm__', '__asm', 'asm'}
+
+TOKENS = re.compile(
+    r'(?P<pp>^[ \t]*#(?:\\\n|[^\n])*)'
+    r'|(?P<comment>/\*.*?\*/|//[^\n]*)'
+    r'|(?P<name>[A-Za-z_]\w*)'
+    r'|(?P<literal>\d[\w.]*|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\')'
+    r'|(?P<ellipsis>\.\.\.)'
+    r'|(?P<space>\s+)'
+    r'|(?P<punct>.)',
+    re.M | re.S)
+
+PRAGMA_PACK = re.compile(r'#\s*pragma\s+pack\s*\((.*)\)')
+
+LINE_MARKER = re.compile(r'#\s*(?:line\s+)?(\d+)\s+"((?:\\.|[^"\\])*)"')
+
+DEFINE = re.compile(r'^[ \t]*#[ \t]*define[ \t]+([A-Za-z_]\w*)', re.M)
+
+CPLUSPLUS_BLOCK = re.compile(
+    r'^[ \t]*#[ \t]*if(?:def[ \t]+__cplusplus|[ \t]+defined[ \t]*\(?[ \t]*__cplusplus[ \t]*\)?)[ \t]*$'
+    r'.*?^[ \t]*#[ \t]*endif\b',
+    re.M | re.S)
+
+GNU_EXTENSIONS = re.compile(
+    r'\b(?:__attribute__|__declspec|__asm__)[ \t]*\((?:[^()]|\((?:[^()]|\((?:[^()]|\([^()]*\))*\))*\))*\)'
+    r'|\b(?:__extension__|__restrict__|__restrict|__inline__|__inline)\b')
+
+
+def normalize_type(words: List[str]) -> str:
+    """Returns canonical base type name for type specifiers.
+
+    :param words: Type specifiers, e.g. ``['long', 'unsigned', 'int']``.
+
+    """
+    if words[0] in ('struct', 'union', 'enum'):
+        return ' '.join(words[:2])
+
+    if not set(words).issubset(BUILTIN_WORDS):
+        return words[-1]
+
+    unsigned = 'unsigned' in words
+
+    if 'char' in words:
+        return 'unsigned char' if unsigned else ('signed char' if 'signed' in words else 'char')
+
+    for candidate in ('void', 'float', '_Bool'):
+        if candidate in words:
+            return candidate
+
+    if 'double' in words:
+        return 'long double' if 'long' in words else 'double'
+
+    if 'short' in words:
+        base = 'short'
+
+    elif words.count('long') > 1:
+        base = 'long long'
+
+    elif 'long' in words:
+        base = 'long'
+
+    else:
+        base = 'int'
+
+    return f'unsigned {base}' if unsigned else base
+
+
+def pack_pragma(args: str, stack: List[Optional[int]], pack: Optional[int]) -> Optional[int]:
+    """Applies ``#pragma pack(...)`` arguments. Returns pack in effect.
+
+    :param args: Pragma arguments, e.g. ``push, 1``.
+
+    :param stack: Packs stack.
+
+    :param pack: Pack in effect.
+
+    """
+    args = [arg.strip() for arg in args.split(',') if arg.strip()]
+
+    if not args:
+        return None
+
+    if args[0] == 'push':
+        stack.append(pack)
+        return int(args[-1]) if len(args) > 1 and args[-1].isdigit() else pack
+
+    if args[0] == 'pop':
+        return stack.pop() if stack else None
+
+    return int(args[0]) if args[0].isdigit() else pack
+
+
+class HeaderDeclarations:
+    """Declarations gathered from a header. Describes them using ctyped annotations."""
+
+    def __init__(self, *, filename: str, source: Optional[str] = None, macros: Optional[Set[str]] = None):
+        """
+
+        :param filename: Header file name for source lines.
+
+        :param source: Header path as seen in preprocessor line markers.
+            If set, only functions declared in the header itself are gathered
+            (not the ones from included headers).
+
+        :param macros: Names of macros defined in a header which was not preprocessed.
+            Functions with such names (e.g. ``OF`` in ``int deflate OF((z_streamp strm))``)
+            are not gathered.
+
+        """
+        self.filename = filename
+        self.source = source
+        self.macros = macros or set()
+        self.typedefs: Dict[str, CDecl] = {}
+        self.structs: Dict[str, CStructDef] = {}
+        self.funcs: List[CFuncDecl] = []
+        self._struct_names: Dict[str, Optional[str]] = {}
+        self._structures: Dict[str, StructInfo] = {}
+        self._func_names: Set[str] = set()
+
+    def add_typedef(self, alias: str, decl: CDecl):
+        self.typedefs.setdefault(alias, decl)
+
+    def add_struct(self, key: str, name: str, fields: Optional[List[CDecl]], pack: Optional[int]):
+        """Registers structure definition.
+
+        :param key: Structure key, e.g. ``struct Point``.
+        :param name: Python class name.
+        :param fields: Fields declarators. None if structure can't be described.
+        :param pack:
+
+        """
+        self.structs[key] = CStructDef(name=name, fields=fields, pack=pack)
+
+    def add_function(self, name: str, result: CDecl, params: List[CDecl], line: int, *, file: Optional[str] = None):
+        """Registers function declaration.
+
+        :param name:
+        :param result: Result declarator.
+        :param params: Parameters declarators.
+        :param line: Source line.
+        :param file: Source file from preprocessor line markers.
+
+        """
+        if self.source is not None and file != self.source:
+            return
+
+        if name in self.macros or name in self._func_names:
+            return
+
+        self._func_names.add(name)
+
+        if len(params) == 1 and params[0].base == 'void' and not params[0].pointers:
+            params = []  # f(void)
+
+        self.funcs.append(CFuncDecl(
+            name=name, result=result, params=[param for param in params if param.base != '...'], line=line))
+
+    def get_struct(self, key: str) -> Optional[str]:
+        """Describes structure. Returns structure name or None if it can't be described."""
+        names = self._struct_names
+
+        if key in names:
+            return names[key]
+
+        struct = self.structs.get(key)
+        names[key] = None
+
+        if struct is None or struct.fields is None:
+            return None
+
+        names[key] = struct.name
+
+        try:
+            fields = [(decl.name, self.annotate(decl, owner=key)) for decl in struct.fields]
+
+        except Unsupported:
+            names[key] = None
+            return None
+
+        self._structures[struct.name] = StructInfo(name=struct.name, fields=fields, pack=struct.pack)
+
+        return struct.name
+
+    def annotate(self, decl: CDecl, *, owner: Optional[str] = None, param: bool = False) -> str:
+        """Returns ctyped annotation for the given declarator.
+
+        :param decl:
+        :param owner: Structure key if annotating structure field.
+        :param param: Whether annotating function parameter.
+
+        """
+        base, pointers, const = decl.base, decl.pointers, decl.const
+
+        if decl.array:
+            if owner is not None:
+                raise Unsupported('array field')
+
+            pointers += 1  # Array parameter decays to pointer.
+
+        typedefs = []
+
+        while base in self.typedefs and base not in SCALARS:
+            typedefs.append(base)
+            target = self.typedefs[base]
+
+            if target.array:
+                raise Unsupported('array typedef')
+
+            base = target.base
+            pointers += target.pointers
+            const = const or target.const
+
+        if base is None:
+            # Function pointer.
+            return 'CPointer'
+
+        if not pointers:
+
+            if base == 'void':
+                return 'None'
+
+            if base.startswith('enum '):
+                return 'CInt'
+
+            if base.startswith('struct ') and owner is None:
+                name = self.get_struct(base)
+
+                if name is None:
+                    raise Unsupported('structure')
+
+                return name
+
+            annotation = SCALARS.get(base)
+
+            if annotation is None:
+                raise Unsupported(base)
+
+            return annotation
+
+        if pointers > 1:
+            return 'CPointer'
+
+        if base == 'wchar_t' or 'wchar_t' in typedefs:
+            return 'CCharsW'
+
+        if base in CHARS:
+
+            if const and base == 'char':
+                return 'str'
+
+            # Non-const strings are usually buffers to be written into, unsigned chars are bytes.
+            return 'CBuffer' if param else 'CPointer'
+
+        if base.startswith('struct '):
+
+            if owner is not None:
+                # The only pointer to structure supported for fields is to structure itself.
+                return f"'{self.structs[owner].name}'" if base == owner else 'CPointer'
+
+            return 'CRef' if self.get_struct(base) else 'CPointer'
+
+        if owner is None and (base in SCALARS or base.startswith('enum ')):
+            return 'CRef'
+
+        return 'CPointer'
+
+    def to_result(self, *, libpath: str) -> SniffResult:
+        """Returns declarations as a sniff result.
+
+        :param libpath: Library path to be used in generated code.
+
+        """
+        result = SniffResult(libpath=libpath)
+
+        for key in self.structs:
+            self.get_struct(key)
+
+        for func in self.funcs:
+            line = f'{self.filename}:{func.line}'
+
+            try:
+                params = []
+
+                for idx, param in enumerate(func.params):
+                    name = param.name or f'arg{idx}'
+                    params.append((f'{name}_' if iskeyword(name) else name, self.annotate(param, param=True)))
+
+                signature = FuncSignature(params=params, result=self.annotate(func.result), line=line)
+
+            except Unsupported:
+                signature = None
+
+            result.add_symbol(SniffedSymbol(name=func.name, address='', line=line, signature=signature))
+
+        result.structures.update(self._structures)
+
+        return result
+
+
+class HeaderParser:
+    """Minimal C declarations parser.
+
+    Handles functions declarations, structures, enums and typedefs
+    commonly met in library headers. Preprocessor directives
+    are not processed (except for ``#pragma pack`` and line markers
+    of a preprocessed header).
+
+    """
+    def __init__(self, declarations: HeaderDeclarations):
+        """
+
+        :param declarations: Object to put declarations into.
+
+        """
+        self.declarations = declarations
+        self._pack_stack: List[Optional[int]] = []
+
+    def _tokenize(self, text: str) -> Iterator[Tuple[str, str, int]]:
+        # Yields (kind, token, line) tuples.
+        line = 1
+
+        for match in TOKENS.finditer(text):
+            kind = match.lastgroup
+            token = match.group()
+
+            if kind == 'pp':
+                pragma = PRAGMA_PACK.match(token.strip())
+                marker = LINE_MARKER.match(token.strip())
+
+                if pragma:
+                    yield 'pack', pragma.group(1), line
+
+                elif marker:
+                    # Line marker sets the number of the next line.
+                    line = int(marker.group(1)) - 1
+                    yield 'file', marker.group(2), line
+
+            elif kind not in ('comment', 'space'):
+                yield kind, token, line
+
+            line += token.count('\n')
+
+    def parse(self, text: str):
+        """Parses header contents.
+
+        :param text: Header contents.
+
+        """
+        statement = []
+        line = 0
+        file = None
+        statement_file = None
+        depth = 0
+        transparent = 0  # extern "C" { blocks
+        pack = None
+        tokens = self._tokenize(text)
+
+        for kind, token, token_line in tokens:
+
+            if kind == 'pack':
+                pack = pack_pragma(token, self._pack_stack, pack)
+                continue
+
+            if kind == 'file':
+                file = token
+                continue
+
+            if token in ATTRIBUTES:
+                self._skip_parens(tokens)
+                continue
+
+            if not statement:
+                line = token_line
+                statement_file = file
+
+            if depth == 0:
+
+                if token == ';':
+                    self._statement(statement, line, pack, statement_file)
+                    statement = []
+                    continue
+
+                if token == '}' and transparent:
+                    transparent -= 1
+                    continue
+
+                if token == '{':
+
+                    if statement[:1] == ['extern'] and len(statement) == 2:
+                        transparent += 1
+                        statement = []
+                        continue
+
+                    if statement and statement[-1] == ')' and not {'struct', 'union', 'enum'} & set(statement):
+                        # Function definition: declaration is processed, body is skipped.
+                        self._statement(statement, line, pack, statement_file)
+                        self._skip_body(tokens)
+                        statement = []
+                        continue
+
+            if token == '{':
+                depth += 1
+
+            elif token == '}':
+                depth -= 1
+
+            statement.append(token)
+
+    @staticmethod
+    def _skip_parens(tokens: Iterator[Tuple[str, str, int]]):
+        depth = 0
+
+        for _, token, _ in tokens:
+
+            if token == '(':
+                depth += 1
+
+            elif token == ')':
+                depth -= 1
+
+                if not depth:
+                    return
+
+    @staticmethod
+    def _skip_body(tokens: Iterator[Tuple[str, str, int]]):
+        depth = 1
+
+        for _, token, _ in tokens:
+
+            if token == '{':
+                depth += 1
+
+            elif token == '}':
+                depth -= 1
+
+                if not depth:
+                    return
+
+    @staticmethod
+    def _closing(tokens: List[str], idx: int) -> int:
+        # Returns index of the parenthesis closing the one at the given index.
+        depth = 0
+
+        for idx_closing in range(idx, len(tokens)):
+            token = tokens[idx_closing]
+
+            if token == '(':
+                depth += 1
+
+            elif token == ')':
+                depth -= 1
+
+                if not depth:
+                    return idx_closing
+
+        raise ValueError('Unbalanced parentheses')
+
+    @staticmethod
+    def _split(tokens: List[str], separator: str) -> List[List[str]]:
+        # Splits tokens by separator outside of any brackets.
+        chunks = [[]]
+        depth = 0
+
+        for token in tokens:
+
+            if token in '({[':
+                depth += 1
+
+            elif token in ')}]':
+                depth -= 1
+
+            elif token == separator and not depth:
+                chunks.append([])
+                continue
+
+            chunks[-1].append(token)
+
+        return [chunk for chunk in chunks if chunk]
+
+    @staticmethod
+    def _declarator(tokens: List[str]) -> CDecl:
+        # Base type is const if qualified before the first pointer: const char *, char const *.
+        const = 'const' in tokens[:tokens.index('*')] if '*' in tokens else 'const' in tokens
+        tokens = [token for token in tokens if token not in QUALIFIERS]
+
+        if tokens == ['...']:
+            return CDecl(name='', base='...', pointers=0, array=False)
+
+        if '(' in tokens:
+            # Function pointer: int (*name)(int)
+            idx = tokens.index('(')
+            inner = tokens[idx + 1:tokens.index(')', idx)]
+            names = [token for token in inner if token.isidentifier()]
+            return CDecl(name=names[-1] if names else '', base=None, pointers=1, array=False)
+
+        array = '[' in tokens
+
+        if array:
+            tokens = tokens[:tokens.index('[')]
+
+        words = [token for token in tokens if token != '*']
+        name = ''
+
+        if (
+            len(words) > 1 and words[-1] not in BUILTIN_WORDS and
+            not (len(words) == 2 and words[0] in ('struct', 'union', 'enum'))
+        ):
+            name = words.pop()
+
+        return CDecl(name=name, base=normalize_type(words), pointers=tokens.count('*'), array=array, const=const)
+
+    def _declarators(self, tokens: List[str]) -> List[CDecl]:
+        # Handles declarations of several entities: int a, *b;
+        chunks = self._split(tokens, ',')
+        first = self._declarator(chunks[0])
+        specifiers = [token for token in chunks[0] if (token not in QUALIFIERS or token == 'const') and token != '*']
+
+        if first.name:
+            specifiers = specifiers[:-1]
+
+        decls = [first]
+
+        for chunk in chunks[1:]:
+            decls.append(self._declarator(specifiers + chunk))
+
+        return decls
+
+    def _struct(self, tokens: List[str], pack: Optional[int], alias: str = '') -> Tuple[str, List[str]]:
+        # Registers structure from `struct [tag] { ... } rest`. Returns structure key and the rest tokens.
+        kind = tokens[0]
+        start = tokens.index('{')
+        tag = tokens[1] if start == 2 else alias
+        end = len(tokens) - tokens[::-1].index('}') - 1
+        key = f'{kind} {tag}'
+
+        if kind == 'enum':
+            self.declarations.add_typedef(key, CDecl(name='', base='int', pointers=0, array=False))
+            return key, tokens[end + 1:]
+
+        fields = []
+
+        for member in self._split(tokens[start + 1:end], ';'):
+
+            if kind == 'union' or '{' in member or ':' in member:
+                # Unions, nested definitions and bit fields are not supported.
+                fields = None
+                break
+
+            fields.extend(self._declarators(member))
+
+        if tag:
+            self.declarations.add_struct(key, tag, fields, pack)
+
+        return key, tokens[end + 1:]
+
+    def _statement(self, tokens: List[str], line: int, pack: Optional[int], file: Optional[str] = None):
+
+        if 'static' in tokens and '(' in tokens:
+            # Static functions are not exported.
+            return
+
+        tokens = [token for token in tokens if token not in ('extern', 'static', 'inline', '__extension__')]
+
+        if not tokens:
+            return
+
+        declarations = self.declarations
+
+        try:
+            if tokens[0] == 'typedef':
+                tokens = tokens[1:]
+
+                if tokens[0] in ('struct', 'union', 'enum') and '{' in tokens:
+                    # typedef struct [tag] { ... } alias;
+                    rest = tokens[len(tokens) - tokens[::-1].index('}'):]
+                    alias = self._declarators(['int'] + rest)[0].name
+                    key, rest = self._struct(tokens, pack, alias=alias)
+
+                    for decl in self._declarators(['int'] + rest):
+                        declarations.add_typedef(decl.name, decl._replace(base=key))
+
+                    return
+
+                for decl in self._declarators(tokens):
+                    declarations.add_typedef(decl.name, decl)
+
+                return
+
+            if tokens[0] in ('struct', 'union', 'enum') and '{' in tokens:
+                self._struct(tokens, pack)
+                return
+
+            if '(' not in tokens or tokens[tokens.index('(') - 1] in ('(', '*'):
+                # Variable or function pointer variable.
+                return
+
+            idx = tokens.index('(')
+            end = self._closing(tokens, idx)
+            result = tokens[:idx]
+
+            # Common export macros.
+            if end + 1 < len(tokens) and tokens[end + 1] == '(' and end == idx + 2:
+                # int API(name)(int a)
+                result = result[:-1] + [tokens[idx + 1]]
+                idx = end + 1
+
+            elif idx == 1 and end + 2 < len(tokens) and tokens[end + 2] == '(':
+                # API(int) name(int a)
+                result = tokens[idx + 1:end] + [tokens[end + 1]]
+                idx = end + 2
+
+            end = self._closing(tokens, idx)  # Trailing macros are ignored.
+            result = self._declarator(result)
+            params = [self._declarator(param) for param in self._split(tokens[idx + 1:end], ',')]
+
+            if not result.name.isidentifier():
+                return
+
+            declarations.add_function(
+                result.name, result._replace(name=''), params, line, file=file)
+
+        except (ValueError, IndexError):
+            LOGGER.debug(f'Unable to parse declaration at line {line}: {" ".join(tokens)}')
+
+
+class PycparserParser:
+    """Parses a header using ``pycparser``."""
+
+    def __init__(self, declarations: HeaderDeclarations):
+        """
+
+        :param declarations: Object to put declarations into.
+
+        """
+        self.declarations = declarations
+
+    @staticmethod
+    def _clean(text: str) -> str:
+        # Removes comments, C++ blocks, attributes and directives (except for pragmas
+        # and line markers) keeping lines in place.
+
+        def blank(match):
+            return '\n' * match.group().count('\n')
+
+        def replace(match):
+            token = match.group()
+            kind = match.lastgroup
+
+            if kind == 'comment' or (
+                kind == 'pp' and not (PRAGMA_PACK.match(token.strip()) or LINE_MARKER.match(token.strip()))
+            ):
+                return blank(match)
+
+            return token
+
+        text = TOKENS.sub(replace, CPLUSPLUS_BLOCK.sub(blank, text))
+
+        return GNU_EXTENSIONS.sub(blank, text)
+
+    def _decl(self, node, name: str = '') -> CDecl:
+        from pycparser import c_ast
+
+        pointers = 0
+        array = False
+
+        while True:
+
+            if isinstance(node, c_ast.PtrDecl):
+                pointers += 1
+
+            elif isinstance(node, c_ast.ArrayDecl):
+                array = True
+
+            elif isinstance(node, c_ast.FuncDecl):
+                return CDecl(name=name, base=None, pointers=pointers, array=False)
+
+            else:
+                break
+
+            node = node.type
+
+        spec = node.type
+
+        if isinstance(spec, c_ast.IdentifierType):
+            base = normalize_type(spec.names)
+
+        elif isinstance(spec, (c_ast.Struct, c_ast.Union, c_ast.Enum)):
+            kind = {c_ast.Struct: 'struct', c_ast.Union: 'union', c_ast.Enum: 'enum'}[type(spec)]
+            base = f'{kind} {spec.name or name}'
+
+        else:  # pragma: nocover
+            raise Unsupported('type')
+
+        return CDecl(
+            name=name or getattr(node, 'declname', '') or '', base=base, pointers=pointers, array=array,
+            const='const' in getattr(node, 'quals', ()))
+
+    def _struct(self, spec, pack: Optional[int], alias: str = ''):
+        from pycparser import c_ast
+
+        tag = spec.name or alias
+
+        if isinstance(spec, c_ast.Enum):
+            self.declarations.add_typedef(f'enum {tag}', CDecl(name='', base='int', pointers=0, array=False))
+            return
+
+        if spec.decls is None:
+            return
+
+        fields = []
+
+        for member in spec.decls:
+            member_type = member.type
+
+            while isinstance(member_type, (c_ast.PtrDecl, c_ast.ArrayDecl)):
+                member_type = member_type.type
+
+            if (
+                isinstance(spec, c_ast.Union) or member.bitsize is not None or
+                getattr(getattr(member_type, 'type', None), 'decls', None) is not None
+            ):
+                fields = None
+                break
+
+            fields.append(self._decl(member.type, member.name))
+
+        if tag:
+            kind = 'union' if isinstance(spec, c_ast.Union) else 'struct'
+            self.declarations.add_struct(f'{kind} {tag}', tag, fields, pack)
+
+    def parse(self, text: str):
+        """Parses header contents.
+
+        :param text: Header contents.
+
+        """
+        from pycparser import c_ast, c_parser
+
+        typedefs = KNOWN_TYPEDEFS + COMPILER_TYPEDEFS
+        prelude = ''.join(f'typedef int {name};\n' for name in typedefs)
+        ast = c_parser.CParser().parse(f'{prelude}# 1 "header"\n{self._clean(text)}')
+
+        declarations = self.declarations
+        stack = []
+        pack = None
+
+        for node in ast.ext[len(typedefs):]:
+
+            if isinstance(node, c_ast.Pragma):
+                pragma = PRAGMA_PACK.match(f'#pragma {node.string}')
+
+                if pragma:
+                    pack = pack_pragma(pragma.group(1), stack, pack)
+
+                continue
+
+            if isinstance(node, c_ast.FuncDef):
+                node = node.decl
+
+            node_type = node.type
+            spec = getattr(node_type, 'type', None)
+
+            if isinstance(node, c_ast.Typedef):
+
+                if isinstance(spec, (c_ast.Struct, c_ast.Union, c_ast.Enum)):
+                    self._struct(spec, pack, alias=node.name)
+
+                declarations.add_typedef(node.name, self._decl(node_type, node.name))
+
+            elif isinstance(node_type, c_ast.FuncDecl):
+
+                if 'static' in node.storage:
+                    # Static functions are not exported.
+                    continue
+
+                params = []
+
+                for idx, param in enumerate((node_type.args.params if node_type.args else [])):
+
+                    if isinstance(param, c_ast.EllipsisParam):
+                        continue
+
+                    params.append(self._decl(param.type, param.name or ''))
+
+                declarations.add_function(
+                    node.name, self._decl(node_type.type)._replace(name=''), params, node.coord.line,
+                    file=node.coord.file)
+
+            elif isinstance(node_type, (c_ast.Struct, c_ast.Union, c_ast.Enum)):
+                self._struct(node_type, pack)
+
+
+def preprocess_header(path: Path) -> Optional[str]:
+    """Runs C preprocessor (``cpp`` or the one from ``CPP`` environment variable)
+    for the header. Returns preprocessed contents or None if preprocessing failed.
+
+    :param path: Header file path.
+
+    """
+    command = shlex.split(os.environ.get('CPP', 'cpp')) + ['-I', str(path.parent), str(path)]
+
+    try:
+        result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    except OSError as e:
+        LOGGER.debug(f'Unable to run preprocessor: {e}')
+        return None
+
+    if result.returncode:
+        LOGGER.debug(f"Preprocessor failed: {result.stderr.decode('utf-8', errors='replace')}")
+        return None
+
+    return result.stdout.decode('utf-8', errors='replace')
+
+
+def parse_header(
+        path: Union[str, Path],
+        *,
+        use_pycparser: Optional[bool] = None,
+        preprocess: Optional[bool] = None,
+) -> HeaderDeclarations:
+    """Parses C header.
+
+    :param path: Header file path.
+
+    :param use_pycparser: Whether to use ``pycparser``.
+        By default it is used if installed, built-in parser is used
+        as a fallback if ``pycparser`` fails.
+
+    :param preprocess: Whether to run C preprocessor (see ``preprocess_header()``)
+        before parsing, so that macros are expanded. By default it is used if available.
+        Without preprocessing functions named as header macros are skipped.
+
+    """
+    path = Path(path)
+    text, source, macros = _read_header(path, preprocess=preprocess)
+
+    return _parse_text(path, text, source=source, macros=macros, use_pycparser=use_pycparser)
+
+
+def _read_header(path: Path, *, preprocess: Optional[bool]) -> Tuple[str, Optional[str], Set[str]]:
+    # Returns header text to parse (preprocessed if possible), source path
+    # if text is preprocessed, and macros names if it is not.
+    try:
+        text = path.read_text(errors='replace')
+
+    except OSError as e:
+        raise SniffingError(f'Unable to read header {path}: {e}')
+
+    source = None
+    macros = set()
+
+    if preprocess is None or preprocess:
+        preprocessed = preprocess_header(path)
+
+        if preprocessed is not None:
+            text, source = preprocessed, str(path)
+
+        elif preprocess:
+            raise SniffingError(f'Unable to preprocess header {path}. Check `cpp` is available or set CPP.')
+
+    if source is None:
+        macros = set(DEFINE.findall(text))
+
+    return text, source, macros
+
+
+def _get_parser_name(use_pycparser: Optional[bool]) -> str:
+    # Returns name (and version) of the parser to be tried first.
+    if use_pycparser is None or use_pycparser:
+
+        try:
+            import pycparser
+
+        except ImportError:
+
+            if use_pycparser:
+                raise SniffingError('pycparser is required. Install `pycparser` package.')
+
+        else:
+            return f'pycparser {pycparser.__version__}'
+
+    return 'builtin'
+
+
+def _parse_text(
+        path: Path, text: str, *, source: Optional[str], macros: Set[str], use_pycparser: Optional[bool]
+) -> HeaderDeclarations:
+    # Parses header text read with `_read_header()`.
+    if use_pycparser is None or use_pycparser:
+
+        try:
+            declarations = HeaderDeclarations(filename=path.name, source=source, macros=macros)
+            PycparserParser(declarations).parse(text)
+            return declarations
+
+        except ImportError:
+
+            if use_pycparser:
+                raise SniffingError('pycparser is required. Install `pycparser` package.')
+
+        except Exception as e:
+
+            if use_pycparser:
+                raise SniffingError(f'Unable to parse header {path}: {e}')
+
+            LOGGER.debug(f'pycparser failed, using built-in parser: {e}')
+
+    declarations = HeaderDeclarations(filename=path.name, source=source, macros=macros)
+    HeaderParser(declarations).parse(text)
+
+    return declarations
+
+
+def generate(
+        header: Union[str, Path],
+        libpath: Union[str, Path],
+        *,
+        cache: bool = True,
+        cache_dir: Optional[Union[str, Path]] = None,
+        use_pycparser: Optional[bool] = None,
+        preprocess: Optional[bool] = None,
+) -> str:
+    """Generates ctyped module code from C header.
+
+    Generated code is cached on disk, keyed by hash of header text parsed
+    (after preprocessing) and parser used, so that regenerating unchanged binding
+    takes just preprocessing.
+
+    .. code-block:: python
+
+        from ctyped.generator import generate
+
+        dumped = generate('/here/is/my/some.h', '/here/is/my/libsome.so')
+
+        with open('library.py', 'w') as f:
+            f.write(dumped)
+
+    :param header: Header file path.
+
+    :param libpath: Library path (or name) to be used in generated code.
+
+    :param cache: Whether to use cache.
+
+    :param cache_dir: Cache directory. Default: ``~/.cache/ctyped``.
+
+    :param use_pycparser: Whether to use ``pycparser``. By default it is used if installed.
+
+    :param preprocess: Whether to run C preprocessor. By default it is used if available.
+
+    """
+    header = Path(header)
+    libpath = str(libpath)
+
+    # Text actually parsed is hashed, so that changes of included headers
+    # (expanded by preprocessor) and of parser invalidate cached code.
+    # Falling back to the built-in parser is decided by the same text and pycparser version.
+    text, source, macros = _read_header(header, preprocess=preprocess)
+    parser = _get_parser_name(use_pycparser)
+
+    digest = hashlib.sha256(text.encode())
+    digest.update(f'\0{header.name}\0{source}\0{libpath}\0{parser}\0{VERSION_STR}'.encode())
+
+    cache_path = Path(cache_dir or get_cache_dir()) / f'{digest.hexdigest()}.py'
+
+    if cache:
+        try:
+            return cache_path.read_text()
+
+        except OSError:
+            pass
+
+    declarations = _parse_text(header, text, source=source, macros=macros, use_pycparser=use_pycparser)
+    dumped = declarations.to_result(libpath=libpath).to_ctyped(scopes=True)
+
+    if cache:
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            cache_tmp = cache_path.with_suffix(f'.{os.getpid()}.tmp')
+            cache_tmp.write_text(dumped)
+            os.replace(str(cache_tmp), str(cache_path))
+
+        except OSError as e:  # pragma: nocover
+            LOGGER.warning(f'Unable to cache generated code: {e}')
+
+    return dumped
@@ -0,0 +1,195 @@
+import threading
+from collections import deque, namedtuple
+from typing import Dict, Iterable, List, Optional
+
+FuncStatsSnapshot = namedtuple('FuncStatsSnapshot', ['count', 'total', 'marshal', 'native', 'percentiles'])
+"""Function calls statistics snapshot. Durations are in seconds.
+
+* count - number of calls
+* total - cumulative calls duration
+* marshal - arguments and result conversion part of the total
+* native - foreign function execution part of the total
+* percentiles - calls durations percentiles: percent -> duration
+
+"""
+
+PERCENTILES = (50, 90, 99)
+"""Percentiles calculated for snapshots by default."""
+
+
+class FuncStats:
+    """Calls statistics of a function.
+
+    Counters are updated by instrumented functions (see ``Library(instrument=True)``),
+    possibly from several threads at once.
+    Percentiles are calculated over the latest calls durations.
+
+    """
+    __slots__ = ['count', 'marshal', 'native', 'samples', '_lock']
+
+    def __init__(self, *, samples: int):
+        """
+
+        :param samples: Number of latest calls durations to keep for percentiles.
+
+        """
+        self.count = 0
+        self.marshal = 0.0
+        self.native = 0.0
+        self.samples: deque = deque(maxlen=samples)
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """Resets counters and samples."""
+        with self._lock:
+            self.count = 0
+            self.marshal = 0.0
+            self.native = 0.0
+            self.samples.clear()
+
+    def add(self, marshal: float, native: float):
+        """Registers a call.
+
+        :param marshal: Arguments and result conversion duration.
+
+        :param native: Foreign function call duration.
+
+        """
+        with self._lock:
+            self.count += 1
+            self.marshal += marshal
+            self.native += native
+            self.samples.append(marshal + native)
+
+    def snapshot(self, percentiles: Iterable[int] = PERCENTILES) -> FuncStatsSnapshot:
+        """Returns current statistics.
+
+        :param percentiles: Percentiles to calculate.
+
+        """
+        with self._lock:
+            count, marshal, native = self.count, self.marshal, self.native
+            samples = sorted(self.samples)
+
+        calculated = {}
+
+        for percent in percentiles:
+            # Nearest rank.
+            calculated[percent] = samples[max(0, -(-len(samples) * percent // 100) - 1)] if samples else 0.0
+
+        return FuncStatsSnapshot(
+            count=count,
+            total=marshal + native,
+            marshal=marshal,
+            native=native,
+            percentiles=calculated,
+        )
+
+
+def escape_label(value: str) -> str:
+    """Escapes Prometheus label value.
+
+    :param value:
+
+    """
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+class Instrument:
+    """Calls statistics of library functions.
+
+    .. code-block:: python
+
+        lib = Library('mylib', instrument=True)
+        ...
+
+        lib.bind_types()
+        ...
+
+        for name, stats in lib.instrument.snapshot().items():
+            print(f'{name}: {stats.count} calls, {stats.percentiles[99]:.6f} s p99')
+
+        metrics = lib.instrument.to_prometheus()
+
+    """
+    def __init__(self, library_name: str = '', *, samples: int = 1024):
+        """
+
+        :param library_name: Library name to use in exported metrics.
+
+        :param samples: Number of latest calls durations to keep for percentiles (per function).
+
+        """
+        self.library_name = library_name
+        self.samples = samples
+        self.funcs: Dict[str, FuncStats] = {}
+
+    def get(self, name: str) -> FuncStats:
+        """Returns statistics of a function, creating them if required.
+
+        :param name: C function name.
+
+        """
+        stats = self.funcs.get(name)
+
+        if stats is None:
+            stats = self.funcs[name] = FuncStats(samples=self.samples)
+
+        return stats
+
+    def reset(self):
+        """Resets statistics of all functions."""
+        for stats in self.funcs.values():
+            stats.reset()
+
+    def snapshot(self, percentiles: Iterable[int] = PERCENTILES) -> Dict[str, FuncStatsSnapshot]:
+        """Returns current statistics of functions: C name -> snapshot.
+
+        :param percentiles: Percentiles to calculate.
+
+        """
+        return {name: stats.snapshot(percentiles) for name, stats in self.funcs.items()}
+
+    def to_prometheus(self, *, prefix: str = 'ctyped', percentiles: Optional[Iterable[int]] = None) -> str:
+        """Returns statistics in Prometheus text exposition format.
+
+        :param prefix: Metrics names prefix.
+
+        :param percentiles: Percentiles to export as summary quantiles.
+
+        """
+        snapshot = self.snapshot(PERCENTILES if percentiles is None else percentiles)
+        library = escape_label(self.library_name)
+
+        calls: List[str] = []
+        durations: List[str] = []
+        marshal: List[str] = []
+        native: List[str] = []
+
+        for name, stats in sorted(snapshot.items()):
+            labels = f'library="{library}",function="{escape_label(name)}"'
+
+            calls.append(f'{prefix}_calls_total{{{labels}}} {stats.count}')
+
+            for percent, duration in stats.percentiles.items():
+                durations.append(f'{prefix}_call_seconds{{{labels},quantile="{percent / 100}"}} {duration!r}')
+
+            durations.append(f'{prefix}_call_seconds_sum{{{labels}}} {stats.total!r}')
+            durations.append(f'{prefix}_call_seconds_count{{{labels}}} {stats.count}')
+
+            marshal.append(f'{prefix}_marshal_seconds_total{{{labels}}} {stats.marshal!r}')
+            native.append(f'{prefix}_native_seconds_total{{{labels}}} {stats.native!r}')
+
+        lines = []
+
+        for name, kind, description, samples in (
+            ('calls_total', 'counter', 'Number of foreign function calls.', calls),
+            ('call_seconds', 'summary', 'Foreign function calls duration.', durations),
+            ('marshal_seconds_total', 'counter', 'Time spent converting arguments and results.', marshal),
+            ('native_seconds_total', 'counter', 'Time spent in foreign functions.', native),
+        ):
+            lines.append(f'# HELP {prefix}_{name} {description}')
+            lines.append(f'# TYPE {prefix}_{name} {kind}')
+            lines.extend(samples)
+
+        return '\n'.join(lines) + '\n'
@@ -2,25 +2,43 @@ import ctypes
 import inspect
 import logging
 import os
+import sys
+import threading
+from concurrent.futures import Executor
 from contextlib import contextmanager
 from ctypes.util import find_library
 from functools import partial, partialmethod, reduce
 from pathlib import Path
-from typing import Any, Optional, Callable, Union, List, Dict, Type, ContextManager
+from typing import Any, Optional, Callable, Union, List, Dict, Type, ContextManager, Tuple, TYPE_CHECKING
 
+from .aio import AsyncCaller
+from .cache import BindCache, get_cache_dir
 from .exceptions import UnsupportedTypeError, TypehintError, CtypedException
-from .sniffer import NmSymbolSniffer, SniffResult
-from .types import CChars, CastedTypeBase, CStruct
-from .utils import cast_type, extract_func_info, FuncInfo
+from .instrument import Instrument
+from .sniffer import ElfSymbolSniffer, SniffResult
+from .types import CArray, CChars, CastedField, CastedTypeBase, CStruct, CStructBE, CStructLE
+from .utils import (
+    call_map, call_map_bind, cast_type, extract_func_info, fast_call_bind, fast_call_stub, instrumented_call,
+    lazy_call_stub, FuncInfo, MethodDescriptor)
+
+if TYPE_CHECKING:  # pragma: nocover
+    from .pool import ProcessPool
 
 LOGGER = logging.getLogger(__name__)
 
+_STRUCT_BASES = {
+    None: CStruct,
+    'big': CStructBE,
+    'little': CStructLE,
+}
+
 
 class Scopes:
 
     def __init__(self, params: dict):
         self._scopes: List[Dict] = []
-        self._keys = ['prefix', 'str_type', 'int_bits', 'int_sign']
+        self._keys = ['prefix', 'str_type', 'int_bits', 'int_sign', 'fast_call', 'gil']
+        self._flat: Optional[Dict] = None
         self.push(params)
 
     def __call__(
@@ -29,6 +47,8 @@ class Scopes:
             str_type: Type[CastedTypeBase] = CChars,
             int_bits: Optional[int] = None,
             int_sign: Optional[bool] = None,
+            fast_call: Optional[bool] = None,
+            gil: Optional[bool] = None,
             **kwargs) -> ContextManager['Scopes']:
         """
 
@@ -38,6 +58,7 @@ class Scopes:
 
             * ``CChars`` - strings as chars (ANSI) **default**
             * ``CCharsW`` - strings as wide chars (UTF)
+            * ``CCharsLazy`` - strings as chars, results are decoded on demand
 
         :param int_bits: int length to be used in function.
 
@@ -45,6 +66,10 @@ class Scopes:
 
         :param int_sign: Flag. Whether to use signed (True) or unsigned (False) ints.
 
+        :param fast_call: Flag. Whether to use fast call trampolines for functions.
+
+        :param gil: Flag. Whether to hold (True) or release (False) GIL during function calls.
+
         :param kwargs:
 
         """
@@ -54,14 +79,25 @@ class Scopes:
 
         scope = {key: params.get(key) for key in self._keys}
         self._scopes.append(scope)
+        self._flat = None
 
     def pop(self):
         self._scopes.pop()
+        self._flat = None
 
     def flatten(self):
+        # Functions declared in the same scope share options (read only).
+        result = self._flat
+
+        if result is None:
+            result = self._flat = self._flatten()
+
+        return result
+
+    def _flatten(self):
 
         scopes = self._scopes
-        keys_bool = {'int_sign'}
+        keys_bool = {'int_sign', 'fast_call', 'gil'}
         keys_concat = {'prefix'}
         result = {}
 
@@ -75,9 +111,11 @@ class Scopes:
             return (prev or '') + (current or '')
 
         for key in self._keys:
+            initial = []
 
             if key in keys_concat:
                 reducer = concat
+                initial = ['']  # Allows concatenation for a sole scope.
 
             elif key in keys_bool:
                 reducer = pick_bool
@@ -85,7 +123,7 @@ class Scopes:
             else:
                 reducer = choose
 
-            result[key] = reduce(reducer, (scope[key] for scope in scopes[::-1]))
+            result[key] = reduce(reducer, (scope[key] for scope in scopes[::-1]), *initial)
 
         return result
 
@@ -120,7 +158,14 @@ class Library:
             prefix: Optional[str] = None,
             str_type: Type[CastedTypeBase] = CChars,
             int_bits: Optional[int] = None,
-            int_sign: Optional[bool] = None
+            int_sign: Optional[bool] = None,
+            fast_call: bool = False,
+            gil: bool = False,
+            aio_executor: Optional[Executor] = None,
+            aio_limit: Optional[int] = None,
+            cache: Union[bool, str, Path] = False,
+            lazy: bool = False,
+            instrument: Union[bool, Instrument] = False,
     ):
         """
 
@@ -136,6 +181,7 @@ class Library:
 
             * ``CChars`` - strings as chars (ANSI) **default**
             * ``CCharsW`` - strings as wide chars (UTF)
+            * ``CCharsLazy`` - strings as chars, results are decoded on demand
 
             .. note:: This setting is global to library. Can be changed on function definition level.
 
@@ -149,13 +195,82 @@ class Library:
 
             .. note:: This setting is global to library. Can be changed on function definition level.
 
+        :param fast_call: Flag. Whether to call functions through trampolines compiled
+            on ``.bind_types()`` instead of ctypes ``argtypes`` machinery.
+
+            Trampolines cast arguments inline (e.g. encode strings) and call the foreign
+            function with native ``argtypes`` left for ctypes to convert scalars.
+            That saves ``from_param()`` calls for strings and structures (about 5-10% per call),
+            yet adds a Python frame to each call, so functions accepting only
+            numbers and callbacks are called about 15% slower.
+
+            .. note:: This setting is global to library. Can be changed on function definition level.
+
+        :param gil: Flag. Whether to hold GIL during function calls.
+
+            * ``False`` - GIL is released during calls (as for ``ctypes.CDLL``) **default**.
+              Other Python threads run while C function is executing.
+              Suits long running functions.
+
+            * ``True`` - GIL is held during calls (as for ``ctypes.PyDLL``).
+              Saves GIL release and reacquire on each call.
+              Suits short functions.
+
+            .. note:: This setting is global to library. Can be changed on function definition level.
+
+        :param aio_executor: Executor to run functions called through ``.aio``.
+            Default: event loop default executor.
+
+        :param aio_limit: Maximum number of functions calls through ``.aio`` running concurrently
+            (per event loop).
+
+        :param cache: Whether to cache types resolved by ``.bind_types()`` on disk,
+            to reapply them on subsequent process starts without resolution.
+            Directory path can be passed. Default directory: ``~/.cache/ctyped``.
+
+            Cache is invalidated when library file or functions declarations change.
+            Types which can't be imported (e.g. local classes) are resolved anyway.
+
+        :param lazy: Flag. Whether to postpone library functions lookup and types binding
+            till the first call of each function. Declaration only records function information,
+            so that processes using a few functions of large bindings start faster.
+
+            The library itself is loaded on the first call if ``autoload`` is ``False``.
+
+            Lazy functions are called through a stub, which adds a Python frame
+            to each call. ``.bind_types()`` binds all the functions not called yet at once.
+
+        :param instrument: Whether to gather calls statistics for functions (see ``Instrument``):
+            calls count, durations percentiles, arguments and result conversion time
+            separately from foreign function execution time. ``Instrument`` object can be passed.
+
+            Instrumented functions are called through wrappers measuring the durations.
+            Conversion time is measured separately only in ``fast_call`` mode,
+            otherwise it is a part of the foreign function execution time.
+            Functions of libraries not instrumented have no overhead.
+
         """
         self.scope = Scopes(locals())
         self.s = self.scope
 
         self.name = str(name)
         self.lib = None
+        self.lib_gil = None
         self.funcs: Dict[str, Union[Callable, partialmethod[Any]]] = {}
+        self.cache_dir: Optional[Path] = (get_cache_dir() if cache is True else Path(cache)) if cache else None
+        self.lazy = lazy
+
+        if instrument is True:
+            instrument = Instrument(Path(self.name).name)
+
+        self.instrument: Optional[Instrument] = instrument or None
+        """Calls statistics if functions are instrumented."""
+
+        self._lock = threading.Lock()
+        self._hints: Dict[Tuple[str, str], Any] = {}  # Memoized string type hints resolution.
+
+        self.aio = AsyncCaller(self, executor=aio_executor, limit=aio_limit)
+        """Namespace to call functions from asyncio code (see ``AsyncCaller``)."""
 
         autoload and self.load()
 
@@ -176,6 +291,8 @@ class Library:
             raise CtypedException(f'Unable to find library: {name or self.name}')
 
         self.lib = lib
+        # The same library loaded with functions holding GIL.
+        self.lib_gil = ctypes.PyDLL(lib._name, handle=lib._handle, use_errno=True)
 
     def structure(
             self, *,
@@ -183,6 +300,7 @@ class Library:
             str_type: Optional[CastedTypeBase] = None,
             int_bits: Optional[int] = None,
             int_sign: Optional[bool] = None,
+            byte_order: Optional[str] = None,
     ):
         """Class decorator for C structures definition.
 
@@ -203,8 +321,20 @@ class Library:
 
         :param int_sign: Flag. Whether to use signed (True) or unsigned (False) ints.
 
+        :param byte_order: Fields byte order: 'big' or 'little'. Default: native.
+            Structures of non-native byte order may only have numeric fields
+            (and arrays and structures of the same byte order), which is handy
+            to map network or file formats data in place (see ``.from_buffer()``).
+
         """
         params = locals()
+        params.pop('byte_order')
+
+        try:
+            struct_base = _STRUCT_BASES[byte_order]
+
+        except KeyError:
+            raise ValueError(f"Unsupported byte order: {byte_order}. Expected 'big' or 'little'.")
 
         def wrapper(cls_):
 
@@ -216,12 +346,16 @@ class Library:
 
                 cls_name = cls_.__name__
 
+                module = sys.modules.get(cls_.__module__)
+
                 info = FuncInfo(
                     name_py=cls_name, name_c=None,
-                    annotations=annotations, options=self.scope.flatten())
+                    annotations=annotations, options=self.scope.flatten(),
+                    namespace=vars(module) if module else None)
 
-                # todo maybe support big/little byte order
-                struct = type(cls_name, (CStruct, cls_), {})
+                struct = type(cls_name, (struct_base, cls_), {})
+                struct.__module__ = cls_.__module__
+                struct.__qualname__ = cls_.__qualname__
 
                 ct_fields = {}
                 fields = []
@@ -233,9 +367,18 @@ class Library:
                         ct_fields[attrname] = struct
 
                     else:
-                        casted = cast_type(info, attrname, attrhint)
+                        casted = cast_type(info, attrname, attrhint, hints=self._hints)
+
+                        if issubclass(casted, CArray):
+                            casted = self._get_array_field(info, attrname, casted)
+                            ct_fields[attrname] = casted
+                            casted = casted._ct_array
+
+                        elif issubclass(casted, CStruct):
+                            # Nested structures are stored by value and handled natively.
+                            pass
 
-                        if issubclass(casted, CastedTypeBase):
+                        elif issubclass(casted, CastedTypeBase):
                             ct_fields[attrname] = casted
 
                     fields.append((attrname, casted))
@@ -246,18 +389,53 @@ class Library:
                     struct._pack_ = pack
 
                 struct._ct_fields = ct_fields
-                struct._fields_ = fields
+
+                try:
+                    struct._fields_ = fields
+
+                except TypeError as e:
+                    # Pointers and strings are not supported for non-native byte order.
+                    raise UnsupportedTypeError(f'Structure {cls_name} fields are not supported: {e}')
+
+                # Fields types as set by ctypes (arrays are byte swapped for non-native byte order).
+                fields_set = dict(struct._fields_)
+
+                for attrname, casted in ct_fields.items():
+
+                    if issubclass(casted, CArray):
+                        casted = ct_fields[attrname] = casted._ct_bind_array(fields_set[attrname])
+
+                    # Only fields requiring casting get descriptors,
+                    # the others are left to native ctypes fields.
+                    setattr(struct, attrname, CastedField(getattr(struct, attrname), casted))
 
             return struct
 
         return wrapper
 
+    def _get_array_field(self, info: FuncInfo, attrname: str, array: Type[CArray]) -> Type[CArray]:
+        # Returns array type for a structure field, with element type resolved using structure options.
+        typecls = array._ct_type
+
+        if typecls is str:
+            typecls = ctypes.c_char
+
+        else:
+            typecls = cast_type(info, attrname, typecls, hints=self._hints)
+
+        if issubclass(typecls, CastedTypeBase) and not issubclass(typecls, CStruct):
+            raise UnsupportedTypeError(f'Unsupported array element type for {info.name_py}.{attrname}: {typecls}')
+
+        return array._ct_bind_element(typecls)
+
     def cls(
             self, *,
             prefix: Optional[str] = None,
             str_type: Optional[CastedTypeBase] = None,
             int_bits: Optional[int] = None,
             int_sign: Optional[bool] = None,
+            fast_call: Optional[bool] = None,
+            gil: Optional[bool] = None,
     ):
         """Class decorator. Allows common parameters application for class methods.
 
@@ -279,6 +457,10 @@ class Library:
 
         :param int_sign: Flag. Whether to use signed (True) or unsigned (False) ints.
 
+        :param fast_call: Flag. Whether to use fast call trampolines for functions.
+
+        :param gil: Flag. Whether to hold (True) or release (False) GIL during function calls.
+
         """
         self.scope.push(locals())
 
@@ -294,6 +476,8 @@ class Library:
             str_type: Optional[CastedTypeBase] = None,
             int_bits: Optional[int] = None,
             int_sign: Optional[bool] = None,
+            fast_call: Optional[bool] = None,
+            gil: Optional[bool] = None,
 
     ) -> Callable:
         """Decorator to mark functions which exported from the library.
@@ -337,6 +521,26 @@ class Library:
 
             .. note:: Overrides the same named param from library level (see ``__init__`` description).
 
+        :param fast_call: Flag. Whether to use fast call trampoline for the function.
+
+            .. note:: Overrides the same named param from library level (see ``__init__`` description).
+
+        :param gil: Flag. Whether to hold (True) or release (False) GIL during the function calls.
+
+            .. note:: Overrides the same named param from library level (see ``__init__`` description).
+
+        Declared functions (and methods) have ``.map(*iterables, out=None, lazy=False)`` method
+        to call them for sequences of arguments (see ``call_map()``).
+
+        .. code-block:: python
+
+            @lib.function
+            def add_one(val: int) -> int:
+                ...
+
+            results = add_one.map(range(1000))  # [1, 2, ...]
+            add_one.map(numpy_array, out=numpy_out)
+
         """
         def cfunc_wrapped(*args, f: Callable, **kwargs):
 
@@ -352,10 +556,24 @@ class Library:
             info = extract_func_info(func_py, name_c=name_c, scope=scope, registry=self.funcs)
             name = info.name_c
 
-            func_c = getattr(self.lib, name)
+            if self.lazy:
+                func_c = func_call = self._get_lazy_stub(func_py, info)
 
-            # Prepare for late binding in .bind_types().
-            func_c.ctyped = info
+            else:
+                func_c = self._get_cfunc(info)
+                func_call = func_c
+
+                if scope.get('fast_call'):
+                    # Trampoline is compiled in .bind_types().
+                    func_call = fast_call_stub(func_py, info)
+                    func_call.cfunc = func_c
+                    func_c.ctyped_fast = func_call
+
+                elif self.instrument:
+                    func_call = instrumented_call(func_py, func_c, self.instrument.get(name))
+                    func_call.cfunc = func_c
+
+            func_call.map = partial(call_map, func_call)
 
             if wrap:
                 func_args = inspect.getfullargspec(func_py).args
@@ -365,14 +583,14 @@ class Library:
 
                     LOGGER.debug(f'Func [ {name} -> {info.name_py} ] uses wrapped manual call.')
 
-                    func_swapped = partialmethod(func_py, cfunc=partial(cfunc_wrapped, f=func_c))
+                    func_swapped = MethodDescriptor(func_py, cfunc=partial(cfunc_wrapped, f=func_call))
 
                 else:
                     # Automatically bind first param (self, cls)
 
                     LOGGER.debug(f'Func [ {name} -> {info.name_py} ] uses wrapped auto call.')
 
-                    func_swapped = partialmethod(func_c)
+                    func_swapped = MethodDescriptor(func_call)
 
                 setattr(func_swapped, 'cfunc', func_c)
                 func_out = func_swapped
@@ -381,7 +599,7 @@ class Library:
 
                 LOGGER.debug(f'Func [ {name} -> {info.name_py} ] uses direct call.')
 
-                func_out = func_c
+                func_out = func_call
 
             self.funcs[name] = func_out
 
@@ -403,13 +621,152 @@ class Library:
         """Decorator. The same as ``.function()`` with ``wrap=True``."""
         return self.function(name_c=name_c, wrap=True, **kwargs)
 
+    def _get_cfunc(self, info: FuncInfo) -> Callable:
+        # Looks up a foreign function, preparing it for late binding in .bind_types().
+        func_c = getattr(self.lib_gil if info.options.get('gil') else self.lib, info.name_c)
+        func_c.ctyped = info
+        return func_c
+
+    def _get_lazy_stub(self, func_py: Callable, info: FuncInfo) -> Callable:
+        # Returns a stub to look up a foreign function and bind its types on the first call.
+        target = None
+
+        def load(types: Optional[Tuple[List[Any], Any, bool]] = None) -> Optional[Tuple[List[Any], Any, bool]]:
+            nonlocal target
+
+            with self._lock:
+
+                if target is not None:
+                    # Already bound in another thread.
+                    return None
+
+                if self.lib is None:
+                    self.load()
+
+                LOGGER.debug(f'Func [ {info.name_c} -> {info.name_py} ] is bound lazily.')
+
+                func_c = self._get_cfunc(info)
+                func_call = func_c
+
+                if info.options.get('fast_call'):
+                    func_call = fast_call_stub(func_py, info)
+                    func_c.ctyped_fast = func_call
+
+                elif self.instrument:
+                    func_call = instrumented_call(func_py, func_c, self.instrument.get(info.name_c))
+
+                types = self._bind_func(func_c, types)
+
+                target = func_call
+                stub.ctyped_load = None
+
+            return types
+
+        def get_target() -> Callable:
+            load()
+            return target
+
+        stub = lazy_call_stub(func_py, get_target)
+        stub.ctyped = info
+        stub.ctyped_load = load
+
+        return stub
+
+    def _bind_func(
+            self, func_c: Callable, types: Optional[Tuple[List[Any], Any, bool]] = None
+    ) -> Tuple[List[Any], Any, bool]:
+        # Binds types to a ctypes function, resolving them from type hints if not passed.
+        # Returns types bound: (argtypes, restype, restype_set).
+        func_info: FuncInfo = func_c.ctyped
+
+        name_c = func_info.name_c
+        name_py = func_info.name_py
+        annotations = func_info.annotations
+        errcheck = None
+
+        if types:
+            argtypes, restype, return_is_annotated = types
+            annotations.pop('return', None)
+
+        else:
+            try:
+                return_is_annotated = 'return' in annotations
+                hints = self._hints
+                restype = cast_type(func_info, 'return', annotations.pop('return', None), hints=hints)
+                argtypes = [
+                    cast_type(func_info, argname, argtype, hints=hints) for argname, argtype in annotations.items()]
+
+            except TypehintError:
+                # Reset annotations to allow subsequent .bind_types() calls w/o exceptions.
+                func_info.annotations.clear()
+                raise
+
+        if restype and issubclass(restype, CastedTypeBase):
+            errcheck = restype._ct_res
+
+        try:
+            for argtype in argtypes:
+                if issubclass(argtype, CastedTypeBase):
+                    argtype._ct_bind()
+
+            if argtypes:
+                func_c.argtypes = argtypes
+
+            if restype or return_is_annotated:
+                func_c.restype = restype
+
+            if errcheck:
+                func_c.errcheck = errcheck
+
+        except TypeError as e:
+
+            raise UnsupportedTypeError(
+                f'Unsupported types declared for {name_py} ({name_c}). '
+                f'Args: {argtypes}. Result: {restype}. Errcheck: {errcheck}.'
+            ) from e
+
+        func_fast = getattr(func_c, 'ctyped_fast', None)
+
+        if func_fast:
+            # Separate pointer with native argtypes for trampoline to call.
+            func_ptr = type(func_c)((name_c, self.lib))
+            func_ptr.restype = func_c.restype
+
+            fast_call_bind(
+                func_fast, func_ptr=func_ptr, argtypes=argtypes, errcheck=errcheck,
+                stats=self.instrument.get(name_c) if self.instrument else None)
+
+        if not self.instrument:
+            # Instrumented calls are not to be bypassed by .map().
+            call_map_bind(func_c, self.lib)
+
+        return argtypes, restype, return_is_annotated
+
+    def pool(self, processes: Optional[int] = None, **kwargs) -> 'ProcessPool':
+        """Returns a pool of worker processes to call the library functions in (see ``ProcessPool``).
+
+        Useful for CPU bound functions which are not thread-safe.
+
+        .. code-block:: python
+
+            with lib.pool(processes=4) as pool:
+                results = pool.map('crunch', numpy_array)
+
+        :param processes: Number of worker processes. Default: number of CPUs.
+
+        :param kwargs: Additional ``ProcessPool`` arguments.
+
+        """
+        from .pool import ProcessPool  # Requires Python 3.8+.
+        return ProcessPool(self, processes=processes, **kwargs)
+
     def sniff(self) -> SniffResult:
         """Sniffs the library for symbols.
 
         Sniffing result can be used as 'ctyped' code generator.
 
         """
-        sniffer = NmSymbolSniffer(self.lib._name)
+        sniffer = ElfSymbolSniffer(self.lib._name)
         result = sniffer.sniff()
         return result
 
@@ -420,45 +777,42 @@ class Library:
         """
         LOGGER.debug('Binding signature types to ctypes functions ...')
 
-        for name_c, func_out in self.funcs.items():
+        cache = None
+        types_cached = {}
+        types_resolved = {}
 
-            func_c = getattr(func_out, 'cfunc', func_out)
-            func_info: FuncInfo = func_c.ctyped
+        if self.cache_dir and self.funcs:
 
-            name_py = func_info.name_py
-            annotations = func_info.annotations
-            errcheck = None
+            with self._lock:
 
-            try:
-                return_is_annotated = 'return' in annotations
-                restype = cast_type(func_info, 'return', annotations.pop('return', None))
+                if self.lib is None:
+                    # Not loaded yet (lazy library). Functions binding loads it anyway.
+                    self.load()
 
-                if restype and issubclass(restype, CastedTypeBase):
-                    errcheck = restype._ct_res
+            cache = BindCache(self.cache_dir, libpath=self.lib._name, funcs={
+                name_c: getattr(func_out, 'cfunc', func_out).ctyped for name_c, func_out in self.funcs.items()})
+            types_cached = cache.load()
 
-                argtypes = [cast_type(func_info, argname, argtype) for argname, argtype in annotations.items()]
+        for name_c, func_out in self.funcs.items():
 
-            except TypehintError:
-                # Reset annotations to allow subsequent .bind_types() calls w/o exceptions.
-                func_info.annotations.clear()
-                raise
+            func_c = getattr(func_out, 'cfunc', func_out)
+            types = types_cached.get(name_c)
 
-            try:
-                if argtypes:
-                    func_c.argtypes = argtypes
+            if hasattr(func_c, 'ctyped_load'):
+                # Lazy function stub. May be already bound on call.
+                types_bound = func_c.ctyped_load and func_c.ctyped_load(types)
 
-                if restype or return_is_annotated:
-                    func_c.restype = restype
+                if types_bound is None:
+                    continue
 
-                if errcheck:
-                    func_c.errcheck = errcheck
+            else:
+                types_bound = self._bind_func(func_c, types)
 
-            except TypeError as e:
+            if not types:
+                types_resolved[name_c] = types_bound
 
-                raise UnsupportedTypeError(
-                    f'Unsupported types declared for {name_py} ({name_c}). '
-                    f'Args: {argtypes}. Result: {restype}. Errcheck: {errcheck}.'
-                ) from e
+        if cache and types_resolved:
+            cache.save({**types_cached, **types_resolved})
 
     #####################################################################################
     # Shortcuts
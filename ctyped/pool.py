@@ -0,0 +1,348 @@
+import os
+from collections import namedtuple
+from concurrent.futures import Future, ProcessPoolExecutor
+from importlib import import_module
+from itertools import chain
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Callable, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from .exceptions import CtypedException
+from .utils import call_map
+
+if TYPE_CHECKING:  # pragma: nocover
+    from .library import Library
+
+
+SharedArg = namedtuple('SharedArg', ['name', 'format', 'start', 'stop'])
+"""Reference to a buffer (or its slice) in shared memory passed to a worker."""
+
+
+_libraries: Dict[Tuple[str, str], 'Library'] = {}
+"""Worker process libraries: (module, attribute) -> library."""
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    # Attaches to shared memory created by the parent process, which is responsible for its unlinking.
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+
+    except TypeError:  # pragma: nocover
+        # Python < 3.13 has no `track`. Workers share resource tracker
+        # with the parent process, so the segment remains registered once.
+        return shared_memory.SharedMemory(name)
+
+
+def _share(obj: Any) -> Optional[Tuple[shared_memory.SharedMemory, memoryview]]:
+    # Copies buffer contents into shared memory. None if object is not a suitable buffer.
+    if isinstance(obj, (bytes, str)):
+        return None
+
+    try:
+        view = memoryview(obj)
+
+    except TypeError:
+        return None
+
+    if view.ndim != 1 or not view.c_contiguous or not view.nbytes:
+        return None
+
+    try:
+        view.cast('B').cast(view.format)
+
+    except (TypeError, ValueError):
+        # Formats not supported by memoryview casts.
+        return None
+
+    shm = shared_memory.SharedMemory(create=True, size=view.nbytes)
+    shm.buf[:view.nbytes] = view.cast('B')
+
+    return shm, view
+
+
+def _get_func(module: str, attr: str, name: str) -> Callable:
+    library = _libraries.get((module, attr))
+
+    if library is None:
+        # Declarations are imported (and library is loaded) once per worker.
+        library = _libraries[(module, attr)] = getattr(import_module(module), attr)
+
+    return library.funcs[name]
+
+
+def _call(target: Tuple[str, str, str], args: tuple, shared: Tuple[SharedArg, ...], out: Any) -> Any:
+    # Runs in a worker process. `out` is None for single calls, True or shared buffer for batches.
+    func = _get_func(*target)
+
+    attached = []
+    views = []
+
+    def resolve(arg: SharedArg) -> memoryview:
+        shm = _attach(arg.name)
+        attached.append(shm)
+        view = shm.buf.cast(arg.format)[arg.start:arg.stop]
+        views.append(view)
+        return view
+
+    try:
+        shared_views = iter([resolve(arg) for arg in shared])
+        args = tuple(next(shared_views) if isinstance(arg, SharedArg) else arg for arg in args)
+
+        if out is None:
+            return func(*args)
+
+        # Batch.
+        result = call_map(func, *args, out=None if out is True else resolve(out))
+        return None if out is not True else result
+
+    finally:
+        del args
+
+        for view in views:
+            view.release()
+
+        for shm in attached:
+            shm.close()
+
+
+class ProcessPool:
+    """Pool of worker processes to call library functions in.
+
+    Workers import the module the library is declared in (so that
+    the shared library is loaded and types are bound in every worker).
+    The library is required to be a module level attribute.
+
+    Buffer arguments (``bytearray``, ``array.array``, NumPy arrays, etc.)
+    are passed through shared memory and changes made by functions
+    are copied back. Other arguments and results are pickled.
+
+    .. code-block:: python
+
+        lib = Library('mylib')
+
+        @lib.function
+        def crunch(values: CBuffer[CInt32], count: int) -> int:
+            ...
+
+        lib.bind_types()
+
+        with lib.pool(processes=4) as pool:
+            future = pool.submit('crunch', array('i', [1, 2, 3]), 3)
+            results = pool.map('crunch', arrays, counts)
+
+    .. note:: Python 3.8+ is required.
+
+    """
+    def __init__(
+            self, library: 'Library', *,
+            processes: Optional[int] = None,
+            module: Optional[str] = None,
+            mp_context: Any = None
+    ):
+        """
+
+        :param library: Library to call functions from.
+
+        :param processes: Number of worker processes. Default: number of CPUs.
+
+        :param module: Name of a module the library is declared in.
+            Default: module of the library functions.
+
+        :param mp_context: Multiprocessing context to start workers with.
+
+        """
+        if module is None:
+            module = next((
+                getattr(func_out, 'cfunc', func_out).ctyped.namespace.get('__name__')
+                for func_out in library.funcs.values()), None)
+
+        attr = None
+
+        if module:
+            attr = next((
+                name for name, value in vars(import_module(module)).items() if value is library), None)
+
+        if attr is None:
+            raise CtypedException(f'Unable to find library {library.name} in module {module}')
+
+        # Workers are to inherit the parent process resource tracker.
+        resource_tracker.ensure_running()
+
+        self._library = library
+        self._target = (module, attr)
+        self.processes = processes or os.cpu_count() or 1
+        self._executor = ProcessPoolExecutor(max_workers=self.processes, mp_context=mp_context)
+
+    def __enter__(self) -> 'ProcessPool':
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+
+    def shutdown(self, wait: bool = True):
+        """Shuts down worker processes.
+
+        :param wait: Wait for pending calls to complete.
+
+        """
+        self._executor.shutdown(wait=wait)
+
+    def _get_name(self, name: str) -> str:
+        # Returns C name of a function, given either Python or C name.
+        funcs = self._library.funcs
+
+        if name in funcs:
+            return name
+
+        for name_c, func_out in funcs.items():
+            if getattr(func_out, 'cfunc', func_out).ctyped.name_py == name:
+                return name_c
+
+        raise KeyError(f'Function {name} is not declared in {self._library.name}')
+
+    def submit(self, name: str, *args) -> Future:
+        """Schedules a function call in a worker. Returns a future.
+
+        :param name: Function Python or C name.
+
+        :param args: Function arguments.
+
+        """
+        shared = []
+        args_passed = []
+
+        for arg in args:
+            share = _share(arg)
+
+            if share is None:
+                args_passed.append(arg)
+                continue
+
+            shm, view = share
+            shared.append((shm, view))
+            args_passed.append(SharedArg(shm.name, view.format, 0, len(view)))
+
+        future = self._executor.submit(
+            _call, (*self._target, self._get_name(name)), tuple(args_passed),
+            tuple(arg for arg in args_passed if isinstance(arg, SharedArg)), None)
+
+        if not shared:
+            return future
+
+        # Result is available only after buffers changes are copied back.
+        future_out: Future = Future()
+
+        def done(future_done: Future):
+
+            self._release(shared)
+            error = future_done.exception()
+
+            if error is None:
+                future_out.set_result(future_done.result())
+
+            else:
+                future_out.set_exception(error)
+
+        future.add_done_callback(done)
+
+        return future_out
+
+    def map(self, name: str, *iterables, out: Any = None, chunksize: Optional[int] = None) -> Any:
+        """Calls a function for every set of arguments taken from iterables
+        (see ``call_map()``), spreading the calls across workers in chunks.
+
+        Arrays (``array.array``, NumPy arrays, etc.) are passed through shared memory,
+        as well as ``out`` buffer.
+
+        :param name: Function Python or C name.
+
+        :param iterables: Sequences of arguments (one per function parameter).
+
+        :param out: Preallocated sequence to put results into. It is returned as result.
+
+        :param chunksize: Number of calls per chunk. Default: spread evenly across workers.
+
+        """
+        name = self._get_name(name)
+        sequences: List[Any] = []
+        shared = []
+
+        for iterable in iterables:
+            share = _share(iterable)
+
+            if share is None:
+                sequences.append(iterable if hasattr(iterable, '__getitem__') else list(iterable))
+
+            else:
+                shared.append(share)
+                sequences.append(share)
+
+        count = min(len(sequence[1] if isinstance(sequence, tuple) else sequence) for sequence in sequences)
+
+        out_share = None
+
+        if out is not None:
+            out_share = _share(out)
+
+            if out_share is not None:
+                shared.append(out_share)
+
+        if not chunksize:
+            chunksize = -(-count // (self.processes * 4)) or 1
+
+        futures = []
+
+        try:
+            for start in range(0, count, chunksize):
+                stop = min(start + chunksize, count)
+                args = []
+
+                for sequence in sequences:
+
+                    if isinstance(sequence, tuple):
+                        shm, view = sequence
+                        args.append(SharedArg(shm.name, view.format, start, stop))
+
+                    else:
+                        args.append(sequence[start:stop])
+
+                out_arg = True
+
+                if out_share is not None:
+                    shm, view = out_share
+                    out_arg = SharedArg(shm.name, view.format, start, stop)
+
+                futures.append(self._executor.submit(
+                    _call, (*self._target, name), tuple(args),
+                    tuple(arg for arg in args if isinstance(arg, SharedArg)), out_arg))
+
+            results = [future.result() for future in futures]
+
+            if out is None:
+                return list(chain.from_iterable(results))
+
+            if out_share is None:
+                call_map(lambda result: result, chain.from_iterable(results), out=out)
+
+            else:
+                shm, view = out_share
+                view[:count] = shm.buf.cast(view.format)[:count]
+
+            return out
+
+        finally:
+            for future in futures:
+                future.cancel()
+
+            self._release(shared, copy_back=False)
+
+    @staticmethod
+    def _release(shared: List[Tuple[shared_memory.SharedMemory, memoryview]], *, copy_back: bool = True):
+        # Copies changes made in workers back to buffers, frees shared memory.
+        for shm, view in shared:
+
+            if copy_back and not view.readonly:
+                view.cast('B')[:] = shm.buf[:view.nbytes]
+
+            view.release()
+            shm.close()
+            shm.unlink()
@@ -1,15 +1,26 @@
+import mmap
+import os
+import struct
 import subprocess
+import zlib
 from collections import namedtuple
 from datetime import datetime
+from keyword import iskeyword
 from pathlib import Path
-from textwrap import dedent
-from typing import List, Union
+from textwrap import dedent, indent
+from typing import Dict, Iterator, List, Union
 
+from . import types
+from .dwarf import DwarfReader, StructInfo
 from .exceptions import SniffingError
 
 
-SniffedSymbol = namedtuple('SniffedSymbol', ['name', 'address', 'line'])
-"""Represents a symbol sniffed from a library."""
+SniffedSymbol = namedtuple('SniffedSymbol', ['name', 'address', 'line', 'signature'])
+"""Represents a symbol sniffed from a library.
+Signature (``dwarf.FuncSignature``) is available only for libraries with debugging information.
+
+"""
+SniffedSymbol.__new__.__defaults__ = (None,)
 
 
 class SniffResult:
@@ -17,32 +28,151 @@ class SniffResult:
 
     def __init__(self, *, libpath: str):
         self.symbols: List[SniffedSymbol] = []
+        self.structures: Dict[str, StructInfo] = {}
         self.libpath = libpath
 
     def add_symbol(self, symbol: SniffedSymbol):
         """Added a symbol to the result."""
         self.symbols.append(symbol)
 
-    def to_ctyped(self):
-        """Generates ctyped code from sniff result."""
+    def _group(self, min_size: int = 3) -> Dict[str, List[SniffedSymbol]]:
+        # Groups symbols by the longest name prefix shared by at least `min_size` symbols:
+        # prefix -> symbols. Symbols without such prefix go under empty prefix.
+
+        def get_prefixes(name: str) -> Iterator[str]:
+            idx = name.find('_')
+
+            while idx != -1:
+                prefix = name[:idx + 1]
+                rest = name[idx + 1:]
+
+                if rest.isidentifier() and not iskeyword(rest):
+                    yield prefix
+
+                idx = name.find('_', idx + 1)
+
+        counts = {}
+
+        for symbol in self.symbols:
+            for prefix in get_prefixes(symbol.name):
+                counts[prefix] = counts.get(prefix, 0) + 1
+
+        groups = {'': []}
+
+        for symbol in self.symbols:
+            prefix = ''
+
+            for candidate in get_prefixes(symbol.name):
+                if counts[candidate] >= min_size:
+                    prefix = candidate
+
+            groups.setdefault(prefix, []).append(symbol)
+
+        for prefix, symbols in list(groups.items()):
+            # Too small groups (left after longer prefixes picked up the others) are not scoped.
+            if prefix and len(symbols) < min_size:
+                groups[''].extend(groups.pop(prefix))
+
+        while True:
+            # Groups whose names clash once prefixes are stripped (e.g. SHA1_Init and SHA256_Init)
+            # are not scoped, otherwise generated functions would shadow each other.
+            counts = {}
+
+            for prefix, symbols in groups.items():
+                for symbol in symbols:
+                    name = symbol.name[len(prefix):]
+                    counts[name] = counts.get(name, 0) + 1
+
+            clashing = [
+                prefix for prefix, symbols in groups.items()
+                if prefix and any(counts[symbol.name[len(prefix):]] > 1 for symbol in symbols)]
+
+            if not clashing:
+                break
 
-        dumped = [
+            for prefix in clashing:
+                groups[''].extend(groups.pop(prefix))
+
+        return groups
+
+    def to_ctyped(self, *, scopes: bool = False) -> str:
+        """Generates ctyped code from sniff result.
+
+        :param scopes: Group functions having common name prefix into scopes.
+
+        """
+        annotations = set()
+
+        for symbol in self.symbols:
+            signature = symbol.signature
+
+            if signature:
+                annotations.update(annotation for _, annotation in signature.params)
+                annotations.add(signature.result)
+
+        for structure in self.structures.values():
+            annotations.update(annotation for _, annotation in structure.fields)
+
+        types_used = sorted(
+            annotation for annotation in annotations
+            if annotation not in self.structures and annotation[0] == 'C' and hasattr(types, annotation))
+
+        dumped = ['from ctyped.toolbox import Library']
+
+        if types_used:
+            dumped.append(f"from ctyped.types import {', '.join(types_used)}")
+
+        dumped.extend([
+            '',
             '###',
             f'# Code below was automatically generated {datetime.utcnow()} UTC',
             f'# Total functions: {len(self.symbols)}',
             '###',
             f"lib = Library('{self.libpath}')",
             ''
-        ]
+        ])
 
-        for symbol in self.symbols:
-            dumped.append(dedent(
+        for structure in self.structures.values():
+            pack = f'pack={structure.pack}' if structure.pack else ''
+            fields = '\n'.join(f'    {name}: {annotation}' for name, annotation in structure.fields)
+
+            dumped.append(
+                f'\n@lib.structure({pack})\n'
+                f'class {structure.name}:\n\n'
+                f"{fields or '    pass'}\n"
+            )
+
+        def dump_function(symbol: SniffedSymbol, name: str) -> str:
+            signature = symbol.signature
+            params = ''
+            result = ''
+            line = symbol.line
+
+            if signature:
+                params = ', '.join(f'{name}: {annotation}' for name, annotation in signature.params)
+                result = f' -> {signature.result}'
+                line = line or signature.line
+
+            return dedent(
                 f'''
                 @lib.f
-                def {symbol.name}():
-                    """{symbol.line}"""
+                def {name}({params}){result}:
+                    """{line}"""
                 '''
-            ))
+            )
+
+        groups = self._group() if scopes else {'': self.symbols}
+
+        for prefix, symbols in groups.items():
+
+            if prefix:
+                dumped.append(f"\nwith lib.scope('{prefix}'):")
+                dumped.extend(
+                    indent(dump_function(symbol, symbol.name[len(prefix):]), '    ')
+                    for symbol in symbols)
+
+            else:
+                dumped.extend(dump_function(symbol, symbol.name) for symbol in symbols)
 
         dumped.append('\nlib.bind_types()')
 
@@ -125,3 +255,252 @@ class NmSymbolSniffer:
             result.add_symbol(symbol)
 
         return result
+
+
+ElfSection = namedtuple('ElfSection', ['name', 'type', 'flags', 'offset', 'size', 'link', 'entsize'])
+"""Represents ELF file section header."""
+
+
+class ElfFile:
+    """ELF file memory mapped for reading.
+
+    .. code-block:: python
+
+        with ElfFile('/here/is/my/libsome.so') as elf:
+            data = elf.get_data('.dynsym')
+
+    """
+    SHF_COMPRESSED = 0x800
+
+    def __init__(self, path: Union[str, Path]):
+        """
+
+        :param path: ELF file path.
+
+        """
+        self.path = str(path)
+        self.sections: Dict[str, ElfSection] = {}
+        self.headers: List[ElfSection] = []
+        """Sections in section header table order (indexed by ``link``)."""
+        self.is64 = True
+        self.byteorder = '<'
+        self._views: List[memoryview] = []
+
+        with open(self.path, 'rb') as f:
+            try:
+                self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+            except ValueError:  # pragma: nocover
+                raise SniffingError(f'Unable to map file: {self.path}')
+
+        try:
+            self._read_headers()
+
+        except (struct.error, IndexError):
+            self.close()
+            raise SniffingError(f'Unable to read ELF headers: {self.path}')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """Unmaps the file."""
+        for view in self._views:
+            view.release()
+
+        self.data.close()
+
+    def _read_headers(self):
+        data = self.data
+
+        if data[:4] != b'\x7fELF':
+            raise SniffingError(f'Not an ELF file: {self.path}')
+
+        self.is64 = is64 = data[4] == 2
+        self.byteorder = order = '<' if data[5] == 1 else '>'
+
+        if is64:
+            shoff, = struct.unpack_from(f'{order}Q', data, 0x28)
+            shentsize, shnum, shstrndx = struct.unpack_from(f'{order}HHH', data, 0x3A)
+            header_fmt = f'{order}IIQQQQIIQQ'
+
+        else:
+            shoff, = struct.unpack_from(f'{order}I', data, 0x20)
+            shentsize, shnum, shstrndx = struct.unpack_from(f'{order}HHH', data, 0x2E)
+            header_fmt = f'{order}IIIIIIIIII'
+
+        headers = [
+            struct.unpack_from(header_fmt, data, shoff + idx * shentsize)
+            for idx in range(shnum)]
+
+        names_offset = headers[shstrndx][4]
+
+        for name, type_, flags, _, offset, size, link, _, _, entsize in headers:
+            name = self.get_string(names_offset + name)
+            section = ElfSection(
+                name=name, type=type_, flags=flags, offset=offset, size=size, link=link, entsize=entsize)
+            self.headers.append(section)
+            # Section names may repeat, the first one is taken by name.
+            self.sections.setdefault(name, section)
+
+    def get_string(self, offset: int) -> str:
+        """Returns null-terminated string from the given file offset.
+
+        :param offset:
+
+        """
+        data = self.data
+        return data[offset:data.find(b'\0', offset)].decode('utf-8', 'replace')
+
+    def get_section(self, name: str) -> ElfSection:
+        """Returns section header by name.
+
+        :param name: Section name, e.g. ``.dynsym``.
+
+        """
+        section = self.sections.get(name)
+
+        if section is None:
+            raise SniffingError(f'No {name} section found in {self.path}')
+
+        return section
+
+    def get_data(self, name: str) -> Union[memoryview, bytes]:
+        """Returns section contents by name. Empty if there is no such section.
+
+        Compressed sections (e.g. debug information) are decompressed,
+        others are returned as memoryview over mapped file.
+
+        :param name: Section name, e.g. ``.debug_info``.
+
+        """
+        section = self.sections.get(name)
+
+        if section is None:
+            # Legacy GNU compressed sections.
+            section = self.sections.get(f'.z{name[1:]}')
+
+            if section is None:
+                return b''
+
+            data = self.data[section.offset:section.offset + section.size]
+
+            if data[:4] != b'ZLIB':
+                raise SniffingError(f'Unsupported {section.name} section compression in {self.path}')
+
+            return zlib.decompress(data[12:])
+
+        if not section.size:
+            return b''
+
+        if section.flags & self.SHF_COMPRESSED:
+            data = self.data[section.offset:section.offset + section.size]
+            header_fmt = f'{self.byteorder}IIQQ' if self.is64 else f'{self.byteorder}III'
+            compression = struct.unpack_from(header_fmt, data)[0]
+
+            if compression != 1:  # Only ELFCOMPRESS_ZLIB is supported.
+                raise SniffingError(f'Unsupported {name} section compression in {self.path}')
+
+            return zlib.decompress(data[struct.calcsize(header_fmt):])
+
+        view = memoryview(self.data)
+        self._views.append(view)
+
+        return view[section.offset:section.offset + section.size]
+
+
+class ElfSymbolSniffer:
+    """Reads ELF dynamic symbols table to sniff a library for exported functions.
+
+    Pure Python alternative to ``NmSymbolSniffer`` (does not require ``nm``).
+
+    If the library has debugging information (DWARF), functions signatures
+    and structures used by them are deduced.
+
+    """
+    STB_GLOBAL = 1
+    STT_FUNC = 2
+    SHN_UNDEF = 0
+
+    def __init__(self, libpath: Union[str, Path], *, debug: bool = True):
+        """
+
+        :param libpath: Library path to sniff for symbols.
+
+        :param debug: Whether to use debugging information (if any)
+            to deduce functions signatures.
+
+        """
+        self.libpath = str(libpath)
+        self.debug = debug
+
+    def _get_symbols(self, elf: ElfFile) -> Iterator[SniffedSymbol]:
+
+        dynsym = elf.get_section('.dynsym')
+        strings_offset = elf.headers[dynsym.link].offset
+
+        if elf.is64:
+            fmt = f'{elf.byteorder}IBBHQQ'
+            address_fmt = '016x'
+
+        else:
+            fmt = f'{elf.byteorder}IIIBBH'
+            address_fmt = '08x'
+
+        unpack = struct.Struct(fmt).unpack_from
+        entsize = dynsym.entsize or struct.calcsize(fmt)
+        is64 = elf.is64
+        data = elf.data
+        get_string = elf.get_string
+
+        for offset in range(dynsym.offset, dynsym.offset + dynsym.size, entsize):
+
+            if is64:
+                name, info, _, shndx, address, _ = unpack(data, offset)
+
+            else:
+                name, address, _, info, _, shndx = unpack(data, offset)
+
+            if info >> 4 != self.STB_GLOBAL or info & 0xf != self.STT_FUNC or shndx == self.SHN_UNDEF:
+                continue
+
+            if data[strings_offset + name] == 0x5f:  # Starts with '_'.
+                continue
+
+            yield SniffedSymbol(
+                name=get_string(strings_offset + name),
+                address=format(address, address_fmt),
+                line='',
+            )
+
+    def sniff(self) -> SniffResult:
+        """Runs symbols sniffing for library."""
+
+        result = SniffResult(libpath=self.libpath)
+
+        with ElfFile(self.libpath) as elf:
+
+            symbols = self._get_symbols(elf)
+
+            if self.debug:
+                reader = DwarfReader(elf)
+
+                if reader.available:
+                    symbols = list(symbols)
+                    signatures = dict(reader.get_signatures({symbol.name for symbol in symbols}))
+                    lines = reader.lines
+                    symbols = (
+                        symbol._replace(signature=signatures.get(symbol.name), line=lines.get(symbol.name, ''))
+                        for symbol in symbols)
+                    result.structures.update(reader.structures)
+
+            for symbol in symbols:
+                result.add_symbol(symbol)
+
+            # Release sections views before unmapping.
+            reader = None
+
+        return result
@@ -1,3 +1,5 @@
+from .arena import Arena
+from .callbacks import CallbackPool
 from .library import Library
-from .types import CObject, CRef
+from .types import CObject, CRef, CRefPool
 from .utils import get_last_error, c_callback
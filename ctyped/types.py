@@ -1,9 +1,25 @@
 import ctypes
-from typing import Any, Optional, Union
+import mmap
+import os
+import struct
+import sys
+from collections import namedtuple
+from functools import lru_cache
+from itertools import chain, starmap
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union, Type, Iterable, Mapping
+
+from .exceptions import CtypedException, UnsupportedTypeError
 
 
 class CastedTypeBase:
 
+    __slots__ = ()
+
+    _ct_native: Any = ctypes.c_void_p
+    """Native type to convert values produced by ``_ct_inline()`` expression
+    when passing those to foreign functions from fast call trampolines."""
+
     @classmethod
     def _ct_prep(cls, val: Any) -> Union[bytes, int]:
         # Prepare value. Used for structure fields.
@@ -19,6 +35,19 @@ class CastedTypeBase:
         # Function parameter caster.
         return val
 
+    @classmethod
+    def _ct_bind(cls):
+        # Function parameter type check on types binding.
+        # TypeError is expected for unsupported declarations.
+        pass
+
+    @classmethod
+    def _ct_inline(cls, argname: str, converter: str) -> Optional[str]:
+        # Function parameter caster source code to inline into fast call trampolines.
+        # Expression may use `converter` (bound `from_param()`) and `_ct_byref` (ctypes.byref).
+        # None means `from_param()` is called instead.
+        return None
+
 
 # getattr to cheat type hints
 CShort: int = getattr(ctypes, 'c_short')
@@ -39,13 +68,158 @@ CInt32U: int = getattr(ctypes, 'c_uint32')
 CInt64: int = getattr(ctypes, 'c_int64')
 CInt64U: int = getattr(ctypes, 'c_uint64')
 
+CFloat: float = getattr(ctypes, 'c_float')
+CDouble: float = getattr(ctypes, 'c_double')
+
 CPointer: Any = getattr(ctypes, 'c_void_p')
 CObject = CPointer  # Mere alias for those who prefer ``class My(CObject): ...`` better.
 
 
+def _map_file(path: Union[str, Path], typecls: Any, *, count: Optional[int], offset: int, writable: bool) -> Any:
+    # Returns an array of typecls over a memory mapped file.
+
+    size = ctypes.sizeof(typecls)
+
+    with open(path, 'r+b' if writable else 'rb') as f:
+        file_size = os.fstat(f.fileno()).st_size
+
+        if not file_size:
+            raise CtypedException(f'Unable to map empty file: {path}')
+
+        if not 0 <= offset <= file_size:
+            raise CtypedException(f'Offset {offset} is out of file bounds ({file_size} bytes): {path}')
+
+        if count is None:
+            count = (file_size - offset) // size
+
+        elif offset + count * size > file_size:
+            raise CtypedException(
+                f'File is too small for {count} items of {size} bytes at offset {offset} '
+                f'({file_size} bytes): {path}')
+
+        # Private mapping (copy-on-write) is used for read mode since ctypes can't share read-only buffers.
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_COPY)
+
+    # Array keeps the mapping alive.
+    return (typecls * count).from_buffer(mapped, offset)
+
+
+def _import_numpy() -> Any:
+
+    try:
+        import numpy
+
+    except ImportError:  # pragma: nocover
+        raise CtypedException('NumPy is required. Install `numpy` package.')
+
+    return numpy
+
+
+def _numpy_format(numpy: Any, fieldtype: Any, order: str = '=') -> Any:
+    # Returns NumPy format for a structure field type.
+
+    if issubclass(fieldtype, CStruct):
+        return fieldtype.numpy_dtype()
+
+    if issubclass(fieldtype, (ctypes._Pointer, ctypes.c_char_p, ctypes.c_wchar_p, ctypes.c_void_p)):
+        return numpy.uintp
+
+    if issubclass(fieldtype, ctypes.Array):
+
+        if fieldtype._type_ is ctypes.c_char:
+            return numpy.dtype(f'S{fieldtype._length_}')
+
+        return _numpy_format(numpy, fieldtype._type_, order), fieldtype._length_
+
+    if issubclass(fieldtype, ctypes.Structure):
+        return numpy.dtype(fieldtype)
+
+    return numpy.dtype(fieldtype._type_).newbyteorder(order)
+
+
+@lru_cache(maxsize=None)
+def _get_packer(cls: Type['CStruct']) -> Optional[struct.Struct]:
+    # Returns a packer for structures having only numeric fields.
+
+    fmt = [cls._ct_order]
+    pos = 0
+
+    for name, fieldtype, *bits in cls._fields_:
+        code = getattr(fieldtype, '_type_', None)
+
+        if bits or not isinstance(code, str) or code not in _PACKABLE_CODES:
+            return None
+
+        # Standard sizes are used, e.g. to pack 8 byte longs as long longs.
+        code = _SIZED_CODES.get((code, ctypes.sizeof(fieldtype)), code)
+
+        offset = getattr(cls, name).offset
+        fmt.append(f'{offset - pos}x{code}')
+        pos = offset + ctypes.sizeof(fieldtype)
+
+    fmt.append(f'{ctypes.sizeof(cls) - pos}x')
+
+    return struct.Struct(''.join(fmt))
+
+
+_PACKABLE_CODES = set('bBhHiIlLqQfd?')
+
+_SIZED_CODES = {('l', 8): 'q', ('L', 8): 'Q'}
+
+_POINTER_TYPES = (ctypes._Pointer, ctypes._CFuncPtr, ctypes.c_char_p, ctypes.c_wchar_p, ctypes.c_void_p)
+
+
+def _get_pointer_fields(typecls: Any, prefix: str = '') -> List[str]:
+    # Returns names of fields holding pointers (including those of nested structures and arrays).
+    names = []
+
+    for name, fieldtype, *_ in getattr(typecls, '_fields_', ()):
+        name = f'{prefix}{name}'
+
+        while issubclass(fieldtype, ctypes.Array):
+            fieldtype = fieldtype._type_
+
+        if issubclass(fieldtype, _POINTER_TYPES):
+            names.append(name)
+
+        elif issubclass(fieldtype, ctypes.Structure):
+            names.extend(_get_pointer_fields(fieldtype, f'{name}.'))
+
+    return names
+
+
+@lru_cache(maxsize=None)
+def _check_copyable(cls: Type['CStruct']) -> int:
+    # Checks structure is safe to copy as bytes. Returns its size.
+    pointers = _get_pointer_fields(cls)
+
+    if pointers:
+        raise UnsupportedTypeError(
+            f'Structure {cls.__name__} has pointer fields ({", ".join(pointers)}), '
+            'which are not valid outside of the process.')
+
+    return ctypes.sizeof(cls)
+
+
+FieldLayout = namedtuple('FieldLayout', ['name', 'offset', 'size', 'padding'])
+"""Structure field layout (see ``CStruct.layout()``). Sizes are in bytes.
+
+* name - field name
+* offset - field offset in the structure
+* size - field size
+* padding - unused bytes following the field (before the next field or the structure end)
+
+"""
+
+
 class CStruct(CastedTypeBase, ctypes.Structure):
     """Helper to represent a structure using native byte order."""
 
+    _ct_order = '='
+    """Byte order in terms of ``struct`` module."""
+
+    _ct_native = ctypes.Structure
+
     @classmethod
     def _ct_prep(cls, val):
         return ctypes.pointer(val)
@@ -60,51 +234,309 @@ class CStruct(CastedTypeBase, ctypes.Structure):
         # Substructure handling.
         return cobj.contents
 
-    def __setattr__(self, key, value):
-        # Allows structure field value casting on assignments.
+    @classmethod
+    def _ct_inline(cls, argname: str, converter: str) -> Optional[str]:
+        # Structures are passed by value as is.
+        return argname
 
-        casted = self._ct_fields.get(key)
+    @classmethod
+    def array(cls, size: int) -> ctypes.Array:
+        """Alternative constructor. Creates a zero-filled array of structures.
 
-        if casted:
-            value = casted._ct_prep(value)
+        :param size: Number of structures in the array.
 
-        super().__setattr__(key, value)
+        """
+        return (cls * size)()
 
-    def __getattribute__(self, key):
-        # Allows customizes structure members types handling.
+    @classmethod
+    def from_records(cls, records: Iterable[Union['CStruct', tuple, Mapping]]) -> ctypes.Array:
+        """Alternative constructor. Creates an array of structures from records.
 
-        get = super().__getattribute__
+        .. code-block:: python
 
-        value = get(key)
+            points = Point.from_records([(1, 2), {'x': 3, 'y': 4}, Point(x=5, y=6)])
 
-        casted = get('_ct_fields').get(key)
+        :param records: Structures, tuples of field values or field values dictionaries.
 
-        if casted:
-            return casted._ct_res(value)
+        """
+        records = list(records)
+        packer = _get_packer(cls)
 
-        return value
+        if packer and all(record.__class__ is tuple for record in records):
+            # Fast path: pack all the values at once.
+            try:
+                return (cls * len(records)).from_buffer_copy(b''.join(starmap(packer.pack, records)))
+
+            except struct.error:
+                # Let ctypes deal with values out of range.
+                pass
+
+        records = [cls(**record) if isinstance(record, Mapping) else record for record in records]
+
+        return (cls * len(records))(*records)
+
+    @classmethod
+    def from_bytes(cls, data: Any, offset: int = 0) -> 'CStruct':
+        """Alternative constructor. Creates a structure from a copy of its bytes
+        (see ``.to_bytes()``).
+
+        :param data: Bytes or any other buffer.
+
+        :param offset: Offset (bytes) of the structure in the buffer.
+
+        """
+        _check_copyable(cls)
+        return cls.from_buffer_copy(data, offset)
+
+    @classmethod
+    def iter_unpack(cls, data: Any, *, batch: int = 1024) -> Iterator['CStruct']:
+        """Iterates structures copied from a buffer holding structures one after another
+        (as ``struct.iter_unpack()`` does).
+
+        .. code-block:: python
+
+            for point in Point.iter_unpack(sock.recv(ctypes.sizeof(Point) * 100)):
+                ...
+
+        :param data: Bytes or any other buffer. Size must be a multiple of structure size.
+
+        :param batch: Number of structures to copy at once.
+
+        """
+        size = _check_copyable(cls)
+        view = memoryview(data).cast('B')
+        count, rest = divmod(view.nbytes, size)
+
+        if rest:
+            raise ValueError(f'Buffer size {view.nbytes} is not a multiple of {cls.__name__} size {size}')
+
+        return chain.from_iterable(
+            (cls * min(batch, count - start)).from_buffer_copy(view, start * size)
+            for start in range(0, count, batch))
+
+    def to_bytes(self) -> bytes:
+        """Returns a copy of the structure bytes (native layout, honours ``pack``).
+
+        Structures having pointer fields (strings, substructures, etc.) are not supported,
+        since pointers are not valid outside of the process.
+
+        """
+        _check_copyable(self.__class__)
+        return bytes(self)
+
+    @classmethod
+    def layout(cls) -> List[FieldLayout]:
+        """Returns fields layout: offsets, sizes and padding.
+
+        .. code-block:: python
+
+            for field in Header.layout():
+                print(f'{field.name}: {field.offset} +{field.size} (padding {field.padding})')
+
+        """
+        fields = [getattr(cls, name) for name, *_ in cls._fields_]
+        ends = [field.offset for field in fields[1:]] + [ctypes.sizeof(cls)]
+        layout = []
+
+        for (name, fieldtype, *_), field, end in zip(cls._fields_, fields, ends):
+            size = ctypes.sizeof(fieldtype)
+            # Bit fields share storage, hence no negative padding.
+            layout.append(FieldLayout(name, field.offset, size, max(0, end - field.offset - size)))
+
+        return layout
+
+    @classmethod
+    def numpy_dtype(cls) -> Any:
+        """Returns NumPy structured dtype describing the structure layout
+        (honours fields offsets, thus ``pack``).
+
+        Pointer fields are represented by ``uintp`` (pointer-sized unsigned int).
+
+        .. note:: Requires NumPy.
+
+        """
+        numpy = _import_numpy()
+
+        names = []
+        formats = []
+        offsets = []
+
+        for name, fieldtype, *bits in cls._fields_:
+
+            if bits:
+                raise UnsupportedTypeError(f'Bit field {cls.__name__}.{name} is not supported by NumPy.')
+
+            names.append(name)
+            formats.append(_numpy_format(numpy, fieldtype, cls._ct_order))
+            offsets.append(getattr(cls, name).offset)
+
+        return numpy.dtype({
+            'names': names,
+            'formats': formats,
+            'offsets': offsets,
+            'itemsize': ctypes.sizeof(cls),
+        })
+
+    @classmethod
+    def as_numpy(cls, data: Any) -> Any:
+        """Returns NumPy structured array view of structures.
+        No copying is done: changes made through the view are seen by C and vice versa.
+
+        .. code-block:: python
+
+            points = Point.array(1000)
+            view = Point.as_numpy(points)
+            view['x'] = numpy.arange(1000)
+
+        .. note:: Requires NumPy.
+
+        :param data: Array of structures (see ``.array()``, ``.from_records()``),
+            a structure or any other buffer holding structures.
+
+        """
+        return _import_numpy().frombuffer(data, dtype=cls.numpy_dtype())
+
+    @classmethod
+    def mmap(
+            cls, path: Union[str, Path], *,
+            count: Optional[int] = None,
+            offset: int = 0,
+            writable: bool = False
+    ) -> ctypes.Array:
+        """Alternative constructor. Maps a file holding structures into memory
+        and returns an array of structures over it.
+
+        File data is not read until accessed, so arbitrary large files
+        may be handled with constant resident memory.
+
+        .. code-block:: python
+
+            points = Point.mmap('points.bin')
+            points[100].x  # Access a structure.
+            sum_points(CRef(points), len(points))  # Pass the mapping to C.
+
+        :param path: File path.
+
+        :param count: Number of structures to map. Default: as many as the file holds.
+
+        :param offset: Offset (bytes) in the file to map structures from.
+
+        :param writable: Whether changes should be written to the file.
+            Otherwise changes are private to the process.
+
+        """
+        return _map_file(path, cls, count=count, offset=offset, writable=writable)
+
+
+class CStructBE(CStruct, ctypes.BigEndianStructure):
+    """Helper to represent a structure using big-endian byte order.
+
+    Only numeric fields (and arrays and structures of the same byte order) are supported.
+
+    """
+    _ct_order = '>'
+
+
+class CStructLE(CStruct, ctypes.LittleEndianStructure):
+    """Helper to represent a structure using little-endian byte order.
+
+    Only numeric fields (and arrays and structures of the same byte order) are supported.
+
+    """
+    _ct_order = '<'
+
+
+class CastedField:
+    """Structure field descriptor casting values on access.
+
+    Wraps native ctypes field, so that only fields
+    requiring casting (strings, pointers) pay for it.
+
+    """
+    __slots__ = ('field', 'casted', '_res', '_prep')
+
+    def __init__(self, field: Any, casted: Any):
+        """
+
+        :param field: Native ctypes field descriptor.
+
+        :param casted: Type (``CastedTypeBase`` subclass) to cast values with.
+
+        """
+        self.field = field
+        self.casted = casted
+        self._res = casted._ct_res
+        self._prep = casted._ct_prep
+
+    def __get__(self, instance, owner):
+
+        if instance is None:
+            # Class access. Expose native field (offset, size).
+            return self.field
+
+        return self._res(self.field.__get__(instance, owner))
+
+    def __set__(self, instance, value):
+        self.field.__set__(instance, self._prep(value))
+
+
+_ELEMENT_SHORTCUTS = {
+
+    int: ctypes.c_int,
+    str: ctypes.c_char,
+    bool: ctypes.c_bool,
+    float: ctypes.c_float,
+
+}
 
 
 class CRef(CastedTypeBase):
-    """Reference helper."""
+    """Reference helper.
+
+    To reuse references (e.g. for output parameters in loops) see ``CRefPool``.
+
+    """
+    __slots__ = ('_ct_val',)
+
+    _ct_ref: Any = None
+    """Reference passed on calls. Only pooled references keep one (see ``CRefPool``),
+    others build it on every call."""
 
     @classmethod
     def carray(cls, typecls: Any, *, size: int = 1) -> 'CRef':
         """Alternative constructor. Creates a reference to array."""
 
-        typecls = {
-
-            int: ctypes.c_int,
-            str: ctypes.c_char,
-            bool: ctypes.c_bool,
-            float: ctypes.c_float,
-
-        }.get(typecls, typecls)
+        typecls = _ELEMENT_SHORTCUTS.get(typecls, typecls)
 
         val = (typecls * (size or 1))()
 
         return cls(val)
 
+    @classmethod
+    def mmap(
+            cls, path: Union[str, Path], typecls: Any, *,
+            count: Optional[int] = None,
+            offset: int = 0,
+            writable: bool = False
+    ) -> 'CRef':
+        """Alternative constructor. Creates a reference to array of ``typecls``
+        over a file mapped into memory (see ``CStruct.mmap()`` for details).
+
+        :param path: File path.
+
+        :param typecls: Array element type.
+
+        :param count: Number of elements to map. Default: as many as the file holds.
+
+        :param offset: Offset (bytes) in the file to map elements from.
+
+        :param writable: Whether changes should be written to the file.
+            Otherwise changes are private to the process.
+
+        """
+        typecls = _ELEMENT_SHORTCUTS.get(typecls, typecls)
+        return cls(_map_file(path, typecls, count=count, offset=offset, writable=writable))
+
     @classmethod
     def cbool(cls, value: bool = False) -> 'CRef':
         """Alternative constructor. Creates a reference to boolean."""
@@ -122,7 +554,11 @@ class CRef(CastedTypeBase):
 
     @classmethod
     def from_param(cls, obj: 'CRef'):
-        return ctypes.byref(obj._ct_val)
+        return obj._ct_ref or ctypes.byref(obj._ct_val)
+
+    @classmethod
+    def _ct_inline(cls, argname: str, converter: str) -> Optional[str]:
+        return f'({argname}._ct_ref or _ct_byref({argname}._ct_val))'
 
     def __init__(self, cval: Any):
         self._ct_val = cval
@@ -167,12 +603,470 @@ class CRef(CastedTypeBase):
         return self._ct_val.value >= other
 
 
+class _CRefPooled(CRef):
+    # Pooled references are passed on many calls, so those keep reference built once.
+
+    __slots__ = ('_ct_ref',)
+
+    def __init__(self, cval: Any):
+        super().__init__(cval)
+        self._ct_ref = ctypes.byref(cval)
+
+
+class CRefPool:
+    """Pool of reusable references (see ``CRef``), e.g. for output parameters in loops.
+
+    References (along with underlying C values) are allocated on first requests
+    and handed out again after ``.reset()`` (or on exiting a ``with`` block),
+    with their values reinitialized.
+
+    .. code-block:: python
+
+        refs = CRefPool()
+
+        for item in items:
+
+            with refs:
+                count = refs.cint()
+                get_count(item, count)
+                ...
+
+    .. warning:: References must not be used after reset.
+
+    """
+    __slots__ = ('_slots', '_used')
+
+    def __init__(self):
+        self._slots: Dict[Any, List[CRef]] = {}
+        self._used: Dict[Any, int] = {}
+
+    def __enter__(self) -> 'CRefPool':
+        return self
+
+    def __exit__(self, *args):
+        self.reset()
+
+    def _get(self, key: Any, factory: Any) -> CRef:
+        used = self._used.get(key, 0)
+        slots = self._slots.get(key)
+
+        if slots is None:
+            slots = self._slots[key] = []
+
+        if used == len(slots):
+            slots.append(_CRefPooled(factory()))
+
+        self._used[key] = used + 1
+
+        return slots[used]
+
+    def reset(self):
+        """Makes all references available for reuse."""
+        self._used.clear()
+
+    def clear(self):
+        """Releases all references."""
+        self._used.clear()
+        self._slots.clear()
+
+    def scalar(self, typecls: Any, value: Any = 0) -> CRef:
+        """Returns a reference to a scalar.
+
+        :param typecls: Scalar type (ctypes or shortcut: bool, float, int).
+
+        :param value: Initial value.
+
+        """
+        typecls = _ELEMENT_SHORTCUTS.get(typecls, typecls)
+        ref = self._get(typecls, typecls)
+        ref._ct_val.value = value
+        return ref
+
+    def carray(self, typecls: Any, *, size: int = 1) -> CRef:
+        """Returns a reference to a zeroed array (see ``CRef.carray()``).
+
+        :param typecls: Array element type.
+
+        :param size: Number of elements.
+
+        """
+        typecls = _ELEMENT_SHORTCUTS.get(typecls, typecls)
+        arrcls = typecls * (size or 1)
+        ref = self._get(arrcls, arrcls)
+        ctypes.memset(ref._ct_val, 0, ctypes.sizeof(arrcls))
+        return ref
+
+    def cbool(self, value: bool = False) -> CRef:
+        """Returns a reference to boolean."""
+        return self.scalar(ctypes.c_bool, value)
+
+    def cint(self, value: int = 0) -> CRef:
+        """Returns a reference to integer."""
+        return self.scalar(ctypes.c_int, value)
+
+    def cfloat(self, value: float = 0.0) -> CRef:
+        """Returns a reference to float."""
+        return self.scalar(ctypes.c_float, value)
+
+
+def _buffer_param(val: Any, fallback: Any) -> Any:
+    # Passes bytes-like objects as pointers without copying.
+
+    if isinstance(val, memoryview) and val.readonly:
+        obj = val.obj
+
+        if isinstance(obj, bytes) and val.nbytes == len(obj) and val.c_contiguous:
+            # Whole bytes object view.
+            return obj
+
+        # Read-only buffers can't be shared with ctypes.
+        return val.tobytes()
+
+    if isinstance(val, (bytearray, memoryview)):
+        # Writable buffers are shared with an array (that decays into a pointer).
+        size = val.nbytes if isinstance(val, memoryview) else len(val)
+        return (ctypes.c_char * size).from_buffer(val)
+
+    return fallback.from_param(val)
+
+
+class _PyBuffer(ctypes.Structure):
+    # Py_buffer from Python C API.
+
+    _fields_ = [
+        ('buf', ctypes.c_void_p),
+        ('obj', ctypes.c_void_p),
+        ('len', ctypes.c_ssize_t),
+        ('itemsize', ctypes.c_ssize_t),
+        ('readonly', ctypes.c_int),
+        ('ndim', ctypes.c_int),
+        ('format', ctypes.c_char_p),
+        ('shape', ctypes.c_void_p),
+        ('strides', ctypes.c_void_p),
+        ('suboffsets', ctypes.c_void_p),
+        ('internal', ctypes.c_void_p),
+    ]
+
+
+class _ReadonlyBuffer:
+    # Holds read-only buffer exported by an object, exposing buffer address.
+    # ctypes can't share read-only buffers, so Python C API is used.
+
+    __slots__ = ('_view', '_as_parameter_')
+
+    def __init__(self, obj: Any):
+        view = _PyBuffer()
+
+        if ctypes.pythonapi.PyObject_GetBuffer(ctypes.py_object(obj), ctypes.byref(view), 0):  # pragma: nocover
+            raise TypeError(f'Unable to get buffer of {type(obj).__name__}')
+
+        self._view = view
+        self._as_parameter_ = ctypes.c_void_p(view.buf)
+
+    def __del__(self):
+        ctypes.pythonapi.PyBuffer_Release(ctypes.byref(self._view))
+
+
+_FORMAT_KINDS = {
+    **{code: 'i' for code in 'bhilqn'},
+    **{code: 'u' for code in 'BHILQN'},
+    **{code: 'f' for code in 'efd'},
+    '?': 'b',
+}
+
+_FORMAT_NATIVE = {'@', '=', '<' if sys.byteorder == 'little' else '>'}
+
+
+class _Subscriptable(type):
+    # Python 3.6 has no __class_getitem__ support: subscription goes through metaclass.
+
+    def __getitem__(cls, params: Any) -> Any:
+        return cls.__class_getitem__(params)
+
+
+class CBuffer(CastedTypeBase, metaclass=_Subscriptable):
+    """Passes objects supporting buffer protocol (``bytes``, ``bytearray``,
+    ``array.array``, ``mmap``, NumPy arrays, ctypes arrays, etc.)
+    as pointers to their data without copying.
+
+    Element type may be declared to check buffers against:
+
+    .. code-block:: python
+
+        @lib.function
+        def sum_ints(values: CBuffer[CInt32], count: int) -> int:
+            ...
+
+        lib.bind_types()
+
+        sum_ints(array.array('i', [1, 2, 3]), 3)
+        sum_ints(numpy.arange(3, dtype=numpy.int32), 3)
+
+    Buffers are checked to be C-contiguous and, if element type is declared,
+    to have compatible items (kind, size and byte order). Plain byte buffers
+    (e.g. ``bytearray``) are accepted for any element type if their size is a multiple
+    of the element size.
+
+    Shortcuts for element types: ``int`` (``c_int``), ``float`` (``c_float``),
+    ``bool`` (``c_bool``), ``str`` (``c_char``).
+
+    """
+    _ct_type: Any = None
+    """Element type. None - any."""
+
+    @classmethod
+    def __class_getitem__(cls, typecls: Any) -> Type['CBuffer']:
+        return _get_buffer_type(cls, _ELEMENT_SHORTCUTS.get(typecls, typecls))
+
+    @classmethod
+    def _ct_bind(cls):
+
+        typecls = cls._ct_type
+
+        if typecls is None:
+            return
+
+        if not (isinstance(typecls, type) and issubclass(typecls, (ctypes._SimpleCData, ctypes.Structure))):
+            raise TypeError(f'Unsupported buffer element type: {typecls}')
+
+    @classmethod
+    def _ct_check(cls, view: memoryview):
+        # Checks buffer items against element type.
+        typecls = cls._ct_type
+        size = ctypes.sizeof(typecls)
+        fmt = view.format
+
+        if fmt in {'B', 'b', 'c'} and view.nbytes % size == 0:
+            # Raw bytes.
+            return
+
+        if view.itemsize != size:
+            raise TypeError(f'Buffer item size {view.itemsize} mismatch element size {size}')
+
+        if issubclass(typecls, ctypes.Structure):
+            return
+
+        if fmt[0] in '@=<>!':
+            order, fmt = fmt[0], fmt[1:]
+
+            if size > 1 and order not in _FORMAT_NATIVE:
+                raise TypeError(f'Buffer byte order {order} is not native')
+
+        kind = _FORMAT_KINDS.get(fmt)
+        kind_expected = _FORMAT_KINDS.get(typecls._type_)
+
+        if kind is None or kind != kind_expected:
+            raise TypeError(f"Buffer format '{view.format}' mismatch element type {typecls.__name__}")
+
+    @classmethod
+    def from_param(cls, val: Any):
+
+        if val is None or val.__class__ is bytes and cls._ct_type is None:
+            return val
+
+        view = val if isinstance(val, memoryview) else memoryview(val)
+
+        if not view.c_contiguous:
+            raise TypeError('Buffer is not C-contiguous')
+
+        if cls._ct_type is not None:
+            cls._ct_check(view)
+
+        if view.readonly:
+            if val.__class__ is bytes:
+                return val
+            return _ReadonlyBuffer(view)
+
+        return (ctypes.c_char * view.nbytes).from_buffer(view)
+
+
+@lru_cache(maxsize=None)
+def _get_buffer_type(cls: Type[CBuffer], typecls: Any) -> Type[CBuffer]:
+    name = getattr(typecls, '__name__', str(typecls))
+    return type(f'{cls.__name__}[{name}]', (cls,), {'_ct_type': typecls})
+
+
+class CArray(CastedTypeBase, metaclass=_Subscriptable):
+    """Fixed-size array for structures fields (e.g. ``char name[32]``, ``double values[16]``).
+
+    .. code-block:: python
+
+        @lib.structure()
+        class Sample:
+
+            name: CArray[str, 32]
+            values: CArray[CDouble, 16]
+
+        sample = Sample(name='first', values=[1.5, 2.5])
+        sample.name  # 'first'
+        numpy.asarray(sample.values)  # NumPy view of structure memory.
+
+    Arrays of numbers are exposed as memoryviews over structure memory (no copying),
+    char arrays (``str`` element type) as strings, others (e.g. arrays of structures,
+    arrays of non-native byte order) as ctypes arrays.
+
+    Values may be set from sequences, buffers (e.g. NumPy arrays) and strings (for char arrays).
+
+    Element type follows structure options (e.g. ``int_bits``) for ``int``.
+
+    """
+    _ct_type: Any = None
+    """Element type hint."""
+
+    _ct_size: int = 0
+    """Number of elements."""
+
+    _ct_array: Any = None
+    """ctypes array type (set for structure fields)."""
+
+    @classmethod
+    def __class_getitem__(cls, params: Tuple[Any, int]) -> Type['CArray']:
+        typecls, size = params
+        return _get_array_type(cls, typecls, size)
+
+    @classmethod
+    def _ct_bind_element(cls, typecls: Any) -> Type['CArray']:
+        # Returns array type for a structure field, given ctypes element type.
+        return cls._ct_bind_array(typecls * cls._ct_size)
+
+    @classmethod
+    def _ct_bind_array(cls, arraytype: Any) -> Type['CArray']:
+        # Returns array type for a structure field, given ctypes array type
+        # (e.g. byte swapped one for structures of non-native byte order).
+        return _get_array_type(CArray, cls._ct_type, cls._ct_size, arraytype)
+
+    @classmethod
+    def _ct_prep(cls, val: Any) -> Any:
+        arraytype = cls._ct_array
+
+        if isinstance(val, arraytype):
+            return val
+
+        if arraytype._type_ is ctypes.c_char:
+            # Char arrays are set natively from bytes.
+            if isinstance(val, str):
+                return val.encode('utf-8')
+
+            if isinstance(val, bytes):
+                return val
+
+        if val.__class__ in (list, tuple):
+            return arraytype(*val)
+
+        try:
+            view = memoryview(val)
+
+        except TypeError:
+            view = None
+
+        if view is not None and view.nbytes == ctypes.sizeof(arraytype) and view.c_contiguous and (
+            # Typed items are copied as is only into arrays of native byte order.
+            view.format in {'B', 'b', 'c'} or _get_array_code(arraytype) is not None or
+            issubclass(arraytype._type_, ctypes.Structure)
+        ):
+            try:
+                _get_buffer_type(CBuffer, arraytype._type_)._ct_check(view)
+                return arraytype.from_buffer_copy(view)
+
+            except TypeError:
+                # Items are to be converted one by one.
+                pass
+
+        return arraytype(*val)
+
+    @classmethod
+    def _ct_res(cls, cobj: Any, *args, **kwargs) -> Any:
+
+        if cobj.__class__ is bytes:
+            # Char arrays are got natively as bytes.
+            return cobj.decode('utf-8')
+
+        code = _get_array_code(cobj.__class__)
+
+        if code is None:
+            return cobj
+
+        return memoryview(cobj).cast('B').cast(code)
+
+
+@lru_cache(maxsize=None)
+def _get_array_type(cls: Type[CArray], typecls: Any, size: int, arraytype: Any = None) -> Type[CArray]:
+    name = getattr(typecls, '__name__', str(typecls))
+    return type(f'{cls.__name__}[{name}, {size}]', (cls,), {
+        '_ct_type': typecls, '_ct_size': size, '_ct_array': arraytype})
+
+
+@lru_cache(maxsize=None)
+def _get_array_code(arraytype: Any) -> Optional[str]:
+    # Returns memoryview format for arrays of numbers of native byte order. None for others.
+    code = getattr(arraytype._type_, '_type_', None)
+
+    if not isinstance(code, str) or code not in _PACKABLE_CODES:
+        return None
+
+    fmt = memoryview(arraytype()).format
+
+    if ctypes.sizeof(arraytype._type_) > 1 and fmt[0] in '<>!' and fmt[0] not in _FORMAT_NATIVE:
+        return None
+
+    return code
+
+
 class CChars(CastedTypeBase, ctypes.c_char_p):
-    """Represents a Python string as a C chars pointer."""
+    """Represents a Python string as a C chars pointer.
+
+    Besides ``str`` accepts ``bytes``, ``bytearray`` and ``memoryview``,
+    passing them to C without copying.
+
+    .. note:: Writable ``memoryview`` data is expected to be null-terminated.
+        Read-only views (except those of whole ``bytes`` objects) are copied.
+
+    """
+    @classmethod
+    def cached(cls, maxsize: int = 128) -> Type['CChars']:
+        """Alternative type for strings. Caches encoded values of ``maxsize``
+        most recently used strings, saving encoding on each call for
+        frequently passed strings (keys, identifiers, etc.).
+
+        .. code-block:: python
+
+            lib = Library('mylib', str_type=CChars.cached(256))
+
+        .. warning:: Cached values are shared between calls, so only use it
+            for strings C functions do not modify (``const char *``).
+
+        :param maxsize: Maximum number of strings to cache.
+
+        """
+        encode = lru_cache(maxsize=maxsize)(str.encode)
+
+        class CCharsCached(cls):  # type: ignore
+
+            _ct_cache = encode
+
+            @classmethod
+            def _ct_prep(cls_, val):
+                if isinstance(val, str):
+                    return encode(val)
+                return val
+
+            @classmethod
+            def from_param(cls_, val):
+                if val.__class__ is str:
+                    return encode(val)
+                return super().from_param(val)
+
+            @classmethod
+            def _ct_inline(cls_, argname: str, converter: str) -> Optional[str]:
+                return None
+
+        return CCharsCached
 
     @classmethod
     def _ct_prep(cls, val):
-        return val.encode('utf-8')
+        if isinstance(val, str):
+            return val.encode('utf-8')
+        return val
 
     @classmethod
     def _ct_res(cls, cobj: 'CChars', *args, **kwargs) -> Optional[str]:
@@ -184,17 +1078,161 @@ class CChars(CastedTypeBase, ctypes.c_char_p):
         return value.decode('utf-8')
 
     @classmethod
-    def from_param(cls, val: str):
-        return ctypes.c_char_p(val.encode('utf-8'))
+    def from_param(cls, val: Any):
+
+        if isinstance(val, str):
+            # Bytes are passed as char pointers natively.
+            return val.encode('utf-8')
+
+        if val is None or val.__class__ is bytes:
+            return val
+
+        return _buffer_param(val, ctypes.c_char_p)
+
+    @classmethod
+    def _ct_inline(cls, argname: str, converter: str) -> Optional[str]:
+        return f"({argname}.encode('utf-8') if {argname}.__class__ is str else {converter}({argname}))"
+
+
+@lru_cache(maxsize=None)
+def _get_strlen() -> Any:
+    # C strlen() to measure strings in place.
+
+    try:
+        libc = ctypes.CDLL(None)
+
+    except (OSError, TypeError):  # pragma: nocover
+        libc = ctypes.cdll.msvcrt
+
+    strlen = libc.strlen
+    strlen.argtypes = [ctypes.c_void_p]
+    strlen.restype = ctypes.c_size_t
+
+    return strlen
+
+
+class CCharsLazy(CChars):
+    """Represents a Python string as a C chars pointer.
+    Function results are not decoded into ``str`` until required.
+
+    Result object is a chars pointer itself, so it can be passed
+    to other functions as is without round trip through ``str``.
+
+    .. code-block:: python
+
+        lib = Library('mylib', str_type=CCharsLazy)
+
+        ...
+
+        result = get_name()
+        result.raw  # memoryview of chars, no copying
+        len(result)  # number of bytes
+        result.startswith('some')  # no decoding
+        str(result)  # decoded and cached
+        set_name(result)  # chars pointer is passed as is
+
+    """
+    @classmethod
+    def _ct_res(cls, cobj: 'CCharsLazy', *args, **kwargs) -> 'CCharsLazy':
+        return cobj
+
+    @property
+    def raw(self) -> memoryview:
+        """Chars as a memoryview. No copying is done.
+
+        .. warning:: View is valid as long as C memory for chars is.
+
+        """
+        chars = (ctypes.c_char * len(self)).from_address(self._ct_addr())
+        return memoryview(chars).cast('B')
+
+    def _ct_addr(self) -> int:
+        return ctypes.cast(self, ctypes.c_void_p).value or 0
+
+    def startswith(self, prefix: Union[str, bytes]) -> bool:
+        """Checks whether chars start with a prefix. No decoding is done."""
+
+        if isinstance(prefix, str):
+            prefix = prefix.encode('utf-8')
+
+        size = len(prefix)
+
+        return len(self) >= size and self.raw[:size] == prefix
+
+    def __len__(self):
+        size = self.__dict__.get('_ct_len')
+
+        if size is None:
+            addr = self._ct_addr()
+            size = _get_strlen()(addr) if addr else 0
+            self._ct_len = size
+
+        return size
+
+    def __str__(self):
+        value = self.__dict__.get('_ct_str')
+
+        if value is None:
+            value = self._ct_str = CChars._ct_res(self)
+
+        return value
+
+    def __bytes__(self):
+        return self.value or b''
+
+    def __bool__(self):
+        return bool(self._ct_addr()) and bool(len(self))
+
+    def __eq__(self, other):
+
+        if isinstance(other, bytes):
+            return self.raw == other
+
+        return str(self) == other
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def __format__(self, format_spec):
+        return format(str(self), format_spec)
+
+    def __getattr__(self, name):
+        # Allows calling str methods, e.g. `.upper()`.
+        return getattr(str(self), name)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({str(self)!r})'
 
 
 class CCharsW(CastedTypeBase, ctypes.c_wchar_p):
-    """Represents a Python string as a C wide chars pointer."""
+    """Represents a Python string as a C wide chars pointer.
+
+    Besides ``str`` accepts ``bytes``, ``bytearray`` and ``memoryview``,
+    passing them to C without copying.
+
+    .. note:: Bytes-like objects data is expected to be null-terminated
+        and encoded into platform ``wchar_t`` (e.g. ``utf-32-le``).
 
+    """
     @classmethod
     def _ct_res(cls, cobj: 'CCharsW', *args, **kwargs) -> Optional[str]:
         return cobj.value or ''
 
     @classmethod
-    def from_param(cls, val: str):
-        return ctypes.c_wchar_p(val)
+    def from_param(cls, val: Any):
+
+        if val is None or isinstance(val, str):
+            # Strings are passed as wide char pointers natively.
+            return val
+
+        if val.__class__ is bytes:
+            return val
+
+        return _buffer_param(val, ctypes.c_wchar_p)
+
+    @classmethod
+    def _ct_inline(cls, argname: str, converter: str) -> Optional[str]:
+        return f'({argname} if {argname}.__class__ is str else {converter}({argname}))'
@@ -1,14 +1,21 @@
+import builtins
 import inspect
+from array import array, typecodes
 from collections import namedtuple
-from ctypes import get_errno, CFUNCTYPE
+from ctypes import ArgumentError, get_errno, CFUNCTYPE
 from errno import errorcode
+from functools import lru_cache, partial, partialmethod, update_wrapper
 from os import strerror
-from typing import Callable
+from time import perf_counter
+from typing import Callable, Iterable, List, Tuple
 
-from .exceptions import TypehintError, FunctionRedeclared
+from .exceptions import CtypedException, TypehintError, FunctionRedeclared
+from .instrument import FuncStats
 from .types import *
+from .types import _import_numpy
 
-FuncInfo = namedtuple('FuncInfo', ['name_py', 'name_c', 'annotations', 'options'])
+FuncInfo = namedtuple('FuncInfo', ['name_py', 'name_c', 'annotations', 'options', 'namespace'])
+FuncInfo.__new__.__defaults__ = (None,)
 ErrorInfo = namedtuple('ErrorInfo', ['num', 'code', 'msg'])
 
 _MISSING = namedtuple('MissingType', [])
@@ -41,7 +48,51 @@ def extract_func_info(func: Callable, *, name_c: Optional[str], scope: dict, reg
 
     annotated_args['return'] = annotations.get('return')
 
-    return FuncInfo(name_py=name_py, name_c=name, annotations=annotated_args, options=scope)
+    return FuncInfo(
+        name_py=name_py, name_c=name, annotations=annotated_args, options=scope, namespace=func.__globals__)
+
+
+INT_TYPES = {
+    8: (CInt8, CInt8U),
+    16: (CInt16, CInt16U),
+    32: (CInt32, CInt32U),
+    64: (CInt64, CInt64U),
+}
+"""Int types by length: bits -> (signed, unsigned)."""
+
+MAP_INT_BOUNDS = {
+    ctype: (-(1 << (bits - 1)), (1 << (bits - 1)) - 1) if signed else (0, (1 << bits) - 1)
+    for bits, types in INT_TYPES.items() if bits <= ctypes.sizeof(ctypes.c_int) * 8
+    for signed, ctype in zip((True, False), types)
+}
+"""Int types no wider than C int: type -> (min, max). ``call_map()`` passes values
+in those bounds as C ints (ctypes conversion for arguments with no argtypes)."""
+
+
+def thint_resolve(thint: str, namespace: dict) -> Any:
+    """Returns an object for a string type hint or _MISSING if unresolved.
+
+    Hint is looked up in the namespace (globals of a module the hint is declared in)
+    and builtins. Expressions (e.g. ``CBuffer[CInt32]``) are evaluated in the namespace.
+
+    :param thint:
+
+    :param namespace:
+
+    """
+    if thint.isidentifier():
+        target = namespace.get(thint, _MISSING)
+
+        if target is _MISSING:
+            target = vars(builtins).get(thint, _MISSING)
+
+        return target
+
+    try:
+        return eval(thint, namespace)
+
+    except NameError:
+        return _MISSING
 
 
 def thint_str_to_obj(thint: str):
@@ -49,7 +100,14 @@ def thint_str_to_obj(thint: str):
     fback = getattr(inspect.currentframe(), 'f_back')
 
     while fback:
-        target = fback.f_globals.get(thint)
+        module = fback.f_globals.get('__name__') or ''
+
+        if module == 'ctyped' or module.startswith('ctyped.'):
+            # Own frames locals (e.g. `argname`) are not types declared by users.
+            fback = fback.f_back
+            continue
+
+        target = fback.f_locals.get(thint) or fback.f_globals.get(thint)
 
         if target:
             return target
@@ -57,19 +115,51 @@ def thint_str_to_obj(thint: str):
         fback = fback.f_back
 
 
-def cast_type(func_info, argname: str, thint: Any):
+def cast_type(func_info: FuncInfo, argname: str, thint: Any, *, hints: Optional[dict] = None):
+    """Returns ctypes type for a type hint.
 
+    :param func_info: Information of a function (structure) the hint is declared for.
+
+    :param argname: Argument (field) name.
+
+    :param thint: Type hint.
+
+    :param hints: Memoized string hints resolution table to use and fill.
+
+    """
     if thint is None:
         return None
 
     if isinstance(thint, str):
         thint_orig = thint
-        thint = thint_str_to_obj(thint)
+        namespace = func_info.namespace
+        target = _MISSING
+
+        if namespace is not None:
+            key = (namespace.get('__name__'), thint)
+
+            if hints is not None:
+                target = hints.get(key, _MISSING)
+
+            if target is _MISSING:
+                target = thint_resolve(thint, namespace)
+
+                if hints is not None and target is not _MISSING:
+                    hints[key] = target
+
+        if target is _MISSING:
+            # Fallback for types declared elsewhere (e.g. locally).
+            target = thint_str_to_obj(thint)
+
+            if target is None:
+                raise TypehintError(
+                    f'Unable to resolve type hint. '
+                    f'Function: {func_info.name_py}. Arg: {argname}. Type: {thint_orig}.')
+
+        thint = target
 
         if thint is None:
-            raise TypehintError(
-                f'Unable to resolve type hint. '
-                f'Function: {func_info.name_py}. Arg: {argname}. Type: {thint_orig}.')
+            return None
 
     if thint is bool:
         thint = ctypes.c_bool
@@ -84,27 +174,405 @@ def cast_type(func_info, argname: str, thint: Any):
         int_bits = func_info.options.get('int_bits')
         int_sign = func_info.options.get('int_sign', False)
 
-        thint_map = {
-            8: (CInt8, CInt8U),
-            16: (CInt16, CInt16U),
-            32: (CInt32, CInt32U),
-            64: (CInt64, CInt64U),
-
-        }
-
         if int_bits:
-            assert int_bits in thint_map.keys(), 'Wrong value passed for int_bits.'
+            assert int_bits in INT_TYPES, 'Wrong value passed for int_bits.'
 
         else:
             int_bits = 64  # todo maybe try to guess
 
         type_idx = 1 if int_sign is False else 0
 
-        thint = thint_map[int_bits][type_idx] or thint
+        thint = INT_TYPES[int_bits][type_idx] or thint
 
     return thint
 
 
+def fast_call_stub(func: Callable, func_info: FuncInfo) -> Callable:
+    """Returns a function with the same signature as the given one, to be
+    turned into a fast call trampoline by ``fast_call_bind()``.
+
+    Until then the function raises an exception on call.
+
+    :param func: Python function declared.
+
+    :param func_info: Function information.
+
+    """
+    name = func_info.name_py
+    args = ', '.join(argname for argname in func_info.annotations if argname != 'return')
+
+    namespace = {
+        '_ct_error': CtypedException,
+        '_ct_byref': ctypes.byref,
+        '_ct_msg': (
+            f'Function {name} ({func_info.name_c}) types are not bound. '
+            'Call .bind_types() before use.'),
+    }
+
+    exec(compile(f'def {name}({args}):\n    raise _ct_error(_ct_msg)\n', f'<ctyped {name}>', 'exec'), namespace)
+
+    stub = namespace[name]
+    stub.__module__ = func.__module__
+    stub.__qualname__ = func.__qualname__
+    stub.__doc__ = func.__doc__
+
+    return stub
+
+
+def lazy_call_stub(func: Callable, loader: Callable[[], Callable]) -> Callable:
+    """Returns a function wrapping the given one, which calls the loader
+    on the first call to get a function to pass calls to.
+
+    :param func: Python function declared.
+
+    :param loader: Callable returning a foreign function with types bound.
+
+    """
+    target = None
+
+    def stub(*args):
+        nonlocal target
+
+        if target is None:
+            target = loader()
+
+        return target(*args)
+
+    return update_wrapper(stub, func)
+
+
+def instrumented_call(func: Callable, func_c: Callable, stats: FuncStats) -> Callable:
+    """Returns a function wrapping the given foreign one, which registers
+    calls durations in statistics.
+
+    Arguments and result are converted by ctypes during the foreign function call,
+    so conversion time is not measured separately (see ``fast_call_bind()``).
+
+    :param func: Python function declared.
+
+    :param func_c: Foreign function to call.
+
+    :param stats: Statistics to register calls into.
+
+    """
+    clock = perf_counter
+    add = stats.add
+
+    def call(*args):
+        started = clock()
+
+        try:
+            return func_c(*args)
+
+        finally:
+            add(0.0, clock() - started)
+
+    return update_wrapper(call, func)
+
+
+def _argcount_error(expected: int, args: tuple) -> TypeError:
+    # Returns wrong arguments number error as ctypes does.
+    given = sum(1 for arg in args if arg is not _MISSING)
+    plural = '' if expected == 1 else 's'
+
+    if given < expected:
+        return TypeError(f'this function takes at least {expected} argument{plural} ({given} given)')
+
+    return TypeError(f'this function takes {expected} argument{plural} ({given} given)')
+
+
+def _argument_error(idx: int, error: Exception) -> ArgumentError:
+    # Returns argument conversion error as ctypes does.
+    return ArgumentError(f'argument {idx}: {type(error).__name__}: {error}')
+
+
+def _compile_argfailed(name: str, argnames: Tuple[str, ...], inlined: List[Tuple[int, str]], namespace: dict):
+    # Compiles a function returning the number of the first argument failed to be cast inline.
+    lines = [f"def _ct_argfailed({', '.join(argnames)}):"]
+
+    for idx, param in inlined:
+        lines.extend([
+            'try:',
+            f'    {param}',
+            'except Exception:',
+            f'    return {idx + 1}',
+        ])
+
+    lines.append('return 0')
+
+    exec(compile('\n    '.join(lines) + '\n', f'<ctyped {name}>', 'exec'), namespace)
+
+    return namespace.pop('_ct_argfailed')
+
+
+def fast_call_bind(
+        stub: Callable, *, func_ptr: Callable, argtypes: List[Any], errcheck: Optional[Callable] = None,
+        stats: Optional[FuncStats] = None
+):
+    """Compiles a trampoline calling a foreign function
+    and replaces the given stub code with it.
+
+    :param stub: Stub created by ``fast_call_stub()``.
+
+    :param func_ptr: Separate foreign function pointer (cdecl). Its ``argtypes`` are set
+        to native types for the trampoline to pass inline cast values to.
+
+    :param argtypes: Argument types to convert arguments into.
+
+    :param errcheck: Result caster.
+
+    :param stats: Statistics to register calls into. If set, the trampoline
+        measures conversion and foreign function call durations.
+
+    """
+    namespace = stub.__globals__
+    code = stub.__code__
+    name = code.co_name
+    argnames = code.co_varnames[:code.co_argcount]
+
+    namespace['_ct_fn'] = func_ptr
+    namespace['_ct_missing'] = _MISSING
+    namespace['_ct_argcount'] = _argcount_error
+    namespace['_ct_argerror'] = _argument_error
+
+    # Native types convert their values natively during the call, as well as casted types
+    # not providing inline casts (those are converted with their `from_param()` by ctypes).
+    # Inline casts produce values for the native types of casted ones, and those following
+    # the last natively converted argument are passed as is (cdecl functions allow that).
+    argtypes_native = []
+    argcount_native = 0
+    params = []
+    inlined = []
+
+    for idx, (argname, argtype) in enumerate(zip(argnames, argtypes)):
+
+        param = None
+
+        if issubclass(argtype, CastedTypeBase):
+            converter = f'_ct_conv{idx}'
+            namespace[converter] = argtype.from_param
+            param = argtype._ct_inline(argname, converter)
+
+        if param is None:
+            argtypes_native.append(argtype)
+            argcount_native = idx + 1
+            params.append(argname)
+
+        else:
+            argtypes_native.append(argtype._ct_native)
+            params.append(f'_ct_p{idx}')
+            inlined.append((idx, param))
+
+    if argcount_native:
+        func_ptr.argtypes = argtypes_native[:argcount_native]
+
+    if errcheck:
+        namespace['_ct_res'] = errcheck
+
+    # Arguments are optional to report wrong arguments number as ctypes does.
+    signature = ', '.join([f'{argname}=_ct_missing' for argname in argnames] + ['*_ct_extra'])
+    missing = ''.join(f' or {argname} is _ct_missing' for argname in argnames)
+    given = ''.join(f'{argname}, ' for argname in argnames)
+
+    lines = [
+        f'def {name}({signature}):',
+        f'if _ct_extra{missing}:',
+        f'    raise _ct_argcount({len(argnames)}, ({given}) + _ct_extra)',
+    ]
+
+    if stats is not None:
+        namespace['_ct_clock'] = perf_counter
+        namespace['_ct_stats'] = stats.add
+        lines.append('_ct_t0 = _ct_clock()')
+
+    if inlined:
+        # Inline casts errors are reported as ctypes does. If there are several casts,
+        # the failed argument is only looked up on error, by evaluating those one by one.
+        failed = inlined[0][0] + 1
+
+        if len(inlined) > 1:
+            namespace['_ct_argfailed'] = _compile_argfailed(name, argnames, inlined, namespace)
+            failed = f"_ct_argfailed({', '.join(argnames)})"
+
+        lines.append('try:')
+        lines.extend(f'    _ct_p{idx} = {param}' for idx, param in inlined)
+        lines.extend([
+            'except Exception as e:',
+            f'    raise _ct_argerror({failed}, e) from e',
+        ])
+
+    call = f"_ct_fn({', '.join(params)})"
+
+    if stats is None:
+
+        if errcheck:
+            call = f'_ct_res({call})'
+
+        lines.append(f'return {call}')
+
+    else:
+        lines.append('_ct_t1 = _ct_clock()')
+        lines.append(f'_ct_r = {call}')
+        lines.append('_ct_t2 = _ct_clock()')
+
+        if errcheck:
+            lines.append('_ct_r = _ct_res(_ct_r)')
+
+        lines.append('_ct_stats(_ct_t1 - _ct_t0 + _ct_clock() - _ct_t2, _ct_t2 - _ct_t1)')
+        lines.append('return _ct_r')
+
+    source = '\n    '.join(lines) + '\n'
+
+    exec(compile(source, f'<ctyped {name}>', 'exec'), namespace)
+
+    trampoline = namespace[name]
+    stub.__code__ = trampoline.__code__
+    stub.__defaults__ = trampoline.__defaults__
+
+
+def call_map_bind(func_c: Callable, lib: Any):
+    """Prepares a foreign function with types bound for ``call_map()``.
+
+    If all the function parameters are ints no wider than C int, a separate
+    pointer to it with no argtypes is set as ``func_c.ctyped_map``.
+
+    :param func_c: ctypes function.
+
+    :param lib: Library (ctypes) the function belongs to.
+
+    """
+    bounds = [MAP_INT_BOUNDS.get(argtype) for argtype in func_c.argtypes or ()]
+
+    if not bounds or None in bounds:
+        return
+
+    func_map = type(func_c)((func_c.__name__, lib))
+    func_map.restype = func_c.restype
+
+    if func_c.errcheck:
+        func_map.errcheck = func_c.errcheck
+
+    func_map.ctyped_bounds = bounds
+    func_c.ctyped_map = func_map
+
+
+def _get_map_func(func: Callable, args: List[list]) -> Callable:
+    # Returns a function to call for arguments sequences (see call_map_bind()).
+    # Ints in bounds of parameters types are passed as C ints by ctypes itself,
+    # with no from_param() calls and intermediate objects.
+    func_map = getattr(getattr(func, 'cfunc', func), 'ctyped_map', None)
+
+    if func_map is None or len(args) != len(func_map.ctyped_bounds):
+        return func
+
+    try:
+        for arg, (low, high) in zip(args, func_map.ctyped_bounds):
+            if arg and (min(arg) < low or max(arg) > high):
+                return func
+
+    except TypeError:
+        # Not ints. Conversion errors are raised by the function.
+        return func
+
+    return func_map
+
+
+def call_map(func: Callable, *iterables: Iterable, out: Any = None, lazy: bool = False) -> Any:
+    """Calls a function for every set of arguments taken from iterables, as ``map()`` does.
+
+    Arrays (``array.array``, NumPy arrays, etc.) are converted into lists at once,
+    results may be put into a preallocated sequence.
+
+    For functions with int parameters no wider than C int (e.g. ``CInt8U``, ``CInt32``)
+    arguments are checked against parameters types bounds at once, and then passed
+    to the foreign function with no per call conversion in Python. Other arguments
+    (and lazy calls) are converted on every call, as for a loop calling the function.
+
+    :param func: Function to call.
+
+    :param iterables: Sequences of arguments (one per function parameter).
+
+    :param out: Preallocated sequence to put results into (list, ``array.array``,
+        NumPy array or other writable buffer). It is returned as result.
+
+    :param lazy: Return an iterator calling the function on demand.
+
+    """
+    if lazy and out is not None:
+        raise ValueError('Results can not be both lazy and put into a preallocated sequence')
+
+    if lazy:
+        return map(func, *[iterable.tolist() if hasattr(iterable, 'tolist') else iterable for iterable in iterables])
+
+    args = [
+        iterable.tolist() if hasattr(iterable, 'tolist') else
+        iterable if isinstance(iterable, (list, tuple)) else list(iterable)
+        for iterable in iterables]
+
+    results = map(_get_map_func(func, args), *args)
+
+    if out is None:
+        return list(results)
+
+    target = out
+
+    if hasattr(out, 'dtype'):
+        filled = _import_numpy().fromiter(results, out.dtype)
+
+    else:
+        try:
+            view = memoryview(out)
+
+        except TypeError:
+            view = None
+
+        if view is not None and view.format in typecodes:
+            filled = memoryview(array(view.format, results))
+            target = view
+
+        else:
+            filled = list(results)
+
+    if len(filled) > len(target):
+        raise IndexError(f'Output sequence is too short for {len(filled)} results')
+
+    target[:len(filled)] = filled
+
+    return out
+
+
+class BoundMethod(partial):
+    """Library function declared with ``wrap=True`` bound to an instance
+    (see ``MethodDescriptor``). Has ``.map()`` as functions do (see ``call_map()``).
+
+    """
+    __slots__ = ()
+
+    @property
+    def map(self) -> Callable:
+        return partial(call_map, self)
+
+
+class MethodDescriptor(partialmethod):
+    """Library function declared with ``wrap=True`` (see ``Library.method()``).
+
+    Bound methods have ``.map()`` to call them for sequences of arguments.
+    Accessed from a class, a method takes instances as the first argument:
+
+    .. code-block:: python
+
+        probe.add.map([1, 2, 3])  # For the same instance.
+        Probe.add.map(probes, [1, 2, 3])  # For several instances.
+
+    """
+    def __get__(self, obj, cls=None):
+
+        if obj is None:
+            return BoundMethod(self.func, *self.args, **self.keywords)
+
+        return BoundMethod(self.func, obj, *self.args, **self.keywords)
+
+
 def get_last_error() -> ErrorInfo:
     """Returns last error (``errno``) information named tuple:
 
@@ -120,6 +588,21 @@ def get_last_error() -> ErrorInfo:
     return ErrorInfo(num=num, code=code, msg=msg)
 
 
+@lru_cache(maxsize=None)
+def get_functype(restype: Any, argtypes: Tuple[Any, ...], use_errno: bool = False) -> Any:
+    """Returns C function type (``CFUNCTYPE``) for a signature.
+    Types are cached, so that the same signature gets the same type.
+
+    :param restype: Result type.
+
+    :param argtypes: Argument types.
+
+    :param use_errno: Whether to swap errno with ctypes private copy on calls.
+
+    """
+    return CFUNCTYPE(restype, *argtypes, use_errno=use_errno)
+
+
 def c_callback(use_errno: bool = False) -> Callable:
     """Decorator to turn a Python function into a C callback function.
 
@@ -137,6 +620,9 @@ def c_callback(use_errno: bool = False) -> Callable:
 
     :param use_errno:
 
+    .. note:: The callback must be referenced while C may call it.
+        Use ``CallbackPool`` to manage callbacks lifetime explicitly.
+
     """
     def cfunction_(func: Callable) -> Callable:
 
@@ -146,7 +632,7 @@ def c_callback(use_errno: bool = False) -> Callable:
         restype = cast_type(func_info, 'return', annotations.pop('return', None))
         argtypes = [cast_type(func_info, argname, argtype) for argname, argtype in annotations.items()]
 
-        functype = CFUNCTYPE(restype, *argtypes, use_errno=use_errno)
+        functype = get_functype(restype, tuple(argtypes), use_errno)
         cfunc = functype(func)
 
         return cfunc
@@ -0,0 +1,7 @@
+import sys
+
+collect_ignore = []
+
+if sys.version_info < (3, 7):
+    # Postponed evaluation of annotations (PEP 563) is a syntax error there.
+    collect_ignore.append('test_annotations.py')
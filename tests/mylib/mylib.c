@@ -87,6 +87,21 @@ uint8_t f_prefix_one_uint8_add(uint8_t val) {
     return val + 1;
 }
 
+
+uint16_t f_prefix_one_uint16_add(uint16_t val) {
+    return val + 1;
+}
+
+
+uint32_t f_prefix_one_uint32_add(uint32_t val) {
+    return val + 1;
+}
+
+
+uint64_t f_prefix_one_uint64_add(uint64_t val) {
+    return val + 1;
+}
+
 const char * f_prefix_one_char_p(char* val) {
     char prefix[] = "hereyouare: ";
     char *out = malloc(sizeof(char) * (strlen(prefix) + strlen(val) + 1 ));
@@ -132,3 +147,89 @@ mystruct_t f_prefix_one_handle_mystruct(mystruct_t val) {
 
     return val;
 }
+
+
+typedef struct Point {
+
+   int32_t x;
+   int32_t y;
+
+} point_t;
+
+
+int32_t f_prefix_one_sum_points(point_t * points, int32_t count) {
+    int32_t sum = 0;
+
+    for (int32_t i = 0; i < count; i++) {
+        sum += points[i].x + points[i].y;
+    }
+
+    return sum;
+}
+
+
+int32_t f_prefix_one_sum_ints(const int32_t * vals, int32_t count) {
+    int32_t sum = 0;
+
+    for (int32_t i = 0; i < count; i++) {
+        sum += vals[i];
+    }
+
+    return sum;
+}
+
+
+void f_prefix_one_fill_ints(int32_t * vals, int32_t count, int32_t value) {
+    for (int32_t i = 0; i < count; i++) {
+        vals[i] = value;
+    }
+}
+
+
+uint64_t f_prefix_one_spin(uint64_t iterations) {
+    volatile uint64_t acc = 0;
+
+    for (uint64_t i = 0; i < iterations; i++) {
+        acc += i;
+    }
+
+    return acc;
+}
+
+
+uint8_t f_prefix_one_next_one(mystruct_t * val) {
+    return val->next->one;
+}
+
+
+#pragma pack(push, 1)
+typedef struct {
+
+   uint8_t flag;
+   int32_t value;
+
+} packed_t;
+#pragma pack(pop)
+
+
+int32_t f_prefix_one_packed_value(packed_t * val) {
+    return val->flag ? val->value : 0;
+}
+
+
+typedef int (*callback_data) (int num, void *user_data);
+
+
+int f_prefix_one_backcaller_data(callback_data hook, void *user_data) {
+    return hook(33, user_data) + hook(34, user_data);
+}
+
+
+long double f_prefix_one_ldouble_half(long double val) {
+    return val / 2;
+}
+
+
+int f_prefix_one_strings_cmp(char* first, char* second) {
+    return strcmp(first, second);
+}
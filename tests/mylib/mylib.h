@@ -0,0 +1,62 @@
+/* Declarations for binding generator tests. */
+#ifndef MYLIB_H
+#define MYLIB_H
+
+#include <stdint.h>
+#include <wchar.h>
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+/* Callback type. */
+typedef int (*callback) (int num);
+typedef int (*callback_data) (int num, void *user_data);
+
+typedef struct MyStruct {
+
+   uint8_t one;
+   char * two;
+   struct MyStruct * next;
+
+} mystruct_t;
+
+typedef struct Point {
+   int32_t x;
+   int32_t y;
+} point_t;
+
+#pragma pack(push, 1)
+typedef struct {
+   uint8_t flag;
+   int32_t value;
+} packed_t;
+#pragma pack(pop)
+
+
+
+int buggy1(void);
+int f_noprefix_1();
+int f_prefix_one_func_1(void);
+int f_prefix_one_func_2(void);
+uint8_t f_prefix_one_uint8_add(uint8_t val);
+uint64_t f_prefix_one_uint64_add(uint64_t val);
+float f_prefix_one_float_to_float(float val);
+_Bool f_prefix_one_bool_to_bool(_Bool val);
+const char * f_prefix_one_char_p(char *val);
+const wchar_t * f_prefix_one_wchar_p(wchar_t* val);
+int f_prefix_one_backcaller(callback hook);
+int f_prefix_one_backcaller_data(callback_data hook, void *user_data);
+int f_prefix_one_probe_add_one(int val);
+void f_prefix_one_byref_int(int * val);
+mystruct_t f_prefix_one_handle_mystruct(mystruct_t val);
+int32_t f_prefix_one_sum_points(point_t * points, int32_t count);
+int32_t f_prefix_one_packed_value(packed_t * val) __attribute__((nonnull));
+uint8_t f_prefix_one_next_one(mystruct_t * val);
+static inline int helper(int a) { return a + 1; }
+
+#ifdef __cplusplus
+}
+#endif
+
+#endif
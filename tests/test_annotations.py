@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from array import array
+from pathlib import Path
+
+import pytest
+
+from ctyped.exceptions import TypehintError
+from ctyped.toolbox import Library
+from ctyped.types import CArray, CBuffer, CInt, CInt32, CRef
+
+############################################################
+# Library interface with all type hints being strings
+
+MYLIB_PATH = Path(__file__).parent / 'mylib' / 'mylib.so'
+
+mylib = Library(MYLIB_PATH, int_bits=32)
+
+
+@mylib.structure(int_sign=True)
+class Point:
+
+    x: int
+    y: int
+
+
+@mylib.structure()
+class Segment:
+
+    ends: CArray[Point, 2]
+    weights: CArray[float, 2]
+    origin: Point
+
+
+with mylib.scope('f_prefix_one_'):
+
+    @mylib.f
+    def sum_points(points: CRef, count: int) -> int:
+        ...
+
+    @mylib.f
+    def sum_ints(vals: CBuffer[CInt32], count: int) -> int:
+        ...
+
+    @mylib.f
+    def fill_ints(vals: CBuffer, count: int, value: int) -> None:
+        ...
+
+    @mylib.f
+    def bool_to_bool(val: bool) -> bool:
+        ...
+
+    @mylib.f('char_p')
+    def func_str(some: str) -> str:
+        ...
+
+    class Prober(CInt):
+
+        @mylib.m
+        def probe_add_one(self) -> int:
+            ...
+
+
+mylib.bind_types()
+
+
+############################################################
+# Tests
+
+def test_hints_resolved():
+    assert sum_points(CRef(Point.from_records([(1, 2), (3, 4)])), 2) == 10
+    assert bool_to_bool(False)
+    assert func_str('mind') == 'hereyouare: mind'
+    assert Prober(1).probe_add_one() == 2
+
+    ints = array('i', [1, 2, 3])
+    assert sum_ints(ints, 3) == 6
+    assert fill_ints(ints, 2, 7) is None
+    assert list(ints) == [7, 7, 3]
+
+    segment = Segment(ends=[Point(x=1, y=2)], weights=[0.5], origin=Point(x=3))
+    assert segment.ends[0].y == 2
+    assert list(segment.weights) == [0.5, 0]
+    assert segment.origin.x == 3
+
+    # Resolution is memoized per library.
+    assert mylib._hints[(__name__, 'CBuffer[CInt32]')] is CBuffer[CInt32]
+
+
+def test_hints_local():
+
+    lib = Library(MYLIB_PATH, int_bits=32)
+
+    class Local(CInt):
+
+        @lib.m('f_prefix_one_probe_add_two')
+        def probe_add_two(self) -> int:
+            ...
+
+    @lib.f('f_prefix_one_probe_add_one')
+    def unresolved(val: Unknown) -> int:  # noqa: F821
+        ...
+
+    with pytest.raises(TypehintError):
+        lib.bind_types()
+
+    # Local types are resolved from calling frames.
+    assert Local(1).probe_add_two() == 3
@@ -1,11 +1,21 @@
+import asyncio
+import ctypes
 import faulthandler
+import os
+import runpy
+from array import array
+import struct
+import sys
+import threading
 from pathlib import Path
 
 import pytest
 
-from ctyped.exceptions import FunctionRedeclared, TypehintError, UnsupportedTypeError
-from ctyped.toolbox import Library, get_last_error, c_callback
-from ctyped.types import CInt, CCharsW, CRef, CPointer
+from ctyped.exceptions import CtypedException, FunctionRedeclared, TypehintError, UnsupportedTypeError
+from ctyped.toolbox import Arena, CRefPool, CallbackPool, Library, get_last_error, c_callback
+from ctyped.types import (
+    CArray, CBuffer, CastedField, CDouble, CInt, CInt8U, CInt16U, CInt32, CInt64, CChars, CCharsLazy, CCharsW, CRef,
+    CPointer, FieldLayout)
 
 ############################################################
 # Library interface
@@ -30,6 +40,13 @@ class MyStruct:
         return 10
 
 
+@mylib.structure(int_sign=True)
+class Point:
+
+    x: int
+    y: int
+
+
 @mylib.f()
 def f_noprefix_1() -> int:
     ...
@@ -54,6 +71,10 @@ with mylib.scope('f_prefix_one_'):
     def backcaller(val: CPointer) -> int:
         ...
 
+    @mylib.f
+    def backcaller_data(hook: CPointer, user_data: CPointer) -> int:
+        ...
+
     @mylib.f
     def handle_mystruct(val: MyStruct) -> MyStruct:
         ...
@@ -62,6 +83,18 @@ with mylib.scope('f_prefix_one_'):
     def byref_int(val: CRef) -> None:
         ...
 
+    @mylib.f
+    def sum_points(points: CRef, count: int) -> int:
+        ...
+
+    @mylib.f
+    def sum_ints(vals: CBuffer[CInt32], count: int) -> int:
+        ...
+
+    @mylib.f
+    def fill_ints(vals: CBuffer, count: int, value: int) -> None:
+        ...
+
     @mylib.f
     def bool_to_bool(val: bool) -> bool:
         ...
@@ -74,6 +107,10 @@ with mylib.scope('f_prefix_one_'):
     def uint8_add(val: int) -> int:
         ...
 
+    @mylib.function(int_bits=64, gil=True)
+    def spin(iterations: int) -> int:
+        ...
+
     @mylib.f('char_p')
     def func_str(some: str) -> str:
         ...
@@ -110,6 +147,81 @@ with mylib.scope('f_prefix_one_'):
 
 mylib.bind_types()
 
+
+mylib_fast = Library(MYLIB_PATH, int_bits=32, fast_call=True)
+
+with mylib_fast.scope('f_prefix_one_'):
+
+    @mylib_fast.f('char_p')
+    def fast_func_str(some: str) -> str:
+        ...
+
+    @mylib_fast.f('wchar_p', str_type=CCharsW)
+    def fast_func_str_utf(some: str) -> str:
+        ...
+
+    @mylib_fast.f('handle_mystruct')
+    def fast_handle_mystruct(val: MyStruct) -> MyStruct:
+        ...
+
+    @mylib_fast.f('byref_int')
+    def fast_byref_int(val: CRef) -> None:
+        ...
+
+    @mylib_fast.f('uint8_add', int_bits=8)
+    def fast_uint8_add(val: int) -> int:
+        ...
+
+    @mylib_fast.f('float_to_float')
+    def fast_float_to_float(val: float) -> float:
+        ...
+
+    @mylib_fast.f('strings_cmp')
+    def fast_strings_cmp(first: str, second: str) -> int:
+        ...
+
+    class FastProber(CInt):
+
+        @mylib_fast.m('probe_add_one')
+        def probe_add_one(self) -> int:
+            ...
+
+        @mylib_fast.m('probe_add_two')
+        def probe_add_three(self, cfunc) -> int:
+            return cfunc() + 1
+
+
+mylib_lazy = Library(MYLIB_PATH, autoload=False, int_bits=32, lazy=True)
+
+with mylib_lazy.scope('f_prefix_one_'):
+
+    @mylib_lazy.f('char_p')
+    def lazy_func_str(some: str) -> str:
+        ...
+
+    @mylib_lazy.f('wchar_p', str_type=CCharsW, fast_call=True)
+    def lazy_fast_func_str_utf(some: str) -> str:
+        ...
+
+    @mylib_lazy.f('handle_mystruct')
+    def lazy_handle_mystruct(val: MyStruct) -> MyStruct:
+        ...
+
+    @mylib_lazy.f('spin', int_bits=64, gil=True)
+    def lazy_spin(iterations: int) -> int:
+        ...
+
+    class LazyProber(CInt):
+
+        @mylib_lazy.m('probe_add_one')
+        def probe_add_one(self) -> int:
+            ...
+
+        @mylib_lazy.m('probe_add_two')
+        def probe_add_three(self, cfunc) -> int:
+            return cfunc() + 1
+
+
 ############################################################
 # Tests
 
@@ -118,10 +230,170 @@ def test_sniff():
     result = mylib.sniff()
     dumped = result.to_ctyped()
     assert "mylib.so')" in dumped
-    assert 'def buggy1():' in dumped
+    assert 'def buggy1() -> CInt32:' in dumped
     assert 'bind_types()' in dumped
 
 
+def test_sniff_lines():
+    lines = {symbol.name: (symbol.line, symbol.signature) for symbol in mylib.sniff().symbols}
+    assert lines['buggy1'][0].endswith('mylib.c:11')
+
+    # Signature is not supported (long double), source line is still known.
+    line, signature = lines['f_prefix_one_ldouble_half']
+    assert signature is None
+    assert line.endswith('mylib.c:228')
+
+
+def test_sniff_elf():
+    from ctyped.sniffer import ElfSymbolSniffer, NmSymbolSniffer, SniffingError
+
+    symbols = ElfSymbolSniffer(MYLIB_PATH).sniff().symbols
+    symbols_nm = NmSymbolSniffer(MYLIB_PATH).sniff().symbols
+
+    assert {symbol.name for symbol in symbols} == {symbol.name for symbol in symbols_nm}
+    assert {symbol.address for symbol in symbols} == {symbol.address for symbol in symbols_nm}
+
+    with pytest.raises(SniffingError):
+        ElfSymbolSniffer(__file__).sniff()
+
+
+def test_deduce_pack():
+    from ctyped.dwarf import deduce_pack
+
+    # (offset, size, alignment)
+    assert deduce_pack([(0, 1, 1), (8, 8, 8)], 16) is None
+    assert deduce_pack([(0, 1, 1), (1, 8, 8)], 9) == 1
+    assert deduce_pack([(0, 1, 1), (4, 8, 8)], 12) == 4
+
+    # Alignment differs from size: double on i386, arrays, nested structures.
+    assert deduce_pack([(0, 1, 1), (4, 8, 4)], 12) is None
+    assert deduce_pack([(0, 1, 1), (4, 12, 4)], 16) is None
+
+
+def test_sniff_dwarf():
+    from ctyped.sniffer import ElfSymbolSniffer
+
+    result = ElfSymbolSniffer(MYLIB_PATH).sniff()
+    signatures = {symbol.name: symbol.signature for symbol in result.symbols}
+
+    signature = signatures['f_prefix_one_sum_points']
+    assert signature.params == [('points', 'CRef'), ('count', 'CInt32')]
+    assert signature.result == 'CInt32'
+    assert signature.line.endswith('mylib.c:160')
+
+    assert signatures['f_prefix_one_char_p'].params == [('val', 'str')]
+    assert signatures['f_prefix_one_wchar_p'].result == 'CCharsW'
+    assert signatures['f_prefix_one_byref_int'].result == 'None'
+    assert signatures['f_prefix_one_handle_mystruct'].result == 'MyStruct'
+
+    structures = result.structures
+    assert structures['MyStruct'].fields == [('one', 'CInt8U'), ('two', 'str'), ('next', "'MyStruct'")]
+    assert structures['packed_t'].pack == 1
+    assert structures['Point'].pack is None
+
+    assert ElfSymbolSniffer(MYLIB_PATH, debug=False).sniff().symbols[0].signature is None
+
+    # Generated code is functional.
+    namespace = {}
+    exec(result.to_ctyped(), namespace)
+
+    assert namespace['f_prefix_one_char_p']('x') == 'hereyouare: x'
+    assert namespace['f_prefix_one_packed_value'](CRef(namespace['packed_t'](flag=1, value=7))) == 7
+
+
+def test_generator(tmp_path):
+    from ctyped.generator import generate
+
+    header = MYLIB_PATH.parent / 'mylib.h'
+
+    dumped = generate(header, MYLIB_PATH, cache_dir=tmp_path, use_pycparser=False)
+    assert "with lib.scope('f_prefix_one_'):" in dumped
+    assert '    def sum_points(points: CRef, count: CInt32) -> CInt32:' in dumped
+    assert '    def char_p(val: CBuffer) -> str:' in dumped
+    assert '@lib.structure(pack=1)\nclass packed_t:' in dumped
+    assert "    next: 'MyStruct'" in dumped
+
+    # Cached.
+    assert len(list(tmp_path.iterdir())) == 1
+    assert generate(header, MYLIB_PATH, cache_dir=tmp_path, use_pycparser=False) == dumped
+
+    namespace = {}
+    exec(dumped, namespace)
+
+    assert namespace['char_p'](b'x') == 'hereyouare: x'
+    assert namespace['uint8_add'](3) == 4
+    assert namespace['packed_value'](CRef(namespace['packed_t'](flag=1, value=7))) == 7
+
+
+def test_generator_cache_includes(tmp_path):
+    from ctyped.generator import preprocess_header, generate
+
+    headers = tmp_path / 'headers'
+    headers.mkdir()
+    (headers / 'some.h').write_text('#include "types.h"\nsome_t some_get(void);\n')
+    (headers / 'types.h').write_text('typedef int some_t;\n')
+
+    if preprocess_header(headers / 'some.h') is None:
+        pytest.skip('C preprocessor is not available')
+
+    cache_dir = tmp_path / 'cache'
+    dumped = generate(headers / 'some.h', 'libsome.so', cache_dir=cache_dir, use_pycparser=False)
+    assert 'def some_get() -> CInt:' in dumped
+
+    # Included header change is not served from cache.
+    (headers / 'types.h').write_text('typedef unsigned char some_t;\n')
+    dumped = generate(headers / 'some.h', 'libsome.so', cache_dir=cache_dir, use_pycparser=False)
+    assert 'def some_get() -> CInt:' not in dumped
+    assert len(list(cache_dir.iterdir())) == 2
+
+
+def test_generator_header(tmp_path):
+    from ctyped.generator import generate, parse_header
+
+    header = tmp_path / 'some.h'
+    header.write_text(
+        '#define OF(args) args\n'
+        '#define API extern\n'
+        'typedef struct { int a; } ctx_t;\n'
+        'API int one_Init(ctx_t *c);\n'
+        'API int one_Update(ctx_t *c, const unsigned char *data);\n'
+        'API int one_Final(unsigned char *md, ctx_t *c);\n'
+        'API int two_Init(ctx_t *c);\n'
+        'API int two_Update(ctx_t *c, const unsigned char *data);\n'
+        'API int two_Final(unsigned char *md, ctx_t *c);\n'
+        'API char *three OF((const char *name));\n'
+    )
+
+    dumped = generate(header, 'libsome.so', cache=False, use_pycparser=False)
+
+    # Scoping would make names clash.
+    assert 'lib.scope' not in dumped
+    assert 'def one_Init(c: CRef) -> CInt:' in dumped
+    assert 'def two_Final(md: CBuffer, c: CRef) -> CInt:' in dumped
+
+    # Preprocessed.
+    assert 'def three(name: str) -> CPointer:' in dumped
+    assert 'def OF' not in dumped
+
+    # Not preprocessed: macros are not taken for functions.
+    names = [func.name for func in parse_header(header, use_pycparser=False, preprocess=False).funcs]
+    assert 'OF' not in names
+    assert 'one_Init' in names
+
+
+def test_generator_pycparser():
+    pytest.importorskip('pycparser')
+    from ctyped.generator import parse_header
+
+    header = MYLIB_PATH.parent / 'mylib.h'
+
+    result = parse_header(header, use_pycparser=True).to_result(libpath='')
+    result_builtin = parse_header(header, use_pycparser=False).to_result(libpath='')
+
+    assert result.symbols == result_builtin.symbols
+    assert result.structures == result_builtin.structures
+
+
 def test_basic():
     assert f_noprefix_1() == -10
     assert function_one() == 1
@@ -154,11 +426,130 @@ def test_basic():
     assert str(byref_val) == '33'
 
 
+def test_fast_call():
+
+    with pytest.raises(CtypedException) as e:
+        fast_uint8_add(4)
+
+    assert 'bind_types' in str(e.value)
+
+    mylib_fast.bind_types()
+
+    assert fast_uint8_add(4) == 5
+    assert fast_uint8_add(255) == 0
+    assert fast_float_to_float(1.3) == pytest.approx(1.3)
+    assert fast_func_str('mind') == 'hereyouare: mind'
+    assert fast_func_str_utf('пример') == 'вот: пример'
+    assert fast_strings_cmp('mind', 'mind') == 0
+    assert fast_strings_cmp('mind', b'mine') < 0
+
+    byref_val = CRef.cint()
+    assert fast_byref_int(byref_val) is None
+    assert byref_val == 33
+
+    result = fast_handle_mystruct(MyStruct(first=2, second='any', third=MyStruct(first=10)))
+    assert result.first == 4
+    assert result.second == 'anything'
+
+    prober = FastProber(10)
+    assert prober.probe_add_one() == 11
+    assert prober.probe_add_three() == 13
+
+    # Errors are the same as for ctypes.
+    with pytest.raises(ctypes.ArgumentError) as e:
+        fast_func_str(1)
+
+    assert str(e.value).startswith('argument 1: TypeError: ')
+
+    with pytest.raises(ctypes.ArgumentError) as e:
+        fast_strings_cmp('mind', 1)
+
+    assert str(e.value).startswith('argument 2: TypeError: ')
+
+    with pytest.raises(ctypes.ArgumentError) as e:
+        fast_uint8_add('4')
+
+    # Converted natively (error format of ctypes differs on Python 3.6).
+    assert str(e.value).startswith('argument 1: ')
+    assert 'TypeError' in str(e.value)
+
+    with pytest.raises(TypeError) as e:
+        fast_uint8_add()
+
+    assert str(e.value) == 'this function takes at least 1 argument (0 given)'
+
+    with pytest.raises(TypeError) as e:
+        fast_uint8_add(1, 2)
+
+    assert str(e.value) == 'this function takes 1 argument (2 given)'
+
+
+def test_lazy():
+    # Declared functions are not looked up.
+    assert mylib_lazy.lib is None
+
+    assert lazy_func_str.ctyped_load
+    assert lazy_func_str('mind') == 'hereyouare: mind'
+    assert mylib_lazy.lib is not None
+    assert lazy_func_str.ctyped_load is None
+    assert lazy_func_str('mind') == 'hereyouare: mind'
+
+    assert lazy_fast_func_str_utf('пример') == 'вот: пример'
+
+    result = lazy_handle_mystruct(MyStruct(first=2, second='any', third=MyStruct(first=10)))
+    assert result.second == 'anything'
+
+    # Not called functions are bound at once.
+    assert lazy_spin.ctyped_load
+    mylib_lazy.bind_types()
+    assert lazy_spin.ctyped_load is None
+    assert lazy_spin(4) == 6
+
+    prober = LazyProber(10)
+    assert prober.probe_add_one() == 11
+    assert prober.probe_add_three() == 13
+
+
 def test_cref_instantiation():
     assert isinstance(CRef.carray(bool, size=10), CRef)
     assert isinstance(CRef.cbool(True), CRef)
     assert isinstance(CRef.cfloat(10.25), CRef)
 
+    with pytest.raises(AttributeError):
+        CRef.cint().some = 1
+
+
+def test_cref_pool():
+    refs = CRefPool()
+
+    with refs:
+        first = refs.cint()
+        second = refs.cint(5)
+        assert first is not second
+        assert isinstance(first, CRef)
+        byref_int(first)
+        byref_int(second)
+        assert first == 33
+        assert second == 33
+
+        values = refs.carray(float, size=3)
+        values._ct_val[1] = 1.5
+        assert refs.cbool(True)
+        assert refs.cfloat(2.5) == 2.5
+
+    # Slots are reused with values reinitialized.
+    assert refs.cint() is first
+    assert first == 0
+    assert refs.cint(7) is second
+    assert second == 7
+
+    assert refs.carray(float, size=3) is values
+    assert list(values) == [0, 0, 0]
+    assert refs.carray(float, size=4) is not values
+
+    refs.clear()
+    assert refs.cint() is not first
+
 
 def test_with_errno():
     assert with_errno() == 333
@@ -174,6 +565,79 @@ def test_strings():
     assert Wide.func_str_utf('пример') == 'вот: пример'
 
 
+def test_strings_bytes():
+
+    assert func_str(b'mind') == 'hereyouare: mind'
+    assert func_str(bytearray(b'mind')) == 'hereyouare: mind'
+    assert func_str(memoryview(b'mind')) == 'hereyouare: mind'
+    assert func_str(memoryview(b'minder')[:4]) == 'hereyouare: mind'
+    assert func_str(memoryview(bytearray(b'mind\0'))) == 'hereyouare: mind'
+
+    assert Wide.func_str_utf('пример\0'.encode('utf-32-le' if sys.byteorder == 'little' else 'utf-32-be')) == 'вот: пример'
+
+    struct = MyStruct(second=b'any')
+    assert struct.second == 'any'
+
+
+def test_strings_lazy():
+
+    lib = Library(MYLIB_PATH, str_type=CCharsLazy)
+
+    @lib.f('f_prefix_one_char_p')
+    def lazy_str(some: str) -> str:
+        ...
+
+    lib.bind_types()
+
+    result = lazy_str('mind')
+    assert isinstance(result, CCharsLazy)
+    assert len(result) == 16
+    assert result.raw == b'hereyouare: mind'
+    assert result.startswith('here')
+    assert not result.startswith('there')
+    assert result == 'hereyouare: mind'
+    assert result.upper() == 'HEREYOUARE: MIND'
+    assert f'{result}' == 'hereyouare: mind'
+
+    # Pointer is passed as is.
+    assert lazy_str(result) == 'hereyouare: hereyouare: mind'
+
+    empty = CCharsLazy()
+    assert not empty
+    assert str(empty) == ''
+
+
+def test_strings_cached():
+
+    lib = Library(MYLIB_PATH, str_type=CChars.cached(2))
+
+    @lib.f('f_prefix_one_char_p')
+    def cached_str(some: str) -> str:
+        ...
+
+    lib.bind_types()
+
+    for _ in range(3):
+        assert cached_str('mind') == 'hereyouare: mind'
+        assert cached_str(b'mind') == 'hereyouare: mind'
+
+    cache_info = lib.funcs['f_prefix_one_char_p'].argtypes[0]._ct_cache.cache_info()
+    assert cache_info.hits == 2
+    assert cache_info.misses == 1
+
+    @lib.structure()
+    class Named:
+
+        name: str
+
+    # Cached strings are handled as others in arenas.
+    with Arena() as arena:
+        named = arena.new(Named, name='mind')
+        address = ctypes.c_void_p.from_buffer(named).value
+        assert arena._address <= address < arena._address + arena.size
+        assert named.name == 'mind'
+
+
 def test_no_redeclare():
 
     with pytest.raises(FunctionRedeclared):
@@ -194,6 +658,18 @@ def test_unresolved_typehint():
 
     assert 'SomeDummyType' in str(e.value)
 
+    lib = Library(MYLIB_PATH)
+
+    @lib.f('f_noprefix_1')
+    def internal_name(one: 'thint_orig') -> int:
+        ...
+
+    # Not resolved into ctyped own variables.
+    with pytest.raises(TypehintError) as e:
+        lib.bind_types()
+
+    assert 'thint_orig' in str(e.value)
+
 
 def test_unsupported_type():
 
@@ -218,6 +694,49 @@ def test_callback():
     assert backcaller(hook) == 43
 
 
+def test_callback_pool():
+
+    callbacks = CallbackPool()
+
+    def hook(num: int) -> int:
+        return num + 10
+
+    thunk = callbacks.thunk(hook)
+    assert callbacks.thunk(hook) is thunk
+    assert backcaller(thunk) == 43
+
+    callbacks.release(hook)
+    assert not callbacks.thunks
+
+    @callbacks.prototype(user_data='data')
+    def on_num(num: int, data: CPointer) -> int:
+        ...
+
+    @callbacks.prototype
+    def on_num_default(num: int, user_data: CPointer) -> int:
+        ...
+
+    # C function calls the hook with 33 and 34.
+    for shift in range(3):
+        with on_num.bind(lambda num: num + shift) as user_data:
+            assert backcaller_data(on_num.thunk, user_data) == 67 + shift * 2
+
+    assert not on_num.funcs
+
+    key_1 = on_num_default.register(lambda num: 1)
+    key_2 = on_num_default.register(lambda num: 2)
+    assert backcaller_data(on_num_default.thunk, key_1) == 2
+    assert backcaller_data(on_num_default.thunk, key_2) == 4
+    on_num_default.unregister(key_1)
+    assert list(on_num_default.funcs) == [key_2]
+
+    # The same signature gets the same type.
+    assert type(on_num.thunk) is type(on_num_default.thunk)
+
+    with pytest.raises(CtypedException):
+        callbacks.prototype(user_data='unknown')(hook)
+
+
 def test_struct():
 
     struct = MyStruct(first=2, second='any', third=MyStruct(first=10))
@@ -233,3 +752,728 @@ def test_struct():
     result.second = ''
     assert not result.second
     assert result.third.first == 15
+
+
+def test_struct_arena():
+
+    with Arena(size=256) as arena:
+        sub = arena.new(MyStruct, first=10, second='sub')
+        struct = arena.new(MyStruct, first=2, second='any', third=sub)
+        points = arena.new(Point * 3)
+
+        # Objects created the usual way are not affected.
+        heap = MyStruct(first=3, second='heap')
+        heap_points = Point.array(3)
+
+        assert arena.allocated == 256
+
+        # Structures and strings are placed in the arena chunk.
+        chunk = arena._address
+
+        def in_chunk(address):
+            return chunk <= address < chunk + 256
+
+        def second_address(obj):
+            return ctypes.c_void_p.from_buffer(obj, MyStruct.second.offset).value
+
+        for obj in (struct, struct.third, points):
+            assert in_chunk(ctypes.addressof(obj))
+
+        assert in_chunk(second_address(struct))
+
+        for obj in (heap, heap_points):
+            assert not in_chunk(ctypes.addressof(obj))
+
+        assert not in_chunk(second_address(heap))
+
+        # Strings assigned later are not placed in the arena.
+        sub.second = 'later'
+        assert not in_chunk(second_address(sub))
+
+        assert struct.second == 'any'
+        assert struct.third.second == 'later'
+        assert heap.second == 'heap'
+
+        result = handle_mystruct(struct)
+        assert result.first == 4
+        assert result.second == 'anything'
+        assert result.third.first == 15
+
+        # Larger allocations get chunks of their own.
+        assert len(arena.new(Point * 100)) == 100
+        assert arena.allocated == 256 + ctypes.sizeof(Point) * 100
+
+        assert list(arena.new(ctypes.c_int * 2, 1, 2)) == [1, 2]
+
+    assert arena.allocated == 0
+
+    # Structures created within the block survive it.
+    assert heap.second == 'heap'
+    assert heap_points[2].x == 0
+
+
+def test_struct_fields():
+    # Only fields requiring casting have descriptors.
+    assert isinstance(vars(MyStruct)['second'], CastedField)
+    assert isinstance(vars(MyStruct)['third'], CastedField)
+    assert not isinstance(vars(MyStruct)['first'], CastedField)
+
+    # Class access gives native fields.
+    assert MyStruct.first.offset == 0
+    assert MyStruct.second.size == ctypes.sizeof(ctypes.c_char_p)
+
+    struct = MyStruct(first=1, second='a', third=MyStruct(second='b'))
+    assert struct.third.second == 'b'
+
+
+def test_struct_array():
+
+    points = Point.array(3)
+    assert len(points) == 3
+    assert points[2].x == 0
+
+    points = Point.from_records([(1, 2), {'x': 3, 'y': 4}, Point(x=5, y=6)])
+    assert points[1].y == 4
+    assert sum_points(CRef(points), len(points)) == 21
+
+    points = Point.from_records([(1, 2), (3, 4)])
+    assert points[1].x == 3
+    assert sum_points(CRef(points), len(points)) == 10
+
+    points = Point.from_records([(2 ** 32 + 1, 2)])
+    assert points[0].x == 1
+
+    structs = MyStruct.from_records([(1, 'a'), {'second': 'b'}])
+    assert structs[0].second == 'a'
+    assert structs[1].second == 'b'
+
+
+def test_struct_bytes():
+
+    @mylib.structure(pack=1, int_bits=8)
+    class Packed:
+
+        first: int
+        second: CInt32
+
+    data = Packed(first=1, second=-2).to_bytes()
+    assert data == b'\x01\xfe\xff\xff\xff'
+
+    packed = Packed.from_bytes(b'\x00' + data, 1)
+    assert packed.first == 1
+    assert packed.second == -2
+
+    points = list(Point.iter_unpack(Point.from_records([(1, 2), (3, 4), (5, 6)]), batch=2))
+    assert [(point.x, point.y) for point in points] == [(1, 2), (3, 4), (5, 6)]
+    assert Point.from_bytes(points[2].to_bytes()).y == 6
+    assert list(Point.iter_unpack(b'')) == []
+
+    with pytest.raises(ValueError):
+        list(Point.iter_unpack(b'\x00' * 3))
+
+    # Pointers are not copied.
+    struct = MyStruct(first=1, second='a')
+
+    with pytest.raises(UnsupportedTypeError) as e:
+        struct.to_bytes()
+
+    assert '(second, third)' in str(e.value)
+
+    with pytest.raises(UnsupportedTypeError):
+        MyStruct.from_bytes(bytes(struct))
+
+    with pytest.raises(UnsupportedTypeError):
+        MyStruct.iter_unpack(bytes(struct))
+
+
+def test_struct_byte_order():
+
+    @mylib.structure(byte_order='big')
+    class Header:
+
+        kind: CInt8U
+        length: CInt16U
+        total: CInt64
+
+    @mylib.structure(byte_order='little', pack=1)
+    class HeaderLE:
+
+        kind: CInt8U
+        length: CInt16U
+
+    data = bytearray(struct.pack('>BxHxxxxq', 1, 258, -3))
+
+    # Mapped in place.
+    header = Header.from_buffer(data)
+    assert (header.kind, header.length, header.total) == (1, 258, -3)
+
+    header.length = 3
+    assert data[2:4] == b'\x00\x03'
+    assert header.to_bytes() == bytes(data)
+
+    headers = Header.from_records([(1, 258, -3), (2, 5, 6)])
+    assert bytes(headers)[:len(data)] == struct.pack('>BxHxxxxq', 1, 258, -3)
+    assert headers[1].total == 6
+
+    assert HeaderLE(kind=1, length=258).to_bytes() == b'\x01\x02\x01'
+
+    assert Header.layout() == [
+        FieldLayout('kind', 0, 1, 1),
+        FieldLayout('length', 2, 2, 4),
+        FieldLayout('total', 8, 8, 0),
+    ]
+    assert [field.padding for field in HeaderLE.layout()] == [0, 0]
+
+    with pytest.raises(UnsupportedTypeError):
+
+        @mylib.structure(byte_order='big')
+        class Named:
+
+            name: str
+
+    with pytest.raises(ValueError):
+        mylib.structure(byte_order='middle')
+
+
+def test_struct_arrays():
+
+    @mylib.structure(int_bits=16)
+    class Sample:
+
+        name: CArray[str, 8]
+        values: CArray[CDouble, 4]
+        ints: CArray[int, 3]
+        origin: Point
+        corners: CArray[Point, 2]
+
+    sample = Sample(name='first', values=[1.5, 2.5], ints=array('h', [1, 2, 3]), origin=Point(x=1, y=2))
+    assert Sample.ints.size == 6
+
+    assert sample.name == 'first'
+    assert sample.values.tolist() == [1.5, 2.5, 0, 0]
+    assert list(sample.ints) == [1, 2, 3]
+    assert (sample.origin.x, sample.origin.y) == (1, 2)
+    assert len(sample.corners) == 2
+
+    # Views share structure memory.
+    sample.values[3] = 9
+    sample.origin.y = 7
+    sample.corners[1].x = 4
+    assert sample.values[3] == 9
+    assert sample.origin.y == 7
+    assert sample.corners[1].x == 4
+
+    sample.name = b'second'
+    assert sample.name == 'second'
+
+    sample.ints = [4, 5]  # Elements converted one by one.
+    assert list(sample.ints) == [4, 5, 0]
+
+    sample.ints = bytes(array('h', [6, 7, 8]))  # Copied at once.
+    assert list(sample.ints) == [6, 7, 8]
+
+    sample.origin = Point(x=5, y=6)
+    assert sample.origin.y == 6
+
+    sample = Sample.from_records([('a', [1.0], [1, 2, 3])])[0]
+    assert (sample.name, sample.values[0], sample.ints[2]) == ('a', 1.0, 3)
+
+    with pytest.raises(ValueError):
+        sample.name = 'toolongname'
+
+    with pytest.raises(UnsupportedTypeError):
+
+        @mylib.structure()
+        class Names:
+
+            names: CArray[CChars, 2]
+
+    @mylib.structure(byte_order='big')
+    class Header:
+
+        lengths: CArray[CInt16U, 2]
+
+    header = Header.from_buffer_copy(b'\x00\x01\x01\x00')
+    assert list(header.lengths) == [1, 256]  # Not native byte order: ctypes array.
+
+    # Non-native arrays are written as well.
+    header = Header(lengths=[1, 256])
+    assert bytes(header) == b'\x00\x01\x01\x00'
+
+    header.lengths = (2, 3)
+    assert bytes(header) == b'\x00\x02\x00\x03'
+
+    header.lengths = header.lengths
+    assert list(header.lengths) == [2, 3]
+
+    header.lengths = array('H', [4, 5])  # Native buffer: items converted one by one.
+    assert bytes(header) == b'\x00\x04\x00\x05'
+
+    @mylib.structure(byte_order='little')
+    class HeaderLE:
+
+        values: CArray[CInt32, 3]
+
+    assert bytes(HeaderLE(values=[1, 2, 3])) == struct.pack('<3i', 1, 2, 3)
+
+    numpy = pytest.importorskip('numpy')
+
+    sample.values = numpy.arange(4, dtype=numpy.float64)
+    assert numpy.asarray(sample.values).tolist() == [0, 1, 2, 3]
+
+    sample.ints = numpy.arange(3)  # int64 items converted one by one.
+    assert list(sample.ints) == [0, 1, 2]
+
+    view = Sample.as_numpy(Sample.array(2))
+    assert view.dtype['name'] == numpy.dtype('S8')
+    assert view.dtype['values'].shape == (4,)
+
+
+def test_struct_numpy():
+    numpy = pytest.importorskip('numpy')
+
+    dtype = MyStruct.numpy_dtype()
+    assert dtype.itemsize == ctypes.sizeof(MyStruct)
+    assert dtype.fields['third'][1] == MyStruct.third.offset
+
+    points = Point.array(4)
+    view = Point.as_numpy(points)
+    view['x'] = numpy.arange(4)
+    view['y'] = 10
+
+    assert points[3].x == 3
+    assert sum_points(CRef(points), len(points)) == 46
+
+    points[0].y = 5
+    assert view[0]['y'] == 5
+
+    @mylib.structure(pack=1, int_bits=8)
+    class Packed:
+
+        first: int
+        second: CInt32
+
+    dtype = Packed.numpy_dtype()
+    assert dtype.itemsize == 5
+    assert dtype.fields['second'][1] == 1
+
+    @mylib.structure(byte_order='big')
+    class Header:
+
+        kind: CInt8U
+        length: CInt16U
+
+    view = Header.as_numpy(bytearray(b'\x01\x00\x01\x02'))
+    assert view['length'][0] == 258
+    assert view.dtype.fields['length'][0].byteorder == '>'
+
+
+lib_buffer = Library(MYLIB_PATH, int_bits=32)
+
+
+@lib_buffer.f('f_prefix_one_sum_points')
+def sum_points_buffer(points: CBuffer[Point], count: int) -> int:
+    ...
+
+
+lib_buffer.bind_types()
+
+
+def test_buffer():
+
+    ints = array('i', [1, 2, 3])
+    assert sum_ints(ints, 3) == 6
+    assert sum_ints(memoryview(ints)[1:], 2) == 5
+    assert sum_ints(bytes(ints), 3) == 6  # read-only
+    assert sum_ints(memoryview(bytes(ints))[4:], 2) == 5  # read-only view
+    assert sum_ints(bytearray(ints.tobytes()), 3) == 6  # raw bytes
+    assert sum_ints((ctypes.c_int32 * 2)(4, 5), 2) == 9
+
+    fill_ints(ints, 2, 7)
+    assert list(ints) == [7, 7, 3]
+
+    with pytest.raises(ctypes.ArgumentError) as e:
+        sum_ints(array('d', [1, 2]), 2)
+    assert 'item size' in str(e.value)
+
+    with pytest.raises(ctypes.ArgumentError) as e:
+        sum_ints(array('f', [1, 2]), 2)
+    assert 'mismatch element type' in str(e.value)
+
+    with pytest.raises(ctypes.ArgumentError) as e:
+        sum_ints(memoryview(ints)[::2], 2)
+    assert 'contiguous' in str(e.value)
+
+    points = Point.from_records([(1, 2), (3, 4)])
+    assert sum_points_buffer(points, 2) == 10
+
+
+def test_buffer_numpy():
+    numpy = pytest.importorskip('numpy')
+
+    ints = numpy.arange(4, dtype=numpy.int32)
+    assert sum_ints(ints, 4) == 6
+
+    ints.flags.writeable = False
+    assert sum_ints(ints, 4) == 6
+
+    with pytest.raises(ctypes.ArgumentError):
+        sum_ints(numpy.arange(4, dtype=numpy.int64), 4)
+
+    with pytest.raises(ctypes.ArgumentError):
+        sum_ints(numpy.arange(4, dtype='>i4'), 4)
+
+    points = Point.as_numpy(Point.array(2))
+    points['x'] = 3
+    assert sum_points_buffer(points, 2) == 6
+
+
+def test_buffer_unsupported():
+
+    class SomeType: pass
+
+    lib = Library(MYLIB_PATH)
+
+    @lib.f('buggy1')
+    def buggy3(one: CBuffer[SomeType]) -> int:
+        ...
+
+    with pytest.raises(UnsupportedTypeError) as e:
+        lib.bind_types()
+
+    assert 'buggy3' in str(e.value)
+
+
+def test_mmap(tmp_path):
+
+    fpath = tmp_path / 'points.bin'
+    fpath.write_bytes(bytes(Point.from_records([(1, 2), (3, 4), (5, 6)])))
+
+    points = Point.mmap(fpath)
+    assert len(points) == 3
+    assert points[2].y == 6
+    assert sum_points(CRef(points), len(points)) == 21
+
+    points = Point.mmap(fpath, count=1, offset=ctypes.sizeof(Point))
+    assert len(points) == 1
+    assert points[0].x == 3
+
+    # Private changes.
+    points[0].x = 10
+    assert Point.mmap(fpath)[1].x == 3
+
+    assert sum_points(CRef.mmap(fpath, Point), 3) == 21
+
+    ints = CRef.mmap(fpath, int, writable=True)
+    assert list(ints) == [1, 2, 3, 4, 5, 6]
+    byref_int(ints)
+    assert Point.mmap(fpath)[0].x == 33
+
+    with pytest.raises(CtypedException) as e:
+        Point.mmap(fpath, offset=100)
+
+    assert 'out of file bounds' in str(e.value)
+
+    with pytest.raises(CtypedException) as e:
+        Point.mmap(fpath, count=4)
+
+    assert 'too small' in str(e.value)
+
+    fpath_empty = tmp_path / 'empty.bin'
+    fpath_empty.write_bytes(b'')
+
+    with pytest.raises(CtypedException) as e:
+        CRef.mmap(fpath_empty, Point)
+
+    assert 'empty file' in str(e.value)
+
+
+def test_gil():
+    assert spin(4) == 6
+
+    # Held GIL: PyDLL semantics.
+    assert spin._flags_ & ctypes._FUNCFLAG_PYTHONAPI
+    assert not uint8_add._flags_ & ctypes._FUNCFLAG_PYTHONAPI
+
+    # errno is kept.
+    assert spin._flags_ & ctypes._FUNCFLAG_USE_ERRNO
+
+
+def test_aio():
+
+    lib = Library(MYLIB_PATH, int_bits=64, aio_limit=2)
+
+    @lib.f('with_errno')
+    def aio_with_errno() -> int:
+        ...
+
+    with lib.scope('f_prefix_one_'):
+
+        @lib.f('spin')
+        def aio_spin(iterations: int) -> int:
+            ...
+
+        class AioProber(CInt):
+
+            @lib.m('probe_add_two')
+            def probe_add_three(self: CInt, cfunc) -> int:
+                return cfunc() + 1
+
+    lib.bind_types()
+
+    async def run():
+        results = await asyncio.gather(*[lib.aio.aio_spin(num) for num in range(5)])
+        assert results == [0, 0, 1, 3, 6]
+
+        ctypes.set_errno(0)
+        assert await lib.aio['with_errno']() == 333
+        assert get_last_error().code == 'ENOENT'
+
+        assert await lib.aio.probe_add_three(AioProber(1)) == 4
+
+    # No asyncio.run() on Python 3.6.
+    loop = asyncio.new_event_loop()
+
+    try:
+        loop.run_until_complete(run())
+
+    finally:
+        loop.close()
+
+    with pytest.raises(AttributeError):
+        lib.aio.unknown_func
+
+
+def test_bind_cache(tmp_path, monkeypatch):
+
+    def declare():
+        lib = Library(MYLIB_PATH, int_bits=32, cache=tmp_path)
+
+        with lib.scope('f_prefix_one_'):
+
+            @lib.f('sum_points')
+            def cached_sum_points(points: CRef, count: int) -> int:
+                ...
+
+            @lib.f('char_p')
+            def cached_func_str(some: str) -> str:
+                ...
+
+            @lib.f('handle_mystruct')
+            def cached_handle_mystruct(val: MyStruct) -> MyStruct:
+                ...
+
+        lib.bind_types()
+
+        return cached_sum_points, cached_func_str, cached_handle_mystruct
+
+    func_points, func_str, func_struct = declare()
+    cache_files = list(tmp_path.glob('bind-*.json'))
+    assert len(cache_files) == 1
+    assert func_str('mind') == 'hereyouare: mind'
+
+    def cast_type(*args, **kwargs):
+        raise AssertionError('Types are expected to be taken from cache')
+
+    monkeypatch.setattr('ctyped.library.cast_type', cast_type)
+
+    func_points, func_str, func_struct = declare()
+    assert func_str('mind') == 'hereyouare: mind'
+    assert func_points(CRef(Point.from_records([(1, 2), (3, 4)])), 2) == 10
+    assert func_struct(MyStruct(first=2, second='any', third=MyStruct(first=10))).second == 'anything'
+    assert list(tmp_path.glob('bind-*.json')) == cache_files
+
+
+def test_bind_cache_aliases(tmp_path, monkeypatch):
+
+    libpath = tmp_path / 'mylib.so'
+    libpath.write_bytes(Path(MYLIB_PATH).read_bytes())
+
+    module = tmp_path / 'cached_module.py'
+    source = (
+        'from ctyped.toolbox import Library\n'
+        'from ctyped.types import CInt32, CInt64\n'
+        'CachedAlias = {alias}\n'
+        'lib = Library(libpath, int_bits=32, cache=cache_dir, **options)\n'
+        '@lib.f("f_prefix_one_uint64_add")\n'
+        'def cached_uint64_add(val: "CachedAlias") -> "CachedAlias": ...\n'
+        'lib.bind_types()\n'
+    )
+
+    def declare(**options):
+        declared = runpy.run_path(str(module), init_globals={
+            'libpath': str(libpath), 'cache_dir': tmp_path / 'cache', 'options': options})
+        return declared['lib'], declared['cached_uint64_add']
+
+    module.write_text(source.format(alias='CInt32'))
+    _, func = declare()
+    assert func.argtypes == [ctypes.c_int32]
+
+    # Changed alias is not served from cache.
+    module.write_text(source.format(alias='CInt64  # Changed.'))
+    _, func = declare()
+    assert func.argtypes == [ctypes.c_int64]
+
+    # Library is not loaded yet.
+    lib, func = declare(autoload=False, lazy=True)
+    assert lib.lib is not None
+    assert func(2) == 3
+
+    def cast_type(*args, **kwargs):
+        raise AssertionError('Types are expected to be taken from cache')
+
+    monkeypatch.setattr('ctyped.library.cast_type', cast_type)
+
+    # Touched library with the same contents.
+    stat = libpath.stat()
+    os.utime(str(libpath), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    _, func = declare()
+    assert func.argtypes == [ctypes.c_int64]
+    _, func = declare()
+    assert func.argtypes == [ctypes.c_int64]
+
+
+def test_instrument():
+
+    lib = Library(MYLIB_PATH, int_bits=32, instrument=True)
+
+    with lib.scope('f_prefix_one_'):
+
+        @lib.f('char_p')
+        def instr_func_str(some: str) -> str:
+            ...
+
+        @lib.f('byref_int')
+        def instr_byref_int(val: CRef) -> None:
+            ...
+
+        @lib.f('uint8_add', fast_call=True)
+        def instr_fast_uint8_add(val: int) -> int:
+            ...
+
+    # Not forced into fast call mode.
+    assert not hasattr(instr_func_str.cfunc, 'ctyped_fast')
+
+    lib.bind_types()
+
+    for _ in range(3):
+        assert instr_func_str('mind') == 'hereyouare: mind'
+
+    byref_val = CRef.cint()
+    instr_byref_int(byref_val)
+    assert byref_val == 33
+
+    assert instr_fast_uint8_add(4) == 5
+
+    snapshot = lib.instrument.snapshot(percentiles=[50, 100])
+    stats = snapshot['f_prefix_one_char_p']
+    assert stats.count == 3
+    assert stats.marshal == 0  # Conversion is a part of ctypes call.
+    assert stats.native > 0
+    assert stats.total == pytest.approx(stats.marshal + stats.native)
+    assert 0 < stats.percentiles[50] <= stats.percentiles[100]
+    assert snapshot['f_prefix_one_byref_int'].count == 1
+
+    stats = snapshot['f_prefix_one_uint8_add']
+    assert stats.count == 1
+    assert stats.marshal > 0
+    assert stats.native > 0
+
+    exported = lib.instrument.to_prometheus()
+    assert '# TYPE ctyped_calls_total counter' in exported
+    assert 'ctyped_calls_total{library="mylib.so",function="f_prefix_one_char_p"} 3' in exported
+    assert 'ctyped_call_seconds{library="mylib.so",function="f_prefix_one_char_p",quantile="0.99"}' in exported
+
+    lib.instrument.reset()
+    assert lib.instrument.snapshot()['f_prefix_one_char_p'].count == 0
+
+    # Calls from several threads are all counted.
+    def call_many():
+        for _ in range(500):
+            instr_func_str('mind')
+
+    threads = [threading.Thread(target=call_many) for _ in range(4)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert lib.instrument.snapshot()['f_prefix_one_char_p'].count == 2000
+
+    # No overhead for libraries not instrumented.
+    assert mylib.instrument is None
+
+
+def test_map():
+    assert uint8_add.map(range(4)) == [1, 2, 3, 4]
+    assert uint8_add.map([254, 255]) == [255, 0]
+    assert fast_uint8_add.map(range(3)) == [1, 2, 3]
+
+    # Ints in parameters types bounds are passed with no conversion, others are converted as usual.
+    assert uint8_add.ctyped_map.ctyped_bounds == [(0, 255)]
+    assert uint8_add.map([256, -1]) == [1, 0]
+
+    with pytest.raises(ctypes.ArgumentError):
+        uint8_add.map([1.5])
+
+    # Methods.
+    assert Prober.probe_add_one.map([Prober(1), Prober(2)]) == [2, 3]
+    assert Prober.probe_add_three.map([Prober(1), Prober(2)]) == [4, 5]
+    assert FastProber.probe_add_one.map([FastProber(1)]) == [2]
+    assert Prober(5).probe_add_one() == 6
+    assert func_str.map(['a', 'b']) == ['hereyouare: a', 'hereyouare: b']
+
+    results = uint8_add.map(range(3), lazy=True)
+    assert not isinstance(results, list)
+    assert list(results) == [1, 2, 3]
+
+    out = array('B', [0] * 4)
+    assert uint8_add.map(array('B', [1, 2, 3]), out=out) is out
+    assert list(out) == [2, 3, 4, 0]
+
+    out = [None] * 3
+    uint8_add.map(range(2), out=out)
+    assert out == [1, 2, None]
+
+    with pytest.raises(IndexError):
+        uint8_add.map(range(3), out=array('B', [0]))
+
+    with pytest.raises(ValueError):
+        uint8_add.map(range(3), out=[], lazy=True)
+
+    numpy = pytest.importorskip('numpy')
+
+    out = numpy.zeros(3, dtype=numpy.uint8)
+    uint8_add.map(numpy.arange(3, dtype=numpy.uint8), out=out)
+    assert out.tolist() == [1, 2, 3]
+
+
+@pytest.mark.skipif(sys.version_info < (3, 8), reason='Requires shared memory')
+def test_pool():
+
+    with mylib.pool(processes=2) as pool:
+
+        assert pool.submit('uint8_add', 4).result() == 5
+        assert pool.submit('func_str', 'mind').result() == 'hereyouare: mind'
+
+        ints = array('i', [1, 2, 3])
+        assert pool.submit('sum_ints', ints, 3).result() == 6
+
+        # Changes are copied back from shared memory.
+        assert pool.submit('f_prefix_one_fill_ints', ints, 2, 7).result() is None
+        assert list(ints) == [7, 7, 3]
+
+        assert pool.map('uint8_add', range(10)) == list(range(1, 11))
+
+        out = array('B', [0] * 5)
+        assert pool.map('uint8_add', array('B', [1, 2, 3, 4]), out=out, chunksize=3) is out
+        assert list(out) == [2, 3, 4, 5, 0]
+
+        out = [None] * 3
+        pool.map('uint8_add', [1, 2], out=out)
+        assert out == [2, 3, None]
+
+        with pytest.raises(KeyError):
+            pool.submit('unknown')